@@ -1,11 +1,138 @@
-from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from filelock import FileLock, Timeout
 import os
+import time
+import uuid
+
+from .. import metrics
+from .result_cache import make_key, result_cache
+from .tts import concat_mp3, get_engine, split_script
+
+OUTRO = "Thanks for listening to this episode. Stay tuned for more insightful research breakdowns."
+
+# Shared by every AudioAgent so concurrent papers can't oversubscribe the TTS service
+_tts_pool = ThreadPoolExecutor(max_workers=settings.TTS_WORKERS, thread_name_prefix="tts")
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def audio_dir():
+    return os.path.join(settings.MEDIA_ROOT, "audios")
+
+
+def lock_path(key):
+    locks = os.path.join(audio_dir(), ".locks")
+    os.makedirs(locks, exist_ok=True)
+    return os.path.join(locks, f"{key}.lock")
+
+
+def prune_audio(max_bytes, max_idle_seconds=None, dry_run=False):
+    """Delete the least recently served audio files until the rest fit in ``max_bytes``.
+
+    Files idle for longer than ``max_idle_seconds`` go regardless. Serving a
+    file touches its mtime, so mtime is the last access. Returns the
+    media-relative names of the deleted files.
+    """
+    if not os.path.isdir(audio_dir()):
+        return []
+    files = []
+    for entry in os.scandir(audio_dir()):
+        if entry.is_file() and entry.name.endswith(".mp3"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path, f"audios/{entry.name}"))
+    files.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _, _ in files)
+    deleted = []
+    for mtime, size, path, name in files:
+        idle = max_idle_seconds and now - mtime > max_idle_seconds
+        if total <= max_bytes and not idle:
+            continue
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        deleted.append(name)
+
+    if not dry_run:
+        prune_locks(now - 3600)
+    return deleted
+
+
+def prune_locks(before):
+    """Delete lock files last used before ``before`` that no process holds.
+
+    A lock is only needed while its file is being generated. One that is
+    held, or that can't be taken right away, is left alone: removing it
+    would let another process render the same file alongside the holder.
+    """
+    locks = os.path.join(audio_dir(), ".locks")
+    if not os.path.isdir(locks):
+        return
+    for entry in os.scandir(locks):
+        if not entry.name.endswith(".lock"):
+            continue
+        try:
+            if entry.stat().st_mtime > before:
+                continue
+            with FileLock(entry.path, timeout=0):
+                os.remove(entry.path)
+        except (Timeout, FileNotFoundError):
+            pass
+
+
 class AudioAgent:
+    def __init__(self, engine=None):
+        self.engine = engine or get_engine()
+
+    def intro(self, topic=None):
+        return f"Welcome to today's podcast on {topic}." if topic else "Welcome to today's research summary."
+
+    def segment(self, text):
+        """Pre-rendered audio for fixed text (intros, outro), synthesized once per engine."""
+        key = make_key("audio-segment", self.engine.name, text)
+        path = os.path.join(settings.MEDIA_ROOT, "audios", "segments", f"{key}.mp3")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            data = self.engine.synthesize(text)
+            write_atomic(path, data)
+            return data
+
     def generate_audio(self, summary, path, topic=None):
-        intro = f"Welcome to today's podcast on {topic}. " if topic else "Welcome to today's research summary. "
-        outro = "Thanks for listening to this episode. Stay tuned for more insightful research breakdowns."
-        full_script = f"{intro}{summary} {outro}"
+        with metrics.timer("tts"):
+            intro = _tts_pool.submit(self.segment, self.intro(topic))
+            outro = _tts_pool.submit(self.segment, OUTRO)
+            chunks = list(_tts_pool.map(self.engine.synthesize, split_script(summary)))
+            data = concat_mp3([intro.result(), *chunks, outro.result()])
+        metrics.count("tts_chunks", len(chunks), engine=self.engine.name)
+        write_atomic(path, data)
+
+    def audio_for(self, summary, topic=None):
+        """Return the media-relative path of the audio for this summary, generating it once."""
+        key = make_key("audio", self.engine.name, topic, summary)
+        name = f"audios/{key}.mp3"
+
+        def generate():
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            # The file lock also covers other worker processes asking for the same paper
+            with FileLock(lock_path(key), timeout=settings.AUDIO_LOCK_TIMEOUT):
+                if not os.path.exists(path):
+                    self.generate_audio(summary, path, topic)
+            return name
+
+        def exists(cached_name):
+            return os.path.exists(os.path.join(settings.MEDIA_ROOT, cached_name))
 
-        tts = gTTS(text=full_script)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        tts.save(path)
\ No newline at end of file
+        return result_cache.get_or_compute("audio", key, generate, validate=exists)
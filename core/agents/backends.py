@@ -0,0 +1,84 @@
+import logging
+import sys
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# ONNX Runtime model class for each pipeline task
+ORT_MODELS = {
+    "summarization": "ORTModelForSeq2SeqLM",
+    "zero-shot-classification": "ORTModelForSequenceClassification",
+    "feature-extraction": "ORTModelForFeatureExtraction",
+}
+
+_threads_lock = threading.Lock()
+_threads_configured = False
+
+
+def configure_threads():
+    """Apply INFERENCE_THREADS / INFERENCE_INTEROP_THREADS to torch, once per process."""
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured:
+            return
+        _threads_configured = True
+        import torch
+        if settings.INFERENCE_THREADS:
+            torch.set_num_threads(settings.INFERENCE_THREADS)
+        if settings.INFERENCE_INTEROP_THREADS:
+            try:
+                torch.set_num_interop_threads(settings.INFERENCE_INTEROP_THREADS)
+            except RuntimeError:
+                # Only allowed before torch has started any parallel work
+                logger.warning("Inter-op threads already initialised, INFERENCE_INTEROP_THREADS ignored")
+
+
+def reset_threads():
+    """Re-apply INFERENCE_THREADS in a worker forked after the models loaded; its parent's pool threads don't survive fork."""
+    torch = sys.modules.get("torch")
+    if torch is not None and settings.INFERENCE_THREADS:
+        torch.set_num_threads(settings.INFERENCE_THREADS)
+
+
+def quantize(model):
+    """Dynamic int8 quantization of every Linear layer; activations stay fp32."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_ort_model(task, name):
+    try:
+        import onnxruntime
+        import optimum.onnxruntime
+    except ImportError:
+        raise ImproperlyConfigured("INFERENCE_BACKEND=onnx needs `pip install optimum[onnxruntime]`")
+
+    options = onnxruntime.SessionOptions()
+    if settings.INFERENCE_THREADS:
+        options.intra_op_num_threads = settings.INFERENCE_THREADS
+    if settings.INFERENCE_INTEROP_THREADS:
+        options.inter_op_num_threads = settings.INFERENCE_INTEROP_THREADS
+    model_class = getattr(optimum.onnxruntime, ORT_MODELS[task])
+    # export=True converts the checkpoint on first load; huggingface caches the download, not the export
+    return model_class.from_pretrained(name, export=True, session_options=options)
+
+
+def load_pipeline(task, name, backend=None):
+    backend = backend or settings.INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"Unknown INFERENCE_BACKEND: {backend}")
+
+    from transformers import AutoTokenizer, pipeline
+    configure_threads()
+    if backend == "onnx":
+        return pipeline(task, model=load_ort_model(task, name), tokenizer=AutoTokenizer.from_pretrained(name))
+
+    pipe = pipeline(task, model=name)
+    if backend == "torch-int8":
+        pipe.model = quantize(pipe.model)
+    return pipe
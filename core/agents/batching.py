@@ -0,0 +1,18 @@
+def length_buckets(texts, batch_size):
+    """Yield index lists of up to ``batch_size`` texts of similar length.
+
+    Sorting by length before batching keeps the padding inside each
+    batch small, so a batch costs about as much as its longest member.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+def run_batched(pipe, texts, batch_size, **kwargs):
+    results = [None] * len(texts)
+    for indices in length_buckets(texts, max(batch_size, 1)):
+        outputs = pipe([texts[i] for i in indices], batch_size=len(indices), **kwargs)
+        for i, output in zip(indices, outputs):
+            results[i] = output
+    return results
@@ -0,0 +1,55 @@
+import numpy as np
+from django.conf import settings
+
+from .. import metrics
+from .batching import length_buckets
+from .model_registry import registry
+
+
+class SentenceEncoder:
+    """Mean-pooled sentence embeddings from a transformers encoder."""
+
+    def __init__(self, name, backend=None):
+        from transformers import AutoModel, AutoTokenizer
+        from .backends import configure_threads, load_ort_model, quantize
+        backend = backend or settings.INFERENCE_BACKEND
+        configure_threads()
+        self.name_or_path = name
+        self.tokenizer = AutoTokenizer.from_pretrained(name)
+        if backend == "onnx":
+            self.model = load_ort_model("feature-extraction", name)
+        else:
+            self.model = AutoModel.from_pretrained(name).eval()
+            if backend == "torch-int8":
+                self.model = quantize(self.model)
+
+    def encode(self, texts, batch_size=32, max_length=256):
+        import torch
+        vectors = np.zeros((len(texts), self.model.config.hidden_size), dtype=np.float32)
+        for indices in length_buckets(texts, batch_size):
+            tokens = self.tokenizer([texts[i] for i in indices], padding=True, truncation=True,
+                                    max_length=max_length, return_tensors="pt")
+            with torch.inference_mode():
+                hidden = self.model(**tokens).last_hidden_state
+            mask = tokens["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1)
+            vectors[indices] = pooled.numpy()
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingAgent:
+    def __init__(self):
+        self.encoder = registry.get("sentence-embedding")
+
+    @property
+    def model_name(self):
+        return self.encoder.name_or_path
+
+    def embed(self, texts):
+        with metrics.timer("embed"):
+            return self.encoder.encode(list(texts), batch_size=settings.INFERENCE_BATCH_SIZE * 4)
+
+    @staticmethod
+    def paper_text(paper):
+        return f"{paper.title}. {paper.summary or ''}"
@@ -1,46 +1,179 @@
 import fitz
-import requests
-import tempfile
-import os
+import multiprocessing
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .. import metrics
+from .fetcher import fetcher
+from .pdf_pages import extract_page_range
+from .result_cache import file_digest, make_key, result_cache
 
 doi_prefixes = ["https://doi.org/", "http://dx.doi.org/"]
 
+# Section headings as PyMuPDF lays them out: on a line of their own, optionally numbered
+ABSTRACT_HEADING = re.compile(r"^[ \t]*abstract\b[\s.:\u2014-]*", re.IGNORECASE | re.MULTILINE)
+INTRODUCTION_HEADING = re.compile(r"^[ \t]*(?:1\.?|I\.)?[ \t]*introduction[ \t]*$", re.IGNORECASE | re.MULTILINE)
+SECTION_TWO_HEADING = re.compile(r"^[ \t]*(?:2\.?|II\.)[ \t]+[A-Z][^\n]{0,80}$", re.MULTILINE)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _page_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web process runs threads (job workers, model loads)
+            _pool = ProcessPoolExecutor(settings.EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def lead_text(pages, lead_chars):
+    """Read ``pages`` only until the front of the paper is in hand.
+
+    Text starts at the Abstract heading when there is one, skipping the
+    title and author block. Reading stops at the heading of section 2 (the
+    end of the introduction) or once ``lead_chars`` characters have been
+    collected, whichever comes first. Returns ``(text, pages_read)``.
+    """
+    text, start, read = "", None, 0
+    for page in pages:
+        text += page + "\n"
+        read += 1
+        if start is None:
+            match = ABSTRACT_HEADING.search(text)
+            start = match.end() if match else None
+        body = text[start or 0:]
+        introduction = INTRODUCTION_HEADING.search(body)
+        section_two = introduction and SECTION_TWO_HEADING.search(body, introduction.end())
+        if section_two:
+            return body[:section_two.start()], read
+        if len(body) >= lead_chars:
+            return body, read
+    return text[start or 0:], read
+
+
 class ExtractionAgent:
-    def extract_text(self, file_path):
-        doc = fitz.open(file_path)
-        return "\n".join(page.get_text() for page in doc)
-
-    def extract_from_url(self, url):
-        response = requests.get(url)
-        if response.status_code == 200:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(response.content)
-                tmp_path = tmp_file.name
-            text = self.extract_text(tmp_path)
-            os.remove(tmp_path)
-            return text
-        return ""
+    def iter_pages(self, file_path, max_pages=None, max_chars=None):
+        """Yield page texts in order, stopping once the page or character budget is spent.
+
+        Large documents are split into page ranges that are extracted in
+        parallel worker processes, a few ranges ahead of the consumer.
+        """
+        with fitz.open(file_path) as doc:
+            yield from self._iter_doc(doc, file_path, max_pages, max_chars)
+
+    def _iter_doc(self, doc, file_path, max_pages=None, max_chars=None):
+        page_count = doc.page_count
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        if page_count < settings.EXTRACTION_PARALLEL_MIN_PAGES or settings.EXTRACTION_WORKERS < 2:
+            chars = 0
+            for number in range(page_count):
+                text = doc[number].get_text()
+                yield text
+                chars += len(text)
+                if max_chars and chars >= max_chars:
+                    return
+            return
+
+        yield from self._iter_pages_parallel(file_path, page_count, max_chars)
+
+    def _iter_pages_parallel(self, file_path, page_count, max_chars=None):
+        pool = _page_pool()
+        step = settings.EXTRACTION_PAGES_PER_TASK
+        ranges = deque((start, start + step) for start in range(0, page_count, step))
+        in_flight = deque()
+        chars = 0
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < settings.EXTRACTION_WORKERS * 2:
+                    start, stop = ranges.popleft()
+                    in_flight.append(pool.submit(extract_page_range, file_path, start, min(stop, page_count)))
+                for text in in_flight.popleft().result():
+                    yield text
+                    chars += len(text)
+                    if max_chars and chars >= max_chars:
+                        return
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def extract_text(self, file_path, max_pages=None, max_chars=None, lead_chars=None):
+        key = make_key("extract", "pymupdf", fitz.VersionBind, max_pages, max_chars, lead_chars, file_digest(file_path))
+        return result_cache.get_or_compute(
+            "extract", key, lambda: self._extract_text(file_path, max_pages, max_chars, lead_chars)
+        )
+
+    def _extract_text(self, file_path, max_pages=None, max_chars=None, lead_chars=None):
+        return self._join(self.iter_pages(file_path, max_pages, max_chars), lead_chars)
+
+    def extract_document(self, file_path, max_pages=None, lead_chars=None):
+        """Return ``(text, metadata)``, with the PDF metadata read from the same open document."""
+        def run():
+            with fitz.open(file_path) as doc:
+                metadata = dict(doc.metadata or {})
+                return [self._join(self._iter_doc(doc, file_path, max_pages), lead_chars), metadata]
+
+        key = make_key("extract_document", "pymupdf", fitz.VersionBind, max_pages, lead_chars, file_digest(file_path))
+        text, metadata = result_cache.get_or_compute("extract", key, run)
+        return text, metadata
+
+    def _join(self, pages, lead_chars=None):
+        """Join page texts, or with ``lead_chars`` stop reading once ``lead_text`` has enough."""
+        with metrics.timer("extract"):
+            if lead_chars:
+                text, read = lead_text(pages, lead_chars)
+                # Stops the page generator now, closing the document and cancelling queued ranges
+                pages.close()
+            else:
+                pages = list(pages)
+                text, read = "\n".join(pages), len(pages)
+        metrics.count("pages_extracted", read)
+        return text
+
+    def download(self, url, headers=None, timeout=None, require_pdf=False):
+        """Fetch a document through the shared fetcher and return the path of its cached body, or None."""
+        result = fetcher.fetch(url, headers=headers, timeout=timeout)
+        if not result.ok:
+            return None
+        if require_pdf and "application/pdf" not in result.content_type:
+            return None
+        return result.path
+
+    def extract_from_url(self, url, max_pages=None, max_chars=None, lead_chars=None, **download_kwargs):
+        """Fetch ``url`` and extract it; "" if it could not be fetched.
+
+        The fetcher revalidates its copy of the body, and the extraction is
+        cached on the digest of those bytes, so a changed document is
+        extracted again.
+        """
+        path = self.download(url, **download_kwargs)
+        if path is None:
+            return ""
+        return self.extract_text(path, max_pages, max_chars, lead_chars)
 
-    def extract_from_doi(self, doi):
+    def extract_from_doi(self, doi, max_pages=None, max_chars=None, lead_chars=None):
         # Handle arXiv DOI
         if doi.startswith("10.48550/arXiv."):
             arxiv_id = doi.split("arXiv.")[1]
             pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-            return self.extract_from_url(pdf_url)
+            return self.extract_from_url(pdf_url, max_pages, max_chars, lead_chars)
 
-        # Existing logic (PDF header fetch)
+        # Ask the resolvers for the PDF; an unreachable resolver raises, as any other fetch does
         for prefix in ["https://doi.org/", "http://dx.doi.org/"]:
             full_url = prefix + doi if not doi.startswith(prefix) else doi
             try:
                 headers = {"Accept": "application/pdf"}
-                response = requests.get(full_url, headers=headers, timeout=10, allow_redirects=True)
-                if response.status_code == 200 and "application/pdf" in response.headers.get("Content-Type", ""):
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                        tmp_file.write(response.content)
-                        tmp_path = tmp_file.name
-                    text = self.extract_text(tmp_path)
-                    os.remove(tmp_path)
+                text = self.extract_from_url(full_url, max_pages, max_chars, lead_chars,
+                                             headers=headers, timeout=10, require_pdf=True)
+                if text:
                     return text
-            except Exception:
+            except fitz.FileDataError:
+                # Served as application/pdf but not a PDF
                 continue
         return ""
@@ -0,0 +1,345 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .. import metrics
+
+# Request headers that select a different representation of the same URL
+VARY_HEADERS = ("Accept",)
+KEPT_RESPONSE_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Content-Length")
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Cache-Control directives that forbid keeping a response for other requests
+UNCACHEABLE_DIRECTIVES = {"no-store", "private"}
+
+
+class FetchResult:
+    def __init__(self, url, status_code, headers, path=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.path = path  # body on disk; None for non-200 responses
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code == 200 and self.path is not None
+
+    @property
+    def content_type(self):
+        return self.headers.get("Content-Type", "")
+
+    @property
+    def content(self):
+        if not self.ok:
+            return b""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    @property
+    def charset(self):
+        """The charset named in Content-Type, or None."""
+        for param in self.content_type.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "charset" and value:
+                return value.strip('"')
+        return None
+
+    @property
+    def text(self):
+        return self.content.decode(self.charset or "utf-8", errors="replace")
+
+
+class Fetcher:
+    """Shared HTTP client for every outbound fetch.
+
+    One pooled session with retries and backoff, a per-host concurrency
+    limit, and an on-disk response cache. Cached responses younger than
+    ``fresh_seconds`` are served without touching the network. Older ones
+    are revalidated with If-None-Match/If-Modified-Since.
+
+    ``afetch`` is the same fetch for async views, on httpx. Both share the
+    cache, so sync code can read what an async fetch stored.
+
+    A body over ``max_body_bytes`` is not downloaded further and comes
+    back as a non-ok 413 result. Responses marked ``no-store`` or
+    ``private`` are handed to the caller but never served from the cache.
+    """
+
+    def __init__(self, cache_dir, fresh_seconds=300, max_per_host=4, retries=3, backoff=0.5,
+                 timeout=30, max_cache_bytes=1 << 30, max_body_bytes=None, user_agent=None):
+        self.cache_dir = str(cache_dir)
+        self.fresh_seconds = fresh_seconds
+        self.timeout = timeout
+        self.max_cache_bytes = max_cache_bytes
+        self.max_body_bytes = max_body_bytes
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.user_agent = user_agent
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # raise_on_status=False: once retries run out, the last 5xx/429 comes back as a non-ok FetchResult
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=("GET", "HEAD"), respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(max_per_host * 4, 10), max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._host_lock = threading.Lock()
+        self._stores = 0
+        # httpx clients and semaphores belong to one event loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_host_limits = weakref.WeakKeyDictionary()
+
+    def _paths(self, url, headers):
+        vary = {name: headers.get(name) for name in VARY_HEADERS if headers.get(name)}
+        key = hashlib.sha256(json.dumps([url, vary], sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _host_limit(self, url):
+        with self._host_lock:
+            return self._host_limits[urlsplit(url).netloc]
+
+    def fetch(self, url, headers=None, timeout=None):
+        with metrics.timer("fetch"):
+            result = self._fetch(url, headers, timeout)
+        metrics.count("fetches", cached=str(result.from_cache).lower(), status=result.status_code)
+        return result
+
+    def _fetch(self, url, headers=None, timeout=None):
+        headers = dict(headers or {})
+        meta_path, body_path = self._paths(url, headers)
+        meta = self._read_meta(meta_path, body_path)
+        if self._is_fresh(meta):
+            return self._cache_hit(meta, meta_path, body_path)
+        self._add_validators(meta, headers)
+
+        with self._host_limit(url):
+            with self.session.get(url, headers=headers, timeout=timeout or self.timeout,
+                                  stream=True, allow_redirects=True) as response:
+                if response.status_code == 304 and meta:
+                    return self._cache_hit(meta, meta_path, body_path, revalidated=response.headers)
+
+                kept = {name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers}
+                if response.status_code != 200:
+                    return FetchResult(response.url, response.status_code, kept)
+                if self._too_large(response.headers) or not self._store_body(response, body_path):
+                    return FetchResult(response.url, 413, kept)
+        return self._stored(response.url, kept, meta_path, body_path, self._cacheable(response.headers))
+
+    async def afetch(self, url, headers=None, timeout=None):
+        """``fetch`` for async code. Cancelling the awaiting task closes the upstream connection."""
+        with metrics.timer("fetch"):
+            result = await self._afetch(url, headers, timeout)
+        metrics.count("fetches", cached=str(result.from_cache).lower(), status=result.status_code)
+        return result
+
+    async def _afetch(self, url, headers=None, timeout=None):
+        headers = dict(headers or {})
+        meta_path, body_path = self._paths(url, headers)
+        meta = self._read_meta(meta_path, body_path)
+        if self._is_fresh(meta):
+            return self._cache_hit(meta, meta_path, body_path)
+        self._add_validators(meta, headers)
+
+        client = self._async_client()
+        async with self._async_host_limit(url):
+            for attempt in range(self.retries + 1):
+                async with client.stream("GET", url, headers=headers, timeout=timeout or self.timeout) as response:
+                    if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                        retry_after = response.headers.get("Retry-After", "")
+                        delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                        await asyncio.sleep(delay)
+                        continue
+                    if response.status_code == 304 and meta:
+                        return self._cache_hit(meta, meta_path, body_path, revalidated=response.headers)
+
+                    kept = {name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers}
+                    if response.status_code != 200:
+                        return FetchResult(str(response.url), response.status_code, kept)
+                    if self._too_large(response.headers) or not await self._astore_body(response, body_path):
+                        return FetchResult(str(response.url), 413, kept)
+                    break
+        return self._stored(str(response.url), kept, meta_path, body_path, self._cacheable(response.headers))
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            limits = httpx.Limits(max_connections=settings.ASYNC_FETCH_MAX_CONNECTIONS, max_keepalive_connections=20)
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(retries=self.retries, limits=limits),
+                headers={"User-Agent": self.user_agent} if self.user_agent else None,
+                follow_redirects=True,
+            )
+        return client
+
+    def _async_host_limit(self, url):
+        loop = asyncio.get_running_loop()
+        limits = self._async_host_limits.get(loop)
+        if limits is None:
+            limits = self._async_host_limits[loop] = defaultdict(lambda: asyncio.Semaphore(self.max_per_host))
+        return limits[urlsplit(url).netloc]
+
+    def _too_large(self, headers):
+        """Whether the announced Content-Length is already over ``max_body_bytes``."""
+        length = headers.get("Content-Length", "")
+        return bool(self.max_body_bytes) and length.isdigit() and int(length) > self.max_body_bytes
+
+    def _over_limit(self, size):
+        return bool(self.max_body_bytes) and size > self.max_body_bytes
+
+    def _cacheable(self, headers):
+        directives = {directive.split("=")[0].strip().lower()
+                      for directive in headers.get("Cache-Control", "").split(",")}
+        return not directives & UNCACHEABLE_DIRECTIVES
+
+    def _is_fresh(self, meta):
+        return meta is not None and time.time() - meta["fetched_at"] < self.fresh_seconds
+
+    def _add_validators(self, meta, headers):
+        if meta:
+            if meta["headers"].get("ETag"):
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+    def _cache_hit(self, meta, meta_path, body_path, revalidated=None):
+        """A cached response; ``revalidated`` is the headers of the 304 that confirmed it, if any."""
+        if revalidated is not None:
+            # A 304 may carry new validators for the same body
+            for name in VALIDATOR_HEADERS:
+                if revalidated.get(name):
+                    meta["headers"][name] = revalidated[name]
+            meta["fetched_at"] = time.time()
+            self._write_meta(meta_path, meta)
+        self._touch(body_path)
+        return FetchResult(meta["url"], 200, meta["headers"], body_path, from_cache=True)
+
+    def _stored(self, url, kept, meta_path, body_path, cacheable=True):
+        if cacheable:
+            self._write_meta(meta_path, {"url": url, "headers": kept, "fetched_at": time.time()})
+        else:
+            # Without its metadata the body is never served again; prune() deletes it in time
+            try:
+                os.remove(meta_path)
+            except FileNotFoundError:
+                pass
+        self._stores += 1
+        if self._stores % 50 == 0:
+            self.prune()
+        return FetchResult(url, 200, kept, body_path)
+
+    def _read_meta(self, meta_path, body_path):
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def _touch(self, body_path):
+        # prune() evicts by mtime, so a hit keeps the body warm
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+    def _write_meta(self, meta_path, meta):
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, delete=False, suffix=".tmp") as f:
+            json.dump(meta, f)
+        os.replace(f.name, meta_path)
+
+    def _store_body(self, response, body_path):
+        """Stream the body to ``body_path``; False, with nothing stored, once it passes ``max_body_bytes``."""
+        # Stream into a temp file and rename, so readers never see a partial body
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False, suffix=".tmp") as f:
+            try:
+                for chunk in response.iter_content(1 << 20):
+                    f.write(chunk)
+                    if self._over_limit(f.tell()):
+                        break
+            except Exception:
+                os.remove(f.name)
+                raise
+            size = f.tell()
+            metrics.count("bytes_fetched", size)
+        return self._keep_body(f.name, size, body_path)
+
+    async def _astore_body(self, response, body_path):
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False, suffix=".tmp") as f:
+            try:
+                async for chunk in response.aiter_bytes(1 << 20):
+                    f.write(chunk)
+                    if self._over_limit(f.tell()):
+                        break
+            except BaseException:
+                # Includes cancellation when the client that asked for this disconnects
+                os.remove(f.name)
+                raise
+            size = f.tell()
+            metrics.count("bytes_fetched", size)
+        return self._keep_body(f.name, size, body_path)
+
+    def _keep_body(self, temp_path, size, body_path):
+        if self._over_limit(size):
+            # Leaving the response block closes the connection, so the rest is never downloaded
+            os.remove(temp_path)
+            return False
+        os.replace(temp_path, body_path)
+        return True
+
+    def prune(self):
+        """Delete the least recently fetched responses until the cache fits ``max_cache_bytes``."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".body"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            for stale in (path, path[:-len(".body")] + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            total -= size
+
+
+fetcher = Fetcher(
+    settings.FETCH_CACHE_DIR,
+    fresh_seconds=settings.FETCH_FRESH_SECONDS,
+    max_per_host=settings.FETCH_MAX_PER_HOST,
+    retries=settings.FETCH_RETRIES,
+    timeout=settings.FETCH_TIMEOUT,
+    max_cache_bytes=settings.FETCH_CACHE_MAX_BYTES,
+    max_body_bytes=settings.FETCH_MAX_BODY_BYTES,
+    user_agent=settings.FETCH_USER_AGENT,
+)
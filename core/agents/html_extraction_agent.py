@@ -0,0 +1,131 @@
+from urllib.parse import urljoin
+
+from django.conf import settings
+from lxml import etree
+from lxml import html as lxml_html
+
+from .. import metrics
+from ..fingerprints import DOI_PREFIXES
+from .fetcher import fetcher
+
+# Never article content; removed before the text pass
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "aside", "footer")
+# Elements that start a new block of text when a page has no usable <p>
+BLOCK_TAGS = frozenset(("div", "section", "article", "main", "td", "li", "blockquote", "body"))
+# Highwire Press tags, which most publishers and repositories emit for Google Scholar
+CITATION_META = {"citation_title": "title", "citation_doi": "doi", "citation_pdf_url": "pdf_url"}
+MIN_BLOCK_CHARS = 50
+# With less paragraph text than this (e.g. only a cookie notice), text outside <p> is considered too
+MIN_PARAGRAPH_CHARS = 1000
+# Paragraphs are kept when their parent holds at least this share of the best parent's text
+CONTENT_SHARE = 0.2
+
+
+def clean(text):
+    return " ".join(text.split())
+
+
+def strip_doi(doi):
+    for prefix in DOI_PREFIXES:
+        if doi.lower().startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+class HtmlExtractionAgent:
+    """Title, citation metadata and main text of an academic landing page.
+
+    Parses at most ``max_bytes`` (HTML_MAX_BYTES) of the page with lxml and
+    reads metadata and paragraphs in one walk of the tree. The main text is
+    the paragraphs under the parents that hold most of the page's prose,
+    so menus, cookie banners and "related articles" drop out.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or settings.HTML_MAX_BYTES
+
+    def extract_from_url(self, url, timeout=10):
+        result = fetcher.fetch(url, timeout=timeout)
+        data = b""
+        if result.ok:
+            with open(result.path, "rb") as f:
+                data = f.read(self.max_bytes)
+        return self.extract(data, url, result.charset)
+
+    def extract(self, data, url=None, charset=None):
+        """Return ``{"title", "doi", "pdf_url", "text"}``; missing values are None, missing text is ""."""
+        page = {"title": None, "doi": None, "pdf_url": None, "text": ""}
+        if isinstance(data, str):
+            data = data.encode(charset or "utf-8")
+            charset = charset or "utf-8"
+        data = data[:self.max_bytes]
+        if not data.strip():
+            return page
+
+        with metrics.timer("extract_html"):
+            try:
+                parser = lxml_html.HTMLParser(encoding=charset, remove_comments=True, remove_pis=True)
+            except LookupError:  # a charset lxml doesn't know: let it detect one
+                parser = lxml_html.HTMLParser(remove_comments=True, remove_pis=True)
+            try:
+                root = lxml_html.document_fromstring(data, parser=parser)
+            except (etree.ParserError, ValueError):
+                return page
+            etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+
+            meta, title, paragraphs, scores = {}, None, [], {}
+            for element in root.iter("meta", "title", "p"):
+                if element.tag == "p":
+                    text = clean(element.text_content())
+                    if len(text) > MIN_BLOCK_CHARS:
+                        parent = element.getparent()
+                        paragraphs.append((parent, text))
+                        scores[parent] = scores.get(parent, 0) + len(text)
+                elif element.tag == "meta":
+                    field = CITATION_META.get((element.get("name") or "").lower())
+                    content = element.get("content")
+                    if field and content and field not in meta:
+                        meta[field] = clean(content)
+                elif title is None:
+                    title = clean(element.text_content()) or None
+
+            blocks = []
+            if paragraphs:
+                threshold = max(scores.values()) * CONTENT_SHARE
+                blocks = [text for parent, text in paragraphs if scores[parent] >= threshold]
+            if sum(map(len, blocks)) < MIN_PARAGRAPH_CHARS:
+                blocks = max(blocks, self.text_blocks(root), key=lambda found: sum(map(len, found)))
+
+        page["title"] = meta.get("title") or title
+        page["doi"] = strip_doi(meta["doi"]) if meta.get("doi") else None
+        if meta.get("pdf_url"):
+            page["pdf_url"] = urljoin(url, meta["pdf_url"]) if url else meta["pdf_url"]
+        page["text"] = " ".join(blocks)
+        return page
+
+    def text_blocks(self, root):
+        """Text of each block element, not counting text inside nested blocks.
+
+        For pages without paragraphs. Every text node is attributed to its
+        nearest block ancestor once, so nested <div>s don't repeat text.
+        """
+        body = root.find("body")
+        if body is None:
+            body = root
+        fragments = {}
+        stack = [body]
+        for event, element in etree.iterwalk(body, events=("start", "end")):
+            if event == "start":
+                if element.tag in BLOCK_TAGS and element is not body:
+                    stack.append(element)
+                if element.text:
+                    fragments.setdefault(stack[-1], []).append(element.text)
+            else:
+                if element is body:
+                    continue
+                if stack[-1] is element:
+                    stack.pop()
+                if element.tail:
+                    fragments.setdefault(stack[-1], []).append(element.tail)
+        blocks = (clean("".join(parts)) for parts in fragments.values())
+        return [block for block in blocks if len(block) > MIN_BLOCK_CHARS]
@@ -0,0 +1,154 @@
+import logging
+import os
+import resource
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUMMARIZATION_MODEL = "sshleifer/distilbart-cnn-12-6"
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"  # the transformers default for this task
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _load_summarizer():
+    from .backends import load_pipeline
+    return load_pipeline("summarization", SUMMARIZATION_MODEL)
+
+
+def _load_zero_shot_classifier():
+    from .backends import load_pipeline
+    return load_pipeline("zero-shot-classification", ZERO_SHOT_MODEL)
+
+
+def _load_sentence_encoder():
+    from .embedding_agent import SentenceEncoder
+    return SentenceEncoder(EMBEDDING_MODEL)
+
+
+def serving_models():
+    """Models the configured pipeline loads: what warmup loads and readiness waits for."""
+    from django.conf import settings
+    names = []
+    if "summarize" in settings.PIPELINE_STAGES:
+        names.append("summarization")
+    if settings.CLASSIFIER_MODE == "zero-shot":
+        names.append("zero-shot-classification")
+    if settings.CLASSIFIER_MODE != "zero-shot" or settings.EMBEDDINGS_ENABLED:
+        names.append("sentence-embedding")
+    return names
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak in KiB on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """Loads each model once per process, on first use."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+        self._warmup_thread = None
+        self._warmup_names = []
+        self._warmup_error = None
+
+    def register(self, name, loader):
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        # One lock per model so loading the summarizer doesn't block the classifier
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                rss_before = current_rss_bytes()
+                started = time.perf_counter()
+                model = self._loaders[name]()
+                load_seconds = time.perf_counter() - started
+                rss_after = current_rss_bytes()
+                self._stats[name] = {
+                    "load_seconds": round(load_seconds, 3),
+                    "rss_delta_bytes": max(rss_after - rss_before, 0),
+                    "rss_after_bytes": rss_after,
+                    "loaded_at": time.time(),
+                    # Differs from stats()["pid"] in a worker forked after the load (gunicorn preload_app)
+                    "loaded_by_pid": os.getpid(),
+                }
+                self._models[name] = model
+                logger.info(
+                    "Loaded model %s in %.2fs (rss +%.1f MiB, total %.1f MiB)",
+                    name, load_seconds,
+                    self._stats[name]["rss_delta_bytes"] / 2 ** 20,
+                    rss_after / 2 ** 20,
+                )
+        return model
+
+    def unload(self, name):
+        """Drop a loaded model so the next ``get`` loads it again."""
+        with self._locks[name]:
+            self._models.pop(name, None)
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warmup(self, names=None):
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def start_warmup(self, names):
+        """Load ``names`` on a background thread, so the process can answer /ready/ while they load."""
+        self._warmup_names = list(names)
+        self._warmup_thread = threading.Thread(target=self._run_warmup, name="model-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    def _run_warmup(self):
+        try:
+            self.warmup(self._warmup_names)
+        except Exception as e:
+            logger.exception("Model warmup failed")
+            self._warmup_error = str(e)
+
+    def wait_warmup(self):
+        if self._warmup_thread is not None:
+            self._warmup_thread.join()
+
+    def warmup_status(self):
+        """The models warmup was started for, those still loading, and the error that stopped it, if any."""
+        return {
+            "models": self._warmup_names,
+            "warming": [name for name in self._warmup_names if not self.is_loaded(name)],
+            "error": self._warmup_error,
+        }
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": current_rss_bytes(),
+            "models": {
+                name: {"loaded": name in self._models, **self._stats.get(name, {})}
+                for name in self._loaders
+            },
+        }
+
+
+registry = ModelRegistry()
+registry.register("summarization", _load_summarizer)
+registry.register("zero-shot-classification", _load_zero_shot_classifier)
+registry.register("sentence-embedding", _load_sentence_encoder)
@@ -1,14 +1,107 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
 import feedparser
+from django.conf import settings
+
+from ..pipeline.errors import IngestError
+from .fetcher import fetcher
+
+ARXIV_ID_PATTERN = re.compile(r"arxiv\.org/abs/(.+?)(v\d+)?$")
+QUERY_CACHE_ENTRIES = 256
+
+# Each search keeps at most one page in flight ahead of its consumer, so
+# SEARCH_PREFETCH_WORKERS searches can prefetch at once
+_prefetch_pool = ThreadPoolExecutor(max_workers=settings.SEARCH_PREFETCH_WORKERS, thread_name_prefix="arxiv-prefetch")
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _arxiv_id(entry_id):
+    match = ARXIV_ID_PATTERN.search(entry_id or "")
+    return match.group(1) if match else None
+
+
+def _parse_entry(entry):
+    pdf_url = next((link.href for link in entry.get("links", []) if link.get("type") == "application/pdf"), None)
+    return {
+        "title": entry.title,
+        "summary": entry.summary,
+        "link": entry.link,
+        "published": entry.published,
+        "citation": f"{entry.title} ({entry.published}) - {entry.link}",
+        "arxiv_id": _arxiv_id(entry.get("id")),
+        "doi": entry.get("arxiv_doi"),
+        "pdf_url": pdf_url,
+        "authors": [author.name for author in entry.get("authors", []) if author.get("name")],
+        "categories": [tag.term for tag in entry.get("tags", [])],
+    }
+
 
 class PaperSearchAgent:
+    def __init__(self, base_url=None, page_size=None, cache_seconds=None):
+        self.base_url = base_url or settings.ARXIV_API_URL
+        self.page_size = page_size or settings.ARXIV_PAGE_SIZE
+        self.cache_seconds = settings.ARXIV_QUERY_CACHE_SECONDS if cache_seconds is None else cache_seconds
+
     def search_arxiv(self, query, max_results=5):
-        base_url = "http://export.arxiv.org/api/query?"
-        query_url = f"search_query=all:{query}&start=0&max_results={max_results}"
-        feed = feedparser.parse(base_url + query_url)
-        return [{
-            "title": entry.title,
-            "summary": entry.summary,
-            "link": entry.link,
-            "published": entry.published,
-            "citation": f"{entry.title} ({entry.published}) - {entry.link}"
-        } for entry in feed.entries]
+        return list(self.iter_arxiv(query, max_results))
+
+    def iter_arxiv(self, query, max_results=5):
+        """Yield parsed entries page by page, fetching the next page while the current one is consumed."""
+        if max_results < 1:
+            return
+        page_size = min(self.page_size, max_results)
+        start = 0
+        pending = _prefetch_pool.submit(self._fetch_page, query, start, page_size)
+        try:
+            while pending is not None:
+                entries = pending.result()
+                start += page_size
+                remaining = max_results - start
+                more = len(entries) == page_size and remaining > 0
+                pending = _prefetch_pool.submit(self._fetch_page, query, start, min(page_size, remaining)) if more else None
+                yield from entries
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def page_url(self, query, start, count):
+        params = urlencode({"search_query": f"all:{query}", "start": start, "max_results": count})
+        return f"{self.base_url}?{params}"
+
+    def page_urls(self, query, max_results=5):
+        """The URLs ``iter_arxiv`` requests for a full result set, so async callers can fetch them first."""
+        if max_results < 1:
+            return []
+        page_size = min(self.page_size, max_results)
+        return [self.page_url(query, start, min(page_size, max_results - start))
+                for start in range(0, max_results, page_size)]
+
+    def _fetch_page(self, query, start, count):
+        url = self.page_url(query, start, count)
+
+        with _query_cache_lock:
+            cached = _query_cache.get(url)
+        if cached and time.monotonic() - cached[0] < self.cache_seconds:
+            return cached[1]
+
+        result = fetcher.fetch(url)
+        if not result.ok:
+            raise IngestError("arXiv search failed", status_code=502, details=f"HTTP {result.status_code}")
+        feed = feedparser.parse(result.content)
+        if feed.bozo and not feed.entries:
+            # Not cached, so the next search asks arXiv again
+            raise IngestError("arXiv returned an unreadable feed", status_code=502, details=str(feed.bozo_exception))
+        entries = [_parse_entry(entry) for entry in feed.entries]
+
+        with _query_cache_lock:
+            _query_cache[url] = (time.monotonic(), entries)
+            _query_cache.move_to_end(url)
+            while len(_query_cache) > QUERY_CACHE_ENTRIES:
+                _query_cache.popitem(last=False)
+        return entries
@@ -0,0 +1,8 @@
+import fitz
+
+
+def extract_page_range(file_path, start, stop):
+    """Text of pages ``start``..``stop - 1``. Runs in extraction worker processes,
+    so it must only depend on fitz."""
+    with fitz.open(file_path) as doc:
+        return [doc[number].get_text() for number in range(start, min(stop, doc.page_count))]
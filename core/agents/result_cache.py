@@ -0,0 +1,177 @@
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Sum
+from django.utils import timezone
+
+from ..models import CachedResult
+
+logger = logging.getLogger(__name__)
+
+# Set inside ``ResultCache.bypass()``: lookups miss and nothing is stored
+_bypassed = contextvars.ContextVar("result_cache_bypassed", default=False)
+
+
+def make_key(kind, *parts):
+    """Content address for a result: hash of the stage, its parameters and its input.
+
+    ``bytes`` parts are hashed as-is, everything else through canonical JSON,
+    so the same text with the same model/parameters/labels always maps to
+    the same key.
+    """
+    digest = hashlib.sha256(kind.encode())
+    for part in parts:
+        digest.update(b"\0")
+        if isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class ResultCache:
+    """In-memory LRU in front of the CachedResult table.
+
+    Both tiers are bounded by the serialized size of the values. The
+    table is trimmed by least recent access once it grows past
+    ``max_bytes``.
+    """
+
+    EVICT_EVERY = 20
+
+    def __init__(self, memory_bytes, max_bytes, enabled=True):
+        self.memory_bytes = memory_bytes
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = Counter()
+
+    def get(self, kind, key, validate=None):
+        if not self.enabled or _bypassed.get():
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None and (validate is None or validate(entry[0])):
+            self.counters[f"{kind}.memory_hits"] += 1
+            return entry[0]
+
+        try:
+            row = CachedResult.objects.filter(key=key).first()
+            hit = row is not None and (validate is None or validate(row.value))
+            if hit:
+                CachedResult.objects.filter(key=key).update(last_accessed_at=timezone.now())
+        except DatabaseError:
+            logger.warning("Result cache read failed for %s", kind, exc_info=True)
+            hit = False
+        if hit:
+            self._remember(key, row.value, row.size)
+            self.counters[f"{kind}.db_hits"] += 1
+            return row.value
+
+        self.counters[f"{kind}.misses"] += 1
+        return None
+
+    def set(self, kind, key, value):
+        if not self.enabled or _bypassed.get():
+            return
+
+        size = len(json.dumps(value))
+        self._remember(key, value, size)
+        try:
+            CachedResult.objects.update_or_create(key=key, defaults={"kind": kind, "value": value, "size": size})
+        except DatabaseError:
+            # The cache is best-effort: a failed write must not fail the request
+            logger.warning("Result cache write failed for %s", kind, exc_info=True)
+            return
+
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    @contextmanager
+    def bypass(self):
+        """Skip the cache for the calls made in this block (and in contexts copied from it)."""
+        token = _bypassed.set(True)
+        try:
+            yield
+        finally:
+            _bypassed.reset(token)
+
+    def get_or_compute(self, kind, key, compute, validate=None):
+        value = self.get(kind, key, validate)
+        if value is None:
+            value = compute()
+            if value:  # don't pin failures such as an empty extraction
+                self.set(kind, key, value)
+        return value
+
+    def _remember(self, key, value, size):
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= old[1]
+            self._memory[key] = (value, size)
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_size -= evicted_size
+
+    def evict(self):
+        total = CachedResult.objects.aggregate(total=Sum("size"))["total"] or 0
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        stale = CachedResult.objects.order_by("last_accessed_at").values_list("key", "size").iterator()
+        doomed = []
+        for key, size in stale:
+            doomed.append(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+        for start in range(0, len(doomed), 500):
+            evicted += CachedResult.objects.filter(key__in=doomed[start:start + 500]).delete()[0]
+        with self._lock:
+            for key in doomed:
+                entry = self._memory.pop(key, None)
+                if entry is not None:
+                    self._memory_size -= entry[1]
+        return evicted
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "counters": dict(self.counters),
+        }
+
+
+result_cache = ResultCache(
+    settings.RESULT_CACHE_MEMORY_BYTES,
+    settings.RESULT_CACHE_MAX_BYTES,
+    enabled=settings.RESULT_CACHE_ENABLED,
+)
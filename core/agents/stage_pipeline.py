@@ -0,0 +1,164 @@
+import logging
+import queue
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a StagePipeline.
+
+    ``fn`` takes a single item, or a list of up to ``batch_size`` items
+    when ``batch_size > 1``, and returns the processed item(s). I/O stages
+    default to several worker threads. Compute (model) stages default to
+    a single worker that batches whatever is queued.
+    """
+
+    def __init__(self, name, fn, kind="io", workers=None, batch_size=1, batch_wait=0.05):
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.workers = workers or (4 if kind == "io" else 1)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+
+class StagePipeline:
+    """Runs items through stages connected by bounded queues, so different
+    items can be in different stages at the same time.
+
+    ``run(items)`` yields finished items in completion order. The first
+    exception raised by a stage stops the pipeline and is re-raised from
+    ``run``. Per-stage timings are available in ``timings`` afterwards.
+    """
+
+    def __init__(self, stages, queue_size=16):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.timings = {}
+
+    def run(self, items):
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._stop = threading.Event()
+        self._error = None
+        self.timings = {stage.name: {"kind": stage.kind, "items": 0, "batches": 0, "busy_seconds": 0.0}
+                        for stage in self.stages}
+        started = time.perf_counter()
+
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)]
+        for stage, inbox, outbox in zip(self.stages, queues, queues[1:]):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(stage, inbox, outbox, remaining, lock),
+                                                name=f"stage-{stage.name}", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _DONE or item is None:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.timings["total_seconds"] = time.perf_counter() - started
+            logger.info("Stage timings: %s", self.timings)
+
+        if self._error is not None:
+            raise self._error
+
+    def server_timing(self):
+        return ", ".join(
+            f"{name};dur={timing['busy_seconds'] * 1000:.1f}"
+            for name, timing in self.timings.items() if isinstance(timing, dict)
+        )
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return None
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _feed(self, items, outbox):
+        try:
+            for item in items:
+                if not self._put(outbox, item):
+                    return
+            self._put(outbox, _DONE)
+        except Exception as e:
+            self._fail(e)
+
+    def _next_batch(self, stage, inbox):
+        first = self._get(inbox)
+        if first is _DONE or first is None:
+            return first, []
+        batch = [first]
+        try:
+            while len(batch) < stage.batch_size:
+                item = self._get(inbox, timeout=stage.batch_wait)
+                if item is _DONE or item is None:
+                    return item, batch
+                batch.append(item)
+        except queue.Empty:
+            pass
+        return False, batch
+
+    def _work(self, stage, inbox, outbox, remaining, lock):
+        timing = self.timings[stage.name]
+        try:
+            while True:
+                end, batch = self._next_batch(stage, inbox)
+                if batch:
+                    began = time.perf_counter()
+                    results = stage.fn(batch) if stage.batch_size > 1 else [stage.fn(batch[0])]
+                    with lock:
+                        timing["busy_seconds"] += time.perf_counter() - began
+                        timing["items"] += len(batch)
+                        timing["batches"] += 1
+                    for result in results:
+                        if not self._put(outbox, result):
+                            return
+                if end is _DONE:
+                    # Let sibling workers see the end marker too
+                    self._put(inbox, _DONE)
+                    return
+                if end is None:
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and self._error is None:
+                self._put(outbox, _DONE)
+            connections.close_all()
@@ -1,15 +1,130 @@
-from transformers import pipeline
+import time
+
+from django.conf import settings
+
+from .. import metrics
+from .batching import run_batched
+from .model_registry import registry
+from .result_cache import make_key, result_cache
+
+MAX_CHARS = 3000  # cap to first 3000 characters
+GENERATION_KWARGS = {"max_length": 360, "min_length": 120, "do_sample": False}
+# Intermediate (map) summaries are shorter so each reduce level shrinks the text quickly
+MAP_GENERATION_KWARGS = {"max_length": 200, "min_length": 60, "do_sample": False}
 
 class SummaryAgent:
     def __init__(self):
-        self.summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
+        self.summarizer = registry.get("summarization")
+
+    def cache_key(self, text, generation_kwargs=GENERATION_KWARGS):
+        return make_key("summary", self.summarizer.model.name_or_path, settings.INFERENCE_BACKEND, generation_kwargs, text)
 
     def summarize(self, text):
+        if settings.SUMMARY_MODE == "mapreduce":
+            return self.summarize_long([text])
+
         # Limit the text size to avoid long summarization time
-        max_chars = 3000  # cap to first 3000 characters
-        text = text[:max_chars]
+        text = text[:MAX_CHARS]
 
         # Use only a single summarization call (on 1 chunk)
-        summary = self.summarizer(text, max_length=360, min_length=120, do_sample=False)
-        return summary[0]['summary_text']
-        
\ No newline at end of file
+        def run():
+            self.count_tokens([text])
+            with metrics.timer("summarize"):
+                summary = self.summarizer(text, **GENERATION_KWARGS)
+            return summary[0]['summary_text']
+
+        return result_cache.get_or_compute("summary", self.cache_key(text), run)
+
+    def summarize_many(self, texts, batch_size=None):
+        return self._summarize_batch([text[:MAX_CHARS] for text in texts], GENERATION_KWARGS, batch_size)
+
+    def _summarize_batch(self, texts, generation_kwargs, batch_size=None):
+        keys = [self.cache_key(text, generation_kwargs) for text in texts]
+        summaries = [result_cache.get("summary", key) for key in keys]
+
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            self.count_tokens([texts[i] for i in missing])
+            with metrics.timer("summarize"):
+                outputs = run_batched(self.summarizer, [texts[i] for i in missing],
+                                      batch_size or settings.INFERENCE_BATCH_SIZE, truncation=True, **generation_kwargs)
+            for i, output in zip(missing, outputs):
+                summaries[i] = output['summary_text']
+                result_cache.set("summary", keys[i], summaries[i])
+        return summaries
+
+    def count_tokens(self, texts):
+        # Tokenizing again costs a little, so only when someone is collecting the number
+        if settings.METRICS_ENABLED:
+            ids = self.summarizer.tokenizer(texts, truncation=True, verbose=False)["input_ids"]
+            metrics.count("tokens_summarized", sum(len(row) for row in ids))
+
+    def window_tokens(self):
+        # Leave room for the BOS/EOS tokens the pipeline adds around each chunk
+        return min(self.summarizer.tokenizer.model_max_length, 1024) - 8
+
+    def chunk(self, texts, window=None):
+        """Pack texts into chunks of at most ``window`` tokens, splitting on token boundaries.
+
+        Short texts (e.g. per-paper summaries) are packed together; long
+        ones are split across several chunks.
+        """
+        tokenizer = self.summarizer.tokenizer
+        window = window or self.window_tokens()
+        pending = []
+        for text in texts:
+            if not text:
+                continue
+            ids = tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+            while ids:
+                room = window - len(pending)
+                pending.extend(ids[:room])
+                ids = ids[room:]
+                if len(pending) >= window:
+                    yield tokenizer.decode(pending, skip_special_tokens=True)
+                    pending = []
+        if pending:
+            yield tokenizer.decode(pending, skip_special_tokens=True)
+
+    def summarize_stream(self, texts, budget_seconds=None, max_chunks=None, batch_size=None):
+        """Map-reduce summarization that yields partial results as it goes.
+
+        Each chunk is summarized (map), the summaries are re-packed and
+        summarized again (reduce) until a single chunk remains. The budget
+        bounds the work on the first level: at most ``max_chunks`` evenly
+        spaced chunks are read, and mapping stops once ``budget_seconds``
+        have passed. Yields ``{"level", "index", "summary"}`` dicts and a
+        final ``{"level", "final": True, "summary"}``.
+        """
+        budget_seconds = budget_seconds or settings.SUMMARY_BUDGET_SECONDS
+        max_chunks = max_chunks or settings.SUMMARY_MAX_CHUNKS
+        batch_size = batch_size or settings.INFERENCE_BATCH_SIZE
+        deadline = time.monotonic() + budget_seconds
+
+        chunks = list(self.chunk(texts))
+        if len(chunks) > max_chunks:
+            step = len(chunks) / max_chunks
+            chunks = [chunks[int(i * step)] for i in range(max_chunks)]
+
+        level = 0
+        while len(chunks) > 1:
+            summaries = []
+            for start in range(0, len(chunks), batch_size):
+                if level == 0 and summaries and time.monotonic() > deadline:
+                    break
+                for summary in self._summarize_batch(chunks[start:start + batch_size], MAP_GENERATION_KWARGS, batch_size):
+                    yield {"level": level, "index": len(summaries), "summary": summary}
+                    summaries.append(summary)
+            chunks = list(self.chunk(summaries))
+            level += 1
+
+        if chunks:
+            final = self._summarize_batch(chunks, GENERATION_KWARGS, batch_size)[0]
+            yield {"level": level, "final": True, "summary": final}
+
+    def summarize_long(self, texts, **budget):
+        final = ""
+        for partial in self.summarize_stream(texts, **budget):
+            if partial.get("final"):
+                final = partial["summary"]
+        return final
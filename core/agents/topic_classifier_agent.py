@@ -1,10 +1,160 @@
-from transformers import pipeline
+import hashlib
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .. import metrics
+from .batching import run_batched
+from .model_registry import registry
+from .result_cache import make_key, result_cache
+
+MODES = ("zero-shot", "embedding", "linear")
+LABEL_TEMPLATE = "This paper is about {}."
+# Cosine similarities of related sentences fall in a narrow band; scaling
+# them before the softmax turns them into a usable distribution
+EMBEDDING_SCALE = 20.0
+
+_label_vectors = {}
+_heads = {}
+_lock = threading.Lock()
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class LinearHead:
+    """Multinomial logistic regression over sentence embeddings, trained by ``train_topic_head``."""
+
+    def __init__(self, labels, weights, bias, model_name):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.model_name = model_name
+        self.version = hashlib.sha256(weights.tobytes() + bias.tobytes()).hexdigest()[:16]
+
+    def predict_proba(self, vectors):
+        return softmax(vectors @ self.weights.T + self.bias)
+
+    @classmethod
+    def fit(cls, vectors, targets, labels, model_name, epochs=300, learning_rate=0.5, l2=1e-4):
+        n, dim = vectors.shape
+        weights = np.zeros((len(labels), dim), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        onehot = np.eye(len(labels), dtype=np.float32)[targets]
+        for _ in range(epochs):
+            grad = (softmax(vectors @ weights.T + bias) - onehot) / n
+            weights -= learning_rate * (grad.T @ vectors + l2 * weights)
+            bias -= learning_rate * grad.sum(axis=0)
+        return cls(labels, weights, bias, model_name)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, weights=self.weights, bias=self.bias,
+                     labels=np.array(self.labels), model_name=np.array(self.model_name))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["labels"].tolist(), data["weights"], data["bias"], str(data["model_name"]))
+
+
+def load_head(path):
+    """Load the trained head once per file version."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        raise ImproperlyConfigured(
+            f"CLASSIFIER_MODE=linear needs a trained head at {path}; run `manage.py train_topic_head`"
+        )
+    with _lock:
+        cached = _heads.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _heads[path] = (mtime, LinearHead.load(path))
+    return cached[1]
+
 
 class TopicClassificationAgent:
-    def __init__(self):
-        self.classifier = pipeline("zero-shot-classification")
+    """Picks a topic for each text from ``settings.TOPIC_LABELS``.
+
+    ``zero-shot`` runs the NLI pipeline, one cross-encoder pass per label.
+    ``embedding`` compares a sentence embedding of the text with cached
+    label embeddings. ``linear`` applies a head trained on stored papers
+    and scores the labels it was trained on.
+    """
+
+    def __init__(self, mode=None):
+        self.mode = mode or settings.CLASSIFIER_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown classifier mode: {self.mode}")
+
+        if self.mode == "zero-shot":
+            self.classifier = registry.get("zero-shot-classification")
+            self.model_name = self.classifier.model.name_or_path
+        else:
+            self.encoder = registry.get("sentence-embedding")
+            self.model_name = self.encoder.name_or_path
+        if self.mode == "linear":
+            self.head = load_head(settings.CLASSIFIER_HEAD_PATH)
+            if self.head.model_name != self.model_name:
+                raise ImproperlyConfigured(
+                    f"Topic head was trained on {self.head.model_name}, not {self.model_name}; retrain it"
+                )
+            self.model_name = f"{self.model_name}+{self.head.version}"
+
+    def cache_key(self, text, labels):
+        return make_key("topic", self.mode, self.model_name, settings.INFERENCE_BACKEND, list(labels), text)
+
+    def classify(self, text, labels=None):
+        return self.classify_scores([text], labels)[0]["topic"]
+
+    def classify_many(self, texts, labels=None, batch_size=None):
+        return [result["topic"] for result in self.classify_scores(texts, labels, batch_size)]
+
+    def classify_scores(self, texts, labels=None, batch_size=None):
+        """Return ``{"topic", "scores"}`` per text, where ``scores`` maps each label to its probability."""
+        labels = list(labels or settings.TOPIC_LABELS)
+        keys = [self.cache_key(text, labels) for text in texts]
+        results = [result_cache.get("topic", key) for key in keys]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            scores = self._score([texts[i] for i in missing], labels, batch_size or settings.INFERENCE_BATCH_SIZE)
+            for i, distribution in zip(missing, scores):
+                results[i] = {"topic": max(distribution, key=distribution.get), "scores": distribution}
+                result_cache.set("topic", keys[i], results[i])
+        return results
+
+    def _score(self, texts, labels, batch_size):
+        with metrics.timer("classify"):
+            return self._run_model(texts, labels, batch_size)
+
+    def _run_model(self, texts, labels, batch_size):
+        if self.mode == "zero-shot":
+            outputs = run_batched(self.classifier, texts, batch_size, candidate_labels=labels)
+            return [{label: round(float(score), 4) for label, score in zip(out["labels"], out["scores"])}
+                    for out in outputs]
 
-    def classify(self, text, labels):
-        result = self.classifier(text, labels)
-        return result["labels"][0]  # return top topic
+        vectors = self.encoder.encode(texts, batch_size=batch_size)
+        if self.mode == "embedding":
+            probabilities = softmax(EMBEDDING_SCALE * vectors @ self._label_vectors(labels).T)
+        else:
+            labels = self.head.labels
+            probabilities = self.head.predict_proba(vectors)
+        return [{label: round(float(p), 4) for label, p in zip(labels, row)} for row in probabilities]
 
+    def _label_vectors(self, labels):
+        key = (self.model_name, tuple(labels))
+        with _lock:
+            vectors = _label_vectors.get(key)
+        if vectors is None:
+            vectors = self.encoder.encode([LABEL_TEMPLATE.format(label) for label in labels])
+            with _lock:
+                _label_vectors[key] = vectors
+        return vectors
@@ -0,0 +1,91 @@
+import io
+import re
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# One silent MPEG-1 Layer III frame: 32 kbps, 44.1 kHz, mono, 104 bytes, ~26 ms
+SILENT_FRAME = bytes([0xFF, 0xFB, 0x10, 0xC4]) + bytes(100)
+SILENT_FRAME_SECONDS = 1152 / 44100
+
+
+class TTSEngine:
+    """Turns text into MP3 bytes. Subclasses set ``name``, which is part of audio cache keys."""
+
+    name = None
+
+    def synthesize(self, text):
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    name = "gtts"
+
+    def __init__(self, lang="en"):
+        self.lang = lang
+
+    def synthesize(self, text):
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=self.lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class SilentEngine(TTSEngine):
+    """Offline stand-in: silence roughly as long as the text would take to read."""
+
+    name = "silent"
+    seconds_per_word = 0.3
+
+    def synthesize(self, text):
+        frames = max(1, int(len(text.split()) * self.seconds_per_word / SILENT_FRAME_SECONDS))
+        return SILENT_FRAME * frames
+
+
+ENGINES = {
+    "gtts": GTTSEngine,
+    "silent": SilentEngine,
+}
+
+
+def get_engine(name=None):
+    """Build the engine named by TTS_ENGINE: a key of ENGINES or a dotted path to a TTSEngine subclass."""
+    name = name or settings.TTS_ENGINE
+    engine_class = ENGINES[name] if name in ENGINES else import_string(name)
+    return engine_class()
+
+
+def split_script(text, max_chars=None):
+    """Pack whole sentences into chunks of up to ``max_chars`` characters.
+
+    A sentence longer than ``max_chars`` becomes a chunk of its own.
+    """
+    max_chars = max_chars or settings.TTS_CHUNK_CHARS
+    chunks, current = [], ""
+    for sentence in SENTENCE_END.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def strip_tags(data):
+    """Drop ID3v2 headers and the ID3v1 trailer so MP3 segments can be joined frame to frame."""
+    while data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def concat_mp3(segments):
+    """Join MP3 segments without re-encoding. They must share sample rate and channel mode."""
+    return b"".join(strip_tags(segment) for segment in segments)
@@ -0,0 +1,45 @@
+"""Thread pools for the ASGI views.
+
+Remote content is fetched on the event loop with ``fetcher.afetch``, into
+the same on-disk cache the sync extractors read (see ``Pipeline.arun``).
+PyMuPDF/HTML parsing and model calls then run on these two pools, so a
+slow origin holds a coroutine rather than a worker thread, and CPU-bound
+work can't exceed ASYNC_EXTRACT_WORKERS / ASYNC_MODEL_WORKERS however many
+requests wait.
+
+``executor=None`` is the event loop's default pool, for blocking calls
+that are neither (e.g. a search's orchestration, which hands its model
+batches to ``model_executor``).
+
+When the client disconnects Django cancels the view's task. That closes any
+upstream connection in flight and drops queued pool work. A pool call that
+has already started runs to completion, but nothing after it does.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+extract_executor = ThreadPoolExecutor(settings.ASYNC_EXTRACT_WORKERS, thread_name_prefix="aio-extract")
+model_executor = ThreadPoolExecutor(settings.ASYNC_MODEL_WORKERS, thread_name_prefix="aio-model")
+
+
+def closing_connections(fn, *args, **kwargs):
+    """Call ``fn``, then release the database connection it left on this pool thread.
+
+    Django only closes connections at the end of a request, on the thread
+    that served it.
+    """
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in(executor, fn, *args, **kwargs):
+    """Run ``fn`` on ``executor`` in a copy of the caller's context, so metrics timings reach the request."""
+    call = functools.partial(contextvars.copy_context().run, closing_connections, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
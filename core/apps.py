@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .fulltext import restore_sqlite_triggers
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
+
+        if settings.MODEL_WARMUP:
+            # Loads in the background while /ready/ answers 503. Under gunicorn
+            # preload_app this runs in the master, and pre_fork waits for it.
+            from .agents.model_registry import registry, serving_models
+            registry.start_warmup(serving_models())
@@ -0,0 +1,71 @@
+import json
+from urllib.parse import urlsplit
+
+from .pipeline import IngestError, PdfFileSource, Pipeline, make_source
+from .pipeline.executor import fail
+
+
+def parse_item(raw):
+    """Normalise one request item to ``{"kind", "value", "id"}``.
+
+    Items are ``{"doi": ...}`` or ``{"url": ...}`` objects with an optional
+    ``kind`` and ``id``, or bare DOI / URL strings. URLs ending in .pdf are
+    PDFs, anything else is treated as an academic landing page.
+    """
+    if isinstance(raw, str):
+        raw = {"url": raw} if raw.startswith(("http://", "https://")) else {"doi": raw}
+    if not isinstance(raw, dict):
+        raise IngestError("Item must be an object, a DOI or a URL")
+
+    kind = raw.get("kind")
+    if raw.get("doi"):
+        kind, value = kind or "doi", raw["doi"]
+    elif raw.get("url"):
+        value = raw["url"]
+        kind = kind or ("pdf_url" if urlsplit(value).path.lower().endswith(".pdf") else "academic_url")
+    else:
+        raise IngestError("Item needs a doi or a url")
+    if kind not in ("doi", "pdf_url", "academic_url"):
+        raise IngestError(f"Unknown item kind: {kind}")
+    return {"kind": kind, "value": value, "id": raw.get("id")}
+
+
+def parse_jsonl(file):
+    items = []
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            raise IngestError(f"Line {number} of {file.name} is not valid JSON")
+    return items
+
+
+class BatchIngest:
+    """Ingests many items through one ``Pipeline.run_many``, so model stages batch across items.
+
+    ``run(raw_items, uploads)`` yields each item once it has finished, in
+    completion order (see ``Pipeline.run_many`` for what a finished item
+    holds).
+    """
+
+    def __init__(self, config=None):
+        self.pipeline = Pipeline(config)
+
+    def run(self, raw_items=(), uploads=()):
+        items = []
+        for raw in raw_items:
+            item = {"index": len(items)}
+            try:
+                item.update(parse_item(raw))
+                item["source"] = make_source(item["kind"], item["value"])
+            except IngestError as e:
+                fail(item, e)
+            items.append(item)
+        for file in uploads:
+            items.append({"index": len(items), "kind": "upload", "value": file, "id": file.name,
+                          "source": PdfFileSource(file)})
+
+        yield from self.pipeline.run_many(items)
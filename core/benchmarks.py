@@ -0,0 +1,252 @@
+"""Fixtures and local HTTP stubs for `manage.py benchmark_pipeline` and `loadtest_async`."""
+import asyncio
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+import fitz
+import numpy as np
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Pages per fixture PDF
+PDF_SIZES = {"small": 2, "medium": 30, "large": 300}
+# Paragraphs per fixture landing page
+HTML_SIZES = {"small": 12, "large": 600}
+
+WORDS = (
+    "model data network learning quantum training results method analysis proposed approach performance "
+    "experiments dataset accuracy algorithm system evaluation baseline features neural optimization "
+    "distribution inference sampling gradient structure energy signal patients clinical market risk "
+    "climate emissions temperature circuit qubits error correction transformer attention benchmark"
+).split()
+
+
+def paragraph(rng, sentences=6):
+    out = []
+    for _ in range(sentences):
+        words = rng.choices(WORDS, k=rng.randint(10, 20))
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+def abstracts(count, seed=0):
+    rng = random.Random(seed)
+    return [paragraph(rng, 8) for _ in range(count)]
+
+
+def make_pdf(pages, seed=0, title="Benchmark paper"):
+    """PDF bytes with ``pages`` pages of about 3000 characters each."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    doc.set_metadata({"title": f"{title} {seed}"})
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"{title} {seed}, page {number + 1}\n\n" + "\n\n".join(paragraph(rng) for _ in range(4))
+        page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def landing_page(title, rng):
+    body = "".join(f"<p>{paragraph(rng)}</p>" for _ in range(8))
+    return f"<html><head><title>{title}</title></head><body><article>{body}</article></body></html>"
+
+
+def academic_page(paragraphs, seed=0, pdf_url=None, nesting=8, use_paragraphs=True):
+    """A publisher-style landing page: citation meta tags, navigation, scripts,
+    ``paragraphs`` paragraphs of content inside ``nesting`` levels of <div>,
+    and a related-articles sidebar. Without ``use_paragraphs`` the content is
+    bare text in <div>s, as on some repository pages.
+    """
+    rng = random.Random(seed)
+    meta = [f'<meta name="citation_title" content="Fixture paper {seed}">',
+            f'<meta name="citation_doi" content="10.5555/fixture.{seed}">']
+    if pdf_url:
+        meta.append(f'<meta name="citation_pdf_url" content="{pdf_url}">')
+    block = "<p>{}</p>" if use_paragraphs else "<div>{}</div>"
+    sections = []
+    for i in range(0, paragraphs, 4):
+        body = "".join(block.format(paragraph(rng)) for _ in range(min(4, paragraphs - i)))
+        sections.append(f'<section><h2>Section {i // 4 + 1}</h2>{body}</section>')
+    content = "".join(sections)
+    for level in range(nesting):
+        content = f'<div class="wrap-{level}">{content}</div>'
+    related = "".join(f'<li><a href="/article/{n}">Related article {n}</a></li>' for n in range(30))
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Fixture paper {seed} | Publisher</title>'
+        f'{"".join(meta)}<script>{"var x = 1;" * 200}</script><style>{"p {}" * 200}</style></head>'
+        f'<body><nav>{"".join(f"<a href=/{n}>Menu {n}</a>" for n in range(40))}</nav>'
+        f'<div class="cookie"><p>We use cookies to improve your experience on this site, see our policy.</p></div>'
+        f'<main>{content}</main><aside><ul>{related}</ul></aside><footer>Copyright Publisher</footer></body></html>'
+    )
+
+
+def arxiv_feed(query, start, count):
+    """Atom feed in the shape the arXiv API returns, with ``count`` entries for ``query``."""
+    rng = random.Random(f"{query}-{start}")
+    token = zlib.crc32(query.encode()) % 10 ** 8
+    entries = []
+    for i in range(start, start + count):
+        arxiv_id = f"{token}.{i:05d}"
+        entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v1</id>
+    <published>2024-01-01T00:00:00Z</published>
+    <title>Stub paper {i} on {query}</title>
+    <summary>{paragraph(rng, 8)}</summary>
+    <author><name>Author {i}</name></author>
+    <link href="http://arxiv.org/abs/{arxiv_id}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/small-{arxiv_id}v1" rel="related" type="application/pdf"/>
+    <category term="cs.LG"/>
+  </entry>""")
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}\n</feed>'
+
+
+class StubTransport(BaseAdapter):
+    """Answers every request locally, mounted on the shared fetcher's session.
+
+    - ``export.arxiv.org/api/query``: an Atom feed with the requested page.
+    - paths containing ``small-``, ``medium-`` or ``large-`` (e.g.
+      ``/pdf/large-1.pdf``): the fixture PDF of that size.
+    - ``doi.org`` with ``Accept: application/pdf``: the small PDF.
+    - anything else: an HTML landing page with a title and paragraphs.
+
+    ``latency`` seconds are slept per request to stand in for the network.
+    """
+
+    def __init__(self, pdfs, latency=0.0):
+        super().__init__()
+        self.pdfs = pdfs
+        self.latency = latency
+        self.requests = 0
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(request.url)
+        size = next((name for name in self.pdfs if f"{name}-" in parts.path), None)
+
+        if parts.path.endswith("/api/query"):
+            params = parse_qs(parts.query)
+            query = params["search_query"][0].removeprefix("all:")
+            body = arxiv_feed(query, int(params["start"][0]), int(params["max_results"][0])).encode()
+            content_type = "application/atom+xml"
+        elif size or (parts.netloc == "doi.org" and "application/pdf" in request.headers.get("Accept", "")):
+            body, content_type = self.pdfs[size or "small"], "application/pdf"
+        else:
+            body = landing_page(f"Stub page {parts.path}", random.Random(request.url)).encode()
+            content_type = "text/html; charset=utf-8"
+
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(body))})
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+class SlowOrigin:
+    """A real HTTP server on 127.0.0.1 that answers every request after ``delay`` seconds.
+
+    Runs its own event loop in a background thread and records the peak
+    number of requests it was holding at once. Pages have a title but no
+    paragraph text, so an academic-URL ingest fails right after the fetch
+    and a load test measures fetch concurrency, not the models.
+    """
+
+    BODY = b"<html><head><title>Slow origin</title></head><body><p>Short.</p></body></html>"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.served = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="slow-origin", daemon=True).start()
+        self.ready.wait()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}/{path.lstrip('/')}"
+
+    def reset(self):
+        self.in_flight = self.peak = self.served = 0
+
+    async def handle(self, reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.in_flight -= 1
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(self.BODY), self.BODY))
+            await writer.drain()
+            self.served += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def summarize(latencies, items=1):
+    """p50/p95/p99 and mean in milliseconds, and items per second over all runs."""
+    seconds = np.array(latencies)
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {
+        "runs": len(latencies),
+        "items_per_run": items,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(seconds.mean() * 1000), 2),
+        "throughput_per_s": round(items * len(latencies) / float(seconds.sum()), 2) if seconds.sum() else None,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Rows of ``(case, metric, before, after, change)`` for cases that got slower by more than ``threshold``."""
+    rows = []
+    for name, result in current["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if not before or "p50_ms" not in before or "p50_ms" not in result:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if before[metric] and (result[metric] - before[metric]) / before[metric] > threshold:
+                rows.append((name, metric, before[metric], result[metric], result[metric] / before[metric] - 1))
+    return rows
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,57 @@
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+ARXIV_DOI = re.compile(r"^10\.48550/arxiv\.(.+)$", re.IGNORECASE)
+ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$", re.IGNORECASE)
+ARXIV_VERSION = re.compile(r"v\d+$")
+
+
+def normalize_doi(doi):
+    doi = doi.strip()
+    for prefix in DOI_PREFIXES:
+        if doi.lower().startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi.lower()
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    if (parts.scheme == "http" and netloc.endswith(":80")) or (parts.scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+def arxiv_id(doi=None, url=None):
+    if doi:
+        match = ARXIV_DOI.match(normalize_doi(doi))
+        if match:
+            return ARXIV_VERSION.sub("", match.group(1))
+    if url:
+        match = ARXIV_URL.search(url.strip())
+        if match:
+            return ARXIV_VERSION.sub("", match.group(1)).lower()
+    return None
+
+
+def fingerprint(doi=None, url=None, arxiv=None, text=None):
+    """Stable identity of a paper across sources.
+
+    An arXiv id wins over a DOI, which wins over a URL, so the arXiv DOI,
+    abs page and PDF link of one paper all map to the same fingerprint.
+    Uploads with no identifier fall back to a hash of the extracted text.
+    """
+    arxiv = arxiv or arxiv_id(doi, url)
+    if arxiv:
+        identity = f"arxiv:{ARXIV_VERSION.sub('', arxiv).lower()}"
+    elif doi:
+        identity = f"doi:{normalize_doi(doi)}"
+    elif url:
+        identity = f"url:{normalize_url(url)}"
+    elif text:
+        identity = "text:" + " ".join(text.lower().split())
+    else:
+        return None
+    return hashlib.sha256(identity.encode()).hexdigest()
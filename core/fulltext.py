@@ -0,0 +1,125 @@
+"""Full-text index over paper titles and summaries.
+
+PostgreSQL gets a generated ``tsvector`` column with a GIN index. SQLite
+gets an external-content FTS5 table kept in sync by triggers. Other
+backends fall back to ``icontains`` in core/search.py.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLE = "core_researchpaper"
+FTS_TABLE = "core_researchpaper_fts"
+
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+    ) STORED""",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_idx ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    f"DROP INDEX IF EXISTS {TABLE}_search_idx",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, summary, content='{TABLE}', content_rowid='id', tokenize='porter unicode61')"
+)
+SQLITE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, summary ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+        INSERT INTO {FTS_TABLE}(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END""",
+]
+SQLITE_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SQLITE_UNINSTALL = [f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_INSTALL)
+    elif connection.vendor == "sqlite":
+        try:
+            _execute(connection, [SQLITE_TABLE, *SQLITE_TRIGGERS, SQLITE_REBUILD])
+        except Exception as e:
+            # Some SQLite builds ship without FTS5; search falls back to icontains
+            logger.warning("SQLite full-text index not installed: %s", e)
+
+
+def uninstall(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_UNINSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_UNINSTALL)
+
+
+def is_installed(connection):
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return FTS_TABLE in connection.introspection.table_names()
+    return False
+
+
+def restore_sqlite_triggers(sender, using, **kwargs):
+    """post_migrate handler.
+
+    SQLite migrations that alter a column rebuild the papers table, which
+    drops its triggers. Put them back and re-sync the index afterwards.
+    """
+    from django.db import connections
+    connection = connections[using]
+    if connection.vendor == "sqlite" and is_installed(connection):
+        _execute(connection, [*SQLITE_TRIGGERS, SQLITE_REBUILD])
+
+
+def search(connection, query, limit, topic=None, match_any=False):
+    """Return ``(paper_id, score)`` pairs, best match first.
+
+    Every term must match unless ``match_any`` is set.
+    """
+    terms = query.split()
+    if connection.vendor == "postgresql":
+        params = [" or ".join(terms) if match_any else query]
+        topic_clause = ""
+        if topic:
+            topic_clause = " AND topic = %s"
+            params.append(topic)
+        sql = (
+            f"SELECT id, ts_rank_cd(search_vector, q) AS score "
+            f"FROM {TABLE}, websearch_to_tsquery('english', %s) q "
+            f"WHERE search_vector @@ q{topic_clause} ORDER BY score DESC, id DESC LIMIT %s"
+        )
+    else:
+        # Quote every term so user input can't hit FTS5 query syntax
+        quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        params = [(" OR " if match_any else " ").join(quoted)]
+        topic_clause = ""
+        if topic:
+            topic_clause = " AND p.topic = %s"
+            params.append(topic)
+        sql = (
+            f"SELECT p.id, -bm25({FTS_TABLE}, 10.0, 1.0) AS score "
+            f"FROM {FTS_TABLE} JOIN {TABLE} p ON p.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s{topic_clause} ORDER BY score DESC LIMIT %s"
+        )
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(paper_id, float(score)) for paper_id, score in cursor.fetchall()]
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import synthesis
+from .models import Job
+from .pipeline import IngestError, PdfFileSource, Pipeline, PipelineConfig, make_source, stage
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def job_pipeline(payload):
+    return Pipeline(PipelineConfig(stages=payload.get("stages")))
+
+
+def _run_source(kind, field):
+    def run(payload, progress):
+        return job_pipeline(payload).run(make_source(kind, payload[field]), progress)
+    return run
+
+
+def _run_upload(payload, progress):
+    try:
+        with default_storage.open(payload["path"]) as staged:
+            return job_pipeline(payload).run(PdfFileSource(File(staged, name=payload["name"])), progress)
+    finally:
+        default_storage.delete(payload["path"])
+
+
+def _run_synthesis(payload, progress):
+    with stage(progress, "synthesize"):
+        synthesis.refresh(payload["topic"])
+    return None, False
+
+
+PIPELINES = {
+    "pdf_url": _run_source("pdf_url", "url"),
+    "doi": _run_source("doi", "doi"),
+    "upload": _run_upload,
+    "academic_url": _run_source("academic_url", "url"),
+    "synthesis": _run_synthesis,
+}
+
+
+class StageProgress:
+    """Records stage transitions on the job row so /jobs/<id>/ can report them."""
+
+    def __init__(self, job):
+        self.job = job
+        self._started = {}
+
+    def __call__(self, name, state):
+        entry = self.job.stages.setdefault(name, {})
+        entry["status"] = state
+        if state == "running":
+            self._started[name] = time.perf_counter()
+            entry["started_at"] = timezone.now().isoformat()
+        elif name in self._started:
+            entry["seconds"] = round(time.perf_counter() - self._started[name], 3)
+        self.job.save(update_fields=["stages"])
+
+    def fail_running(self):
+        for name, entry in self.job.stages.items():
+            if entry.get("status") == "running":
+                self(name, "failed")
+
+
+def lease_expiry():
+    return timezone.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def requeue_expired_jobs():
+    """Queue running jobs whose worker stopped renewing the lease again; fail those out of attempts."""
+    now = timezone.now()
+    # Rows claimed before leases existed have none
+    expired = Job.objects.filter(Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True), status=Job.RUNNING)
+    failed = expired.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, error="The worker running this job stopped", finished_at=now, lease_expires_at=None
+    )
+    requeued = expired.update(status=Job.PENDING, stages={}, started_at=None, lease_expires_at=None)
+    if failed or requeued:
+        logger.warning("Requeued %d jobs and failed %d whose worker stopped", requeued, failed)
+
+
+def claim_next_job():
+    requeue_expired_jobs()
+    pending = Job.objects.filter(status=Job.PENDING).order_by("created_at").values_list("id", flat=True)[:10]
+    for job_id in pending:
+        # The conditional update is the claim: only one worker can move a row out of pending
+        claimed = Job.objects.filter(pk=job_id, status=Job.PENDING).update(
+            status=Job.RUNNING, started_at=timezone.now(), lease_expires_at=lease_expiry(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    progress = StageProgress(job)
+    try:
+        paper, _ = PIPELINES[job.kind](job.payload, progress)
+    except Exception as e:
+        progress.fail_running()
+        job.status = Job.FAILED
+        job.error = e.message if isinstance(e, IngestError) else str(e)
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+    else:
+        job.status = Job.DONE
+        job.paper = paper
+    job.finished_at = timezone.now()
+    job.lease_expires_at = None
+    job.save(update_fields=["status", "paper", "error", "finished_at", "lease_expires_at"])
+
+
+class WorkerPool:
+    def __init__(self, size, poll_interval):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._heartbeat = None
+        self._running = set()  # ids of the jobs this pool's workers hold
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.size):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(target=self._renew_leases, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _work(self):
+        while True:
+            job = None
+            try:
+                job = claim_next_job()
+                if job is not None:
+                    with self._lock:
+                        self._running.add(job.pk)
+                    run_job(job)
+            except Exception:
+                logger.exception("Job worker error")
+            finally:
+                if job is not None:
+                    with self._lock:
+                        self._running.discard(job.pk)
+                close_old_connections()
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _renew_leases(self):
+        while True:
+            time.sleep(settings.JOB_LEASE_SECONDS / 3)
+            with self._lock:
+                running = list(self._running)
+            if not running:
+                continue
+            try:
+                Job.objects.filter(pk__in=running, status=Job.RUNNING).update(lease_expires_at=lease_expiry())
+            except Exception:
+                logger.exception("Could not renew job leases")
+            finally:
+                close_old_connections()
+
+
+worker_pool = WorkerPool(settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL)
+
+
+def enqueue(kind, payload, upload=None):
+    """Queue a job. ``upload`` is a file for the job, staged only once the queue has room for it."""
+    if Job.objects.filter(status=Job.PENDING).count() >= settings.JOB_QUEUE_MAX_PENDING:
+        raise QueueFull()
+    if upload is not None:
+        payload = {**payload, **stage_upload(upload)}
+    job = Job.objects.create(kind=kind, payload=payload)
+    worker_pool.start()
+    worker_pool.notify()
+    return job
+
+
+def stage_upload(file):
+    path = default_storage.save(f"jobs/{file.name}", file)
+    return {"path": path, "name": file.name}
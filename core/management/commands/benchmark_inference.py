@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.agents.model_registry import registry
+from core.agents.paper_search_agent import PaperSearchAgent
+from core.agents.result_cache import result_cache
+from core.agents.summary_agent import SummaryAgent
+from core.agents.topic_classifier_agent import TopicClassificationAgent
+
+
+class Command(BaseCommand):
+    help = "Measure summarization and classification throughput (papers/sec) across batch sizes and classifier modes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--query", default="machine learning", help="arXiv query used to collect abstracts")
+        parser.add_argument("--papers", type=int, default=16)
+        parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+        parser.add_argument("--task", choices=["summarize", "classify", "both"], default="both")
+        parser.add_argument("--modes", default="zero-shot",
+                            help="Classifier modes to compare, e.g. zero-shot,embedding,linear")
+        parser.add_argument("--backends", default="",
+                            help="Run once per inference backend in a fresh process, e.g. torch,torch-int8,onnx")
+
+    def handle(self, *args, **options):
+        if options["backends"]:
+            return self.compare_backends(options)
+
+        abstracts = [p["summary"] for p in PaperSearchAgent().search_arxiv(options["query"], max_results=options["papers"])]
+        if not abstracts:
+            self.stderr.write("No abstracts returned for the query")
+            return
+        batch_sizes = [int(size) for size in options["batch_sizes"].split(",")]
+        # Every pass must run the models, not read back the previous pass
+        result_cache.enabled = False
+
+        tasks = {}
+        if options["task"] in ("classify", "both"):
+            for mode in options["modes"].split(","):
+                classifier = TopicClassificationAgent(mode)
+                tasks[mode] = lambda size, classifier=classifier: classifier.classify_many(abstracts, batch_size=size)
+        if options["task"] in ("summarize", "both"):
+            summarizer = SummaryAgent()
+            tasks["summarize"] = lambda size: summarizer.summarize_many(abstracts, batch_size=size)
+
+        self.stdout.write(f"{len(abstracts)} abstracts, backend {settings.INFERENCE_BACKEND}, models loaded before timing")
+        self.stdout.write(f"{'task':<10} {'batch':>5} {'seconds':>9} {'papers/sec':>11} {'agreement':>10}")
+        reference = None
+        for name, run in tasks.items():
+            topics = run(batch_sizes[0])  # warm-up pass so the first timing doesn't pay for lazy init
+            # Share of top topics that match the first classifier mode listed
+            agreement = ""
+            if name != "summarize":
+                reference = reference or topics
+                agreement = f"{sum(a == b for a, b in zip(topics, reference)) / len(topics):.2f}"
+            for size in batch_sizes:
+                started = time.perf_counter()
+                run(size)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{name:<10} {size:>5} {elapsed:>9.2f} {len(abstracts) / elapsed:>11.2f} {agreement:>10}")
+
+        stats = registry.stats()
+        loads = ", ".join(f"{name} {model['load_seconds']}s" for name, model in stats["models"].items() if model["loaded"])
+        self.stdout.write(f"rss {stats['rss_bytes'] / 2 ** 20:.0f} MiB, load {loads}")
+
+    def compare_backends(self, options):
+        # Separate processes so each backend's RSS and load time are measured from a cold start
+        args = [sys.executable, sys.argv[0], "benchmark_inference",
+                "--query", options["query"], "--papers", str(options["papers"]),
+                "--batch-sizes", options["batch_sizes"], "--task", options["task"], "--modes", options["modes"]]
+        for backend in options["backends"].split(","):
+            self.stdout.write(f"== {backend}")
+            self.stdout.flush()
+            subprocess.run(args, env={**os.environ, "INFERENCE_BACKEND": backend}, check=False)
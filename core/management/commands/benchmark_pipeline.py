@@ -0,0 +1,246 @@
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from core import benchmarks
+from core.agents.audio_agent import AudioAgent
+from core.agents.embedding_agent import EmbeddingAgent
+from core.agents.extraction_agent import ExtractionAgent
+from core.agents.fetcher import fetcher
+from core.agents.html_extraction_agent import HtmlExtractionAgent
+from core.agents.model_registry import registry
+from core.agents.result_cache import result_cache
+from core.agents.summary_agent import MAX_CHARS as SUMMARY_CHARS, SummaryAgent
+from core.agents.topic_classifier_agent import TopicClassificationAgent
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Measure p50/p95/p99 latency and throughput of each agent and endpoint against fixture PDFs "
+            "and a local HTTP stub, and write the results as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case")
+        parser.add_argument("--cold-repeat", type=int, default=1, help="Timed cold model loads per model")
+        parser.add_argument("--papers", type=int, default=8, help="Abstracts per batched run")
+        parser.add_argument("--pdf-sizes", default="small,medium,large",
+                            help=f"Fixture PDFs to use, of {', '.join(f'{k} ({v} pages)' for k, v in benchmarks.PDF_SIZES.items())}")
+        parser.add_argument("--only", default="", help="Comma-separated substrings; run only matching cases, e.g. agent/extract,endpoint")
+        parser.add_argument("--stub-latency-ms", type=float, default=0, help="Delay added to every stubbed HTTP response")
+        parser.add_argument("--output", help="Results file (default benchmark-<commit>.json)")
+        parser.add_argument("--compare", help="Earlier results file to check for regressions")
+        parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown reported as a regression (0.1 = 10%%)")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.only = [part for part in options["only"].split(",") if part]
+        self.results = {}
+        self.run_id = uuid.uuid4().hex[:8]
+        self.texts = benchmarks.abstracts(options["papers"])
+        sizes = options["pdf_sizes"].split(",")
+
+        workdir = tempfile.mkdtemp(prefix="benchmark-")
+        self.stdout.write("Generating fixture PDFs")
+        self.pdfs = {size: benchmarks.make_pdf(benchmarks.PDF_SIZES[size], seed=i) for i, size in enumerate(sizes)}
+        self.pdf_paths = {}
+        for size, data in self.pdfs.items():
+            self.pdf_paths[size] = os.path.join(workdir, f"{size}.pdf")
+            with open(self.pdf_paths[size], "wb") as f:
+                f.write(data)
+
+        # Everything runs offline, against a throwaway database and media dir
+        stub = benchmarks.StubTransport(self.pdfs, latency=options["stub_latency_ms"] / 1000)
+        adapters, cache_dir, cache_enabled = fetcher.session.adapters.copy(), fetcher.cache_dir, result_cache.enabled
+        fetcher.session.mount("http://", stub)
+        fetcher.session.mount("https://", stub)
+        fetcher.cache_dir = os.path.join(workdir, "fetch")
+        os.makedirs(fetcher.cache_dir)
+        # Every run must do the work, not read back an earlier run's result
+        result_cache.enabled = False
+        database = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(MEDIA_ROOT=os.path.join(workdir, "media"), TTS_ENGINE="silent"):
+                self.bench_models()
+                self.bench_agents(sizes, workdir)
+                self.bench_endpoints(sizes)
+        finally:
+            connection.creation.destroy_test_db(database, verbosity=0)
+            fetcher.session.adapters, fetcher.cache_dir, result_cache.enabled = adapters, cache_dir, cache_enabled
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.report(stub)
+
+    def measure(self, name, run, items=1, setup=None, repeat=None):
+        """Time ``run(setup(i))`` ``repeat`` times; ``setup`` is not timed."""
+        if self.only and not any(part in name for part in self.only):
+            return
+        repeat = repeat or self.options["repeat"]
+        latencies = []
+        try:
+            for i in range(repeat):
+                arg = setup(i) if setup else None
+                started = time.perf_counter()
+                run(arg)
+                latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            self.stderr.write(f"{name}: {e}")
+            self.results[name] = {"error": str(e)}
+            return
+        self.results[name] = benchmarks.summarize(latencies, items)
+        self.stdout.write(f"{name:<40} p50 {self.results[name]['p50_ms']:>9.1f} ms")
+
+    def bench_models(self):
+        """Cold (load + first call) and warm (later calls) for each model the pipeline uses."""
+        text = self.texts[:1]
+        calls = {
+            "summarization": lambda: SummaryAgent().summarize_many(text),
+            "zero-shot-classification": lambda: TopicClassificationAgent("zero-shot").classify_many(text),
+        }
+        if settings.CLASSIFIER_MODE != "zero-shot" or settings.EMBEDDINGS_ENABLED:
+            calls["sentence-embedding"] = lambda: EmbeddingAgent().embed(text)
+        if settings.CLASSIFIER_MODE != "zero-shot":
+            del calls["zero-shot-classification"]
+
+        for name, call in calls.items():
+            def unload(i, name=name):
+                registry.unload(name)
+                gc.collect()
+            self.measure(f"model/{name}/cold", lambda _, call=call: call(), setup=unload,
+                         repeat=self.options["cold_repeat"])
+            self.measure(f"model/{name}/warm", lambda _, call=call: call())
+
+    def bench_agents(self, sizes, workdir):
+        extraction = ExtractionAgent()
+        for size in sizes:
+            pages = benchmarks.PDF_SIZES[size]
+            url = f"https://bench.local/pdf/{size}-warm.pdf"
+            fetcher.fetch(url)
+            self.measure(f"agent/fetch/{size}/cold",
+                         lambda url: fetcher.fetch(url),
+                         setup=lambda i, size=size: f"https://bench.local/pdf/{size}-{self.run_id}-{i}.pdf")
+            self.measure(f"agent/fetch/{size}/warm", lambda _, url=url: fetcher.fetch(url))
+            self.measure(f"agent/extract/{size}", lambda _, size=size: extraction.extract_text(self.pdf_paths[size]),
+                         items=pages)
+            self.measure(f"agent/extract/{size}/lead",
+                         lambda _, size=size: extraction.extract_document(
+                             self.pdf_paths[size], max_pages=settings.INGEST_LEAD_MAX_PAGES, lead_chars=SUMMARY_CHARS))
+
+        html = HtmlExtractionAgent()
+        for size, paragraphs in benchmarks.HTML_SIZES.items():
+            for variant, kwargs in (("", {}), ("/divs", {"use_paragraphs": False})):
+                page = benchmarks.academic_page(paragraphs, seed=size, **kwargs).encode()
+                self.measure(f"agent/html/{size}{variant}", lambda _, page=page: html.extract(page), items=paragraphs)
+
+        classifier, summarizer = TopicClassificationAgent(), SummaryAgent()
+        texts = self.texts
+        self.measure("agent/classify/single", lambda text: classifier.classify(text),
+                     setup=lambda i: texts[i % len(texts)])
+        self.measure("agent/classify/batched", lambda _: classifier.classify_many(texts), items=len(texts))
+        self.measure("agent/summarize/single", lambda text: summarizer.summarize(text),
+                     setup=lambda i: texts[i % len(texts)])
+        self.measure("agent/summarize/batched", lambda _: summarizer.summarize_many(texts), items=len(texts))
+        if settings.EMBEDDINGS_ENABLED:
+            self.measure("agent/embed/batched", lambda _: EmbeddingAgent().embed(texts), items=len(texts))
+
+        audio = AudioAgent()
+        self.measure("agent/tts/silent", lambda path: audio.generate_audio(texts[0], path, "Benchmark"),
+                     setup=lambda i: os.path.join(workdir, "media", "audios", f"tts-{i}.mp3"))
+
+    def bench_endpoints(self, sizes):
+        client = Client()
+        run_id = self.run_id
+
+        def check(response):
+            if getattr(response, "streaming", False):
+                body = b"".join(response.streaming_content)
+            else:
+                body = response.content
+            if response.status_code >= 400:
+                raise RuntimeError(f"HTTP {response.status_code}: {body[:200]!r}")
+            return body
+
+        def post(path, data):
+            return check(client.post(path, data, content_type="application/json"))
+
+        for size in sizes:
+            self.measure(f"endpoint/process-url/{size}", lambda url: post("/api/process-url/", {"url": url}),
+                         setup=lambda i, size=size: f"https://bench.local/papers/{size}-{run_id}-{i}.pdf")
+        existing = f"https://bench.local/papers/{sizes[0]}-{run_id}-0.pdf"
+        self.measure("endpoint/process-url/existing", lambda _: post("/api/process-url/", {"url": existing}))
+        self.measure("endpoint/process-doi", lambda doi: post("/api/process-doi/", {"doi": doi}),
+                     setup=lambda i: f"10.5555/bench.{run_id}.{i}")
+        self.measure("endpoint/process-academic-url", lambda url: post("/api/process-academic-url/", {"url": url}),
+                     setup=lambda i: f"https://bench.local/abs/{run_id}-{i}")
+        self.measure("endpoint/upload", lambda file: check(client.post("/api/upload/", {"file": file})),
+                     setup=lambda i: SimpleUploadedFile(f"bench-{i}.pdf", benchmarks.make_pdf(2, seed=f"{run_id}-{i}"),
+                                                        content_type="application/pdf"))
+
+        papers = len(self.texts)
+        self.measure("endpoint/search", lambda topic: check(client.get("/api/search/", {"topic": topic, "max_results": papers})),
+                     items=papers, setup=lambda i: f"bench {run_id} {i}")
+        self.measure("endpoint/search/classify-only",
+                     lambda topic: check(client.get("/api/search/", {"topic": topic, "max_results": papers,
+                                                                     "summary": "false"})),
+                     items=papers, setup=lambda i: f"bench {run_id} classify {i}")
+        self.measure("endpoint/batch", lambda items: post("/api/batch/", items), items=papers,
+                     setup=lambda i: [{"doi": f"10.5555/batch.{run_id}.{i}.{n}"} if n % 2 else
+                                      {"url": f"https://bench.local/batch/{run_id}-{i}-{n}.pdf"} for n in range(papers)])
+        self.measure("endpoint/papers/list", lambda _: check(client.get("/api/papers/")))
+        self.measure("endpoint/papers/search", lambda _: check(client.get("/api/papers/search/", {"q": "quantum model"})))
+        topic = settings.TOPIC_LABELS[0]
+        self.measure("endpoint/synthesize", lambda _: check(client.get("/api/synthesize/", {"topic": topic})))
+
+    def report(self, stub):
+        commit = git_commit()
+        results = {
+            "commit": commit,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "inference_backend": settings.INFERENCE_BACKEND,
+            "classifier_mode": settings.CLASSIFIER_MODE,
+            "repeat": self.options["repeat"],
+            "stub_latency_ms": self.options["stub_latency_ms"],
+            "stub_requests": stub.requests,
+            "cases": self.results,
+        }
+        output = self.options["output"] or f"benchmark-{(commit or 'local')[:12]}.json"
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+        self.stdout.write(f"\n{'case':<40} {'runs':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'items/s':>9}")
+        for name, result in self.results.items():
+            if "error" in result:
+                self.stdout.write(f"{name:<40} error: {result['error']}")
+                continue
+            self.stdout.write(f"{name:<40} {result['runs']:>4} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+                              f"{result['p99_ms']:>9.1f} {result['throughput_per_s'] or 0:>9.2f}")
+        self.stdout.write(f"Wrote {output}")
+
+        if self.options["compare"]:
+            baseline = benchmarks.load(self.options["compare"])
+            rows = benchmarks.compare(results, baseline, self.options["threshold"])
+            self.stdout.write(f"\nCompared with {baseline.get('commit') or self.options['compare']}: "
+                              f"{len(rows)} regression(s) over {self.options['threshold']:.0%}")
+            for name, metric, before, after, change in rows:
+                self.stdout.write(f"{name:<40} {metric:<7} {before:>9.1f} -> {after:>9.1f} ({change:+.0%})")
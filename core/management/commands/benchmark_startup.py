@@ -0,0 +1,157 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MODES = {"preload": "True", "per-worker": "False"}
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name is in parentheses and may contain spaces
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def memory(pid):
+    """``{"rss", "pss", "private"}`` bytes of a process; pss and private are None without smaps_rollup."""
+    usage = {"rss": None, "pss": None, "private": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            kib = {line.split(":")[0]: int(line.split()[1]) for line in smaps if line.endswith("kB\n")}
+        usage["rss"], usage["pss"] = kib["Rss"] * 1024, kib["Pss"] * 1024
+        usage["private"] = (kib["Private_Clean"] + kib["Private_Dirty"]) * 1024
+    except (OSError, KeyError):
+        with open(f"/proc/{pid}/statm") as statm:
+            usage["rss"] = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return usage
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = ("Start gunicorn with and without preload_app and report the time until every worker is ready "
+            "and the memory of all its processes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--modes", default="per-worker,preload",
+                            help="per-worker (each worker loads the models) and/or preload (the master does)")
+        parser.add_argument("--classify", type=int, default=20,
+                            help="POST /classify/ requests sent once ready, so memory is measured after inference")
+        parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the workers")
+        parser.add_argument("--output", help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if not os.path.exists("/proc/self/stat"):
+            raise CommandError("benchmark_startup reads process memory from /proc and needs Linux")
+        modes = options["modes"].split(",")
+        for mode in modes:
+            if mode not in MODES:
+                raise CommandError(f"Unknown mode {mode}; choose from {', '.join(MODES)}")
+
+        self.stdout.write(f"{options['workers']} workers, backend {settings.INFERENCE_BACKEND}, "
+                          f"classifier {settings.CLASSIFIER_MODE}")
+        self.stdout.write(f"{'mode':<11} {'ready s':>8} {'rss MiB':>8} {'pss MiB':>8} {'private MiB':>12}  (sums over master + workers)")
+        results = {}
+        for mode in modes:
+            results[mode] = self.run_server(mode, options)
+            self.report(mode, results[mode])
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"workers": options["workers"], "backend": settings.INFERENCE_BACKEND, "modes": results}, f, indent=2)
+
+    def run_server(self, mode, options):
+        port = free_port()
+        env = {
+            **os.environ,
+            "GUNICORN_PRELOAD": MODES[mode],
+            "GUNICORN_BIND": f"127.0.0.1:{port}",
+            "WEB_CONCURRENCY": str(options["workers"]),
+            "MODEL_WARMUP": "True",
+        }
+        args = [sys.executable, "-m", "gunicorn", "-c", str(settings.BASE_DIR / "gunicorn.conf.py"),
+                "research_summarizer_api.wsgi:application"]
+        base = f"http://127.0.0.1:{port}/api"
+        with tempfile.TemporaryFile() as log:
+            started = time.perf_counter()
+            server = subprocess.Popen(args, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                ready_seconds = self.wait_ready(server, base, options["workers"], started, options["timeout"])
+                if ready_seconds is None:
+                    log.seek(0)
+                    raise CommandError(f"{mode}: workers not ready after {options['timeout']}s\n"
+                                       f"{log.read().decode(errors='replace')[-2000:]}")
+                for _ in range(options["classify"]):
+                    self.request(f"{base}/classify/", {"text": "Qubits and error-correcting codes for quantum computers."})
+                workers = child_pids(server.pid)
+                usage = [memory(pid) for pid in [server.pid, *workers]]
+            finally:
+                server.send_signal(signal.SIGTERM)
+                try:
+                    server.wait(30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+                    server.wait()
+
+        total = {key: None if any(u[key] is None for u in usage) else sum(u[key] for u in usage) for key in usage[0]}
+        return {"ready_seconds": round(ready_seconds, 2), "processes": len(usage), **{f"{k}_bytes": v for k, v in total.items()}}
+
+    def wait_ready(self, server, base, workers, started, timeout):
+        """Seconds from launch until ``workers`` distinct worker pids have answered /ready/ with 200."""
+        ready = set()
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                return None
+            status, body = self.request(f"{base}/ready/")
+            if status == 200:
+                ready.add(body["pid"])
+                # Workers that died and were replaced don't count
+                ready &= set(child_pids(server.pid))
+                if len(ready) >= workers:
+                    return time.perf_counter() - started
+            else:
+                time.sleep(0.05)
+        return None
+
+    def request(self, url, data=None):
+        request = urllib.request.Request(url, headers={"Connection": "close"})
+        if data is not None:
+            request.data = json.dumps(data).encode()
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (OSError, ValueError):
+            return None, None
+
+    def report(self, mode, result):
+        def mib(value):
+            return "n/a" if value is None else f"{value / 2 ** 20:.0f}"
+
+        self.stdout.write(f"{mode:<11} {result['ready_seconds']:>8.2f} {mib(result['rss_bytes']):>8} "
+                          f"{mib(result['pss_bytes']):>8} {mib(result['private_bytes']):>12}")
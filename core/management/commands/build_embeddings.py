@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ResearchPaper, PaperEmbedding
+from core.search import index_papers
+
+
+class Command(BaseCommand):
+    help = "Embed stored papers that have no vector yet (or all of them with --rebuild)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=256)
+        parser.add_argument("--rebuild", action="store_true", help="Drop existing vectors first")
+
+    def handle(self, *args, **options):
+        if not settings.EMBEDDINGS_ENABLED:
+            raise CommandError("Set EMBEDDINGS_ENABLED=True to build the embedding index")
+        if options["rebuild"]:
+            PaperEmbedding.objects.all().delete()
+
+        papers = ResearchPaper.objects.filter(embedding__isnull=True).only("id", "title", "summary").order_by("id")
+        chunk, total = [], 0
+        for paper in papers.iterator(chunk_size=options["chunk_size"]):
+            chunk.append(paper)
+            if len(chunk) == options["chunk_size"]:
+                total += index_papers(chunk)
+                chunk = []
+        total += index_papers(chunk)
+        self.stdout.write(f"Embedded {total} papers")
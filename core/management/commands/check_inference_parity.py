@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.agents.backends import BACKENDS, load_pipeline
+from core.agents.model_registry import SUMMARIZATION_MODEL, ZERO_SHOT_MODEL
+from core.agents.paper_search_agent import PaperSearchAgent
+from core.agents.summary_agent import GENERATION_KWARGS, MAX_CHARS
+
+
+def token_f1(a, b):
+    a, b = a.lower().split(), b.lower().split()
+    overlap = sum((Counter(a) & Counter(b)).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / len(a), overlap / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+class Command(BaseCommand):
+    help = "Check that an inference backend keeps summaries and top topics close to a reference backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", choices=BACKENDS, default="torch-int8")
+        parser.add_argument("--reference", choices=BACKENDS, default="torch")
+        parser.add_argument("--query", default="machine learning", help="arXiv query used to collect abstracts")
+        parser.add_argument("--papers", type=int, default=8)
+        parser.add_argument("--min-summary-f1", type=float, default=0.6,
+                            help="Lowest acceptable mean token F1 between the two backends' summaries")
+        parser.add_argument("--min-label-agreement", type=float, default=0.9,
+                            help="Lowest acceptable share of texts with the same top topic")
+
+    def handle(self, *args, **options):
+        abstracts = [p["summary"] for p in PaperSearchAgent().search_arxiv(options["query"], max_results=options["papers"])]
+        if not abstracts:
+            raise CommandError("No abstracts returned for the query")
+
+        summaries, labels = {}, {}
+        for backend in (options["reference"], options["backend"]):
+            summarizer = load_pipeline("summarization", SUMMARIZATION_MODEL, backend)
+            outputs = summarizer([text[:MAX_CHARS] for text in abstracts], truncation=True, **GENERATION_KWARGS)
+            summaries[backend] = [out["summary_text"] for out in outputs]
+
+            classifier = load_pipeline("zero-shot-classification", ZERO_SHOT_MODEL, backend)
+            outputs = classifier(abstracts, candidate_labels=settings.TOPIC_LABELS)
+            labels[backend] = [out["labels"][0] for out in outputs]
+            del summarizer, classifier
+
+        reference, candidate = options["reference"], options["backend"]
+        f1 = [token_f1(a, b) for a, b in zip(summaries[reference], summaries[candidate])]
+        mean_f1 = sum(f1) / len(f1)
+        agreement = sum(a == b for a, b in zip(labels[reference], labels[candidate])) / len(abstracts)
+
+        for i, score in enumerate(f1):
+            marker = "" if labels[reference][i] == labels[candidate][i] else \
+                f"  topic {labels[reference][i]!r} -> {labels[candidate][i]!r}"
+            self.stdout.write(f"paper {i}: summary F1 {score:.2f}{marker}")
+        self.stdout.write(f"{candidate} vs {reference}: mean summary F1 {mean_f1:.3f}, top-topic agreement {agreement:.2f}")
+
+        if mean_f1 < options["min_summary_f1"] or agreement < options["min_label_agreement"]:
+            raise CommandError("Backend outputs are outside tolerance")
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from core import benchmarks
+from core.agents.fetcher import fetcher
+
+
+class Command(BaseCommand):
+    help = ("Send concurrent ingests whose origin is slow to the async and sync views in this process, "
+            "and report how many requests one worker held open at once.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100, help="Concurrent requests per run")
+        parser.add_argument("--origin-delay", type=float, default=1.0, help="Seconds the origin waits before answering")
+        parser.add_argument("--sync-threads", type=int, default=8,
+                            help="Threads serving the sync view, like gunicorn --threads; 0 skips the sync run")
+
+    def handle(self, *args, **options):
+        origin = benchmarks.SlowOrigin(options["origin_delay"]).start()
+        run_id = uuid.uuid4().hex[:8]
+        workdir = tempfile.mkdtemp(prefix="loadtest-")
+        # One origin stands in for many slow hosts, so lift the per-host cap for the run
+        max_per_host, cache_dir = fetcher.max_per_host, fetcher.cache_dir
+        fetcher.max_per_host = options["requests"]
+        fetcher.cache_dir = workdir
+        database = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Every request ends in a 400 (the origin's pages have no text); don't log each one
+        request_logger = logging.getLogger("django.request")
+        log_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+
+        self.stdout.write(f"{options['requests']} requests, origin delay {options['origin_delay']}s, "
+                          f"ASYNC_FETCH_MAX_CONNECTIONS {settings.ASYNC_FETCH_MAX_CONNECTIONS}")
+        self.stdout.write(f"{'view':<28} {'wall s':>7} {'held':>5} {'p50 s':>7} {'p95 s':>7} {'max s':>7}  statuses")
+        try:
+            urls = [origin.url(f"async/{run_id}/{i}") for i in range(options["requests"])]
+            self.report("async/process-academic-url", origin, *asyncio.run(self.run_async(urls)))
+            if options["sync_threads"]:
+                origin.reset()
+                urls = [origin.url(f"sync/{run_id}/{i}") for i in range(options["requests"])]
+                self.report(f"process-academic-url ({options['sync_threads']} thr)", origin,
+                            *self.run_sync(urls, options["sync_threads"]))
+        finally:
+            origin.stop()
+            request_logger.setLevel(log_level)
+            connection.creation.destroy_test_db(database, verbosity=0)
+            fetcher.max_per_host, fetcher.cache_dir = max_per_host, cache_dir
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    async def run_async(self, urls):
+        client = AsyncClient()
+
+        # Latency counts from the start of the run, so it includes any time spent queued
+        started = time.perf_counter()
+
+        async def one(url):
+            response = await client.post("/api/async/process-academic-url/", {"url": url},
+                                         content_type="application/json")
+            return time.perf_counter() - started, response.status_code
+
+        results = await asyncio.gather(*(one(url) for url in urls))
+        return time.perf_counter() - started, results
+
+    def run_sync(self, urls, threads):
+        started = time.perf_counter()
+
+        def one(url):
+            response = Client().post("/api/process-academic-url/", {"url": url}, content_type="application/json")
+            return time.perf_counter() - started, response.status_code
+
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(one, urls))
+        return time.perf_counter() - started, results
+
+    def report(self, name, origin, wall, results):
+        latencies = benchmarks.summarize([latency for latency, _ in results])
+        statuses = ", ".join(f"{code}x{count}" for code, count in sorted(Counter(code for _, code in results).items()))
+        self.stdout.write(f"{name:<28} {wall:>7.2f} {origin.peak:>5} {latencies['p50_ms'] / 1000:>7.2f} "
+                          f"{latencies['p95_ms'] / 1000:>7.2f} {max(latency for latency, _ in results):>7.2f}  {statuses}")
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.agents.audio_agent import prune_audio
+from core.models import ResearchPaper
+
+
+class Command(BaseCommand):
+    help = "Evict the least recently served audio files beyond the size budget (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-bytes", type=int, default=settings.AUDIO_MAX_BYTES)
+        parser.add_argument("--max-idle-days", type=float, default=settings.AUDIO_MAX_IDLE_DAYS)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        deleted = prune_audio(options["max_bytes"], options["max_idle_days"] * 86400, options["dry_run"])
+        if deleted and not options["dry_run"]:
+            # /papers/<pk>/audio/ renders them again if they are requested later
+            ResearchPaper.objects.filter(audio__in=deleted).update(audio=None)
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(f"{verb} {len(deleted)} audio files")
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run ingest job workers in the foreground, e.g. as a dedicated worker container."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.JOB_WORKERS)
+
+    def handle(self, *args, **options):
+        pool = WorkerPool(options["workers"], settings.JOB_POLL_INTERVAL)
+        pool.start()
+        self.stdout.write(f"Started {options['workers']} job workers")
+        try:
+            while True:
+                time.sleep(60)
+                pool.start()  # replace any thread that died
+        except KeyboardInterrupt:
+            pass
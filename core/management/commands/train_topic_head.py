@@ -0,0 +1,53 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.agents.embedding_agent import EmbeddingAgent
+from core.agents.topic_classifier_agent import LinearHead
+from core.models import ResearchPaper, PaperEmbedding
+from core.search import from_blob
+
+
+class Command(BaseCommand):
+    help = "Train the linear topic head (CLASSIFIER_MODE=linear) on the topics of stored papers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out to report accuracy")
+        parser.add_argument("--epochs", type=int, default=300)
+        parser.add_argument("--min-per-label", type=int, default=5)
+        parser.add_argument("--output", default=settings.CLASSIFIER_HEAD_PATH)
+
+    def handle(self, *args, **options):
+        papers = list(ResearchPaper.objects.filter(topic__in=settings.TOPIC_LABELS)
+                      .exclude(summary__isnull=True).exclude(summary="")
+                      .only("id", "title", "summary", "topic").order_by("id"))
+        labels = [label for label in settings.TOPIC_LABELS
+                  if sum(paper.topic == label for paper in papers) >= options["min_per_label"]]
+        if len(labels) < 2:
+            raise CommandError(f"Need at least two labels with {options['min_per_label']} papers each")
+        papers = [paper for paper in papers if paper.topic in labels]
+
+        agent = EmbeddingAgent()
+        vectors = self.embed(agent, papers)
+        targets = np.array([labels.index(paper.topic) for paper in papers])
+
+        order = np.random.default_rng(0).permutation(len(papers))
+        held = order[:int(len(order) * options["holdout"])]
+        train = order[len(held):]
+        if len(held):
+            head = LinearHead.fit(vectors[train], targets[train], labels, agent.model_name, epochs=options["epochs"])
+            accuracy = (head.predict_proba(vectors[held]).argmax(axis=1) == targets[held]).mean()
+            self.stdout.write(f"Holdout accuracy: {accuracy:.3f} on {len(held)} papers")
+
+        head = LinearHead.fit(vectors, targets, labels, agent.model_name, epochs=options["epochs"])
+        head.save(options["output"])
+        self.stdout.write(f"Trained on {len(papers)} papers, {len(labels)} labels -> {options['output']}")
+
+    def embed(self, agent, papers):
+        # Reuse vectors stored for search when they come from the same encoder
+        stored = dict(PaperEmbedding.objects.filter(paper__in=papers, model_name=agent.model_name)
+                      .values_list("paper_id", "vector"))
+        missing = [paper for paper in papers if paper.pk not in stored]
+        computed = agent.embed([agent.paper_text(paper) for paper in missing]) if missing else []
+        fresh = {paper.pk: vector for paper, vector in zip(missing, computed)}
+        return np.stack([fresh[paper.pk] if paper.pk in fresh else from_blob(stored[paper.pk]) for paper in papers])
@@ -0,0 +1,224 @@
+"""Process-local timings and counters, exported in Prometheus text format at /metrics.
+
+Everything here is a no-op unless METRICS_ENABLED or SERVER_TIMING_ENABLED
+is set, so instrumented code pays one attribute check when it is off.
+Each worker process keeps its own numbers.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import resolve, Resolver404
+
+PREFIX = "summarizer"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+HELP = {
+    "http_request_seconds": "Request latency by view",
+    "stage_seconds": "Time spent in each pipeline stage",
+    "fetches": "HTTP fetches, by whether the fetch cache answered",
+    "bytes_fetched": "Response bytes downloaded and stored in the fetch cache",
+    "pages_extracted": "PDF pages extracted",
+    "tokens_summarized": "Input tokens sent to the summarization model",
+    "tts_chunks": "Text chunks synthesized to speech",
+    "result_cache_events": "Result cache lookups by kind and outcome",
+}
+
+# Per-request {stage: seconds}, set by TimingMiddleware when Server-Timing is on
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class _Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(dict)  # name -> {labels: [bucket counts..., sum, count]}
+        self.counters = defaultdict(lambda: defaultdict(float))  # name -> {labels: value}
+
+    def observe(self, name, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms[name]
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.counters[name][key] += amount
+
+
+metrics = _Metrics()
+
+
+def count(name, amount=1, **labels):
+    """Add to the counter ``<prefix>_<name>_total``."""
+    if settings.METRICS_ENABLED:
+        metrics.inc(name, amount, **labels)
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_noop = _NoopTimer()
+
+
+def record(stage, seconds):
+    if settings.METRICS_ENABLED:
+        metrics.observe("stage_seconds", seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] += seconds
+
+
+def timer(stage):
+    """``with timer("extract"):`` records the block under ``stage``."""
+    if settings.METRICS_ENABLED or _request_timings.get() is not None:
+        return _Timer(stage)
+    return _noop
+
+
+def _labels(key, extra=None):
+    pairs = list(key) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in pairs) + "}"
+
+
+def _collected_counters():
+    """Counters owned by other modules, read at scrape time."""
+    from .agents.result_cache import result_cache
+    series = {}
+    for name, value in result_cache.counters.items():
+        kind, event = name.rsplit(".", 1)
+        series[(("event", event), ("kind", kind))] = value
+    return {"result_cache_events": series}
+
+
+def render():
+    from .agents.model_registry import registry
+    lines = []
+    with metrics.lock:
+        histograms = {name: {key: list(values) for key, values in series.items()}
+                      for name, series in metrics.histograms.items()}
+        counters = {name: dict(series) for name, series in metrics.counters.items()}
+    counters.update(_collected_counters())
+
+    for name, series in sorted(histograms.items()):
+        full = f"{PREFIX}_{name}"
+        lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} histogram"]
+        for key, values in sorted(series.items()):
+            for bound, bucket in zip(BUCKETS, values):
+                lines.append(f"{full}_bucket{_labels(key, [('le', bound)])} {bucket}")
+            lines.append(f"{full}_bucket{_labels(key, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{full}_sum{_labels(key)} {values[-2]:.6f}")
+            lines.append(f"{full}_count{_labels(key)} {values[-1]}")
+
+    for name, series in sorted(counters.items()):
+        full = f"{PREFIX}_{name}_total"
+        lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} counter"]
+        for key, value in sorted(series.items()):
+            lines.append(f"{full}{_labels(key)} {value:g}")
+
+    stats = registry.stats()
+    lines += [f"# HELP {PREFIX}_model_load_seconds Time taken to load each model",
+              f"# TYPE {PREFIX}_model_load_seconds gauge"]
+    for name, model in stats["models"].items():
+        if "load_seconds" in model:
+            lines.append(f'{PREFIX}_model_load_seconds{{model="{name}"}} {model["load_seconds"]}')
+    lines += ["# HELP process_resident_memory_bytes Resident memory size in bytes",
+              "# TYPE process_resident_memory_bytes gauge",
+              f"process_resident_memory_bytes {stats['rss_bytes']}"]
+    return "\n".join(lines) + "\n"
+
+
+class TimingMiddleware:
+    """Times every request, and adds the stages it ran to its Server-Timing header.
+
+    Works in both sync and async chains, so the ASGI views stay async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not (settings.METRICS_ENABLED or settings.SERVER_TIMING_ENABLED):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings, elapsed = self.stop(token, started)
+        return self.finish(request, response, timings, elapsed)
+
+    async def __acall__(self, request):
+        token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings, elapsed = self.stop(token, started)
+        return self.finish(request, response, timings, elapsed)
+
+    def start(self):
+        token = _request_timings.set(defaultdict(float)) if settings.SERVER_TIMING_ENABLED else None
+        return token, time.perf_counter()
+
+    def stop(self, token, started):
+        elapsed = time.perf_counter() - started
+        timings = _request_timings.get()
+        if token is not None:
+            _request_timings.reset(token)
+        return timings, elapsed
+
+    def finish(self, request, response, timings, elapsed):
+        if settings.METRICS_ENABLED:
+            try:
+                view = resolve(request.path_info).url_name or "unnamed"
+            except Resolver404:
+                view = "not_found"
+            metrics.observe("http_request_seconds", elapsed,
+                            view=view, method=request.method, status=response.status_code)
+
+        if timings is not None:
+            # Views that time themselves (e.g. /classify/) keep their own entries
+            existing = response.get("Server-Timing")
+            named = {entry.split(";")[0].strip() for entry in existing.split(",")} if existing else set()
+            entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items() if stage not in named]
+            entries.append(f"total;dur={elapsed * 1000:.1f}")
+            response["Server-Timing"] = ", ".join(([existing] if existing else []) + entries)
+        return response
@@ -0,0 +1,95 @@
+# Generated by Django 5.2 on 2026-10-18 09:12
+
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from django.db import migrations, models
+
+# A frozen copy of core.fingerprints as of this migration, so later changes there can't alter it.
+# Stored papers only have a DOI and a source URL to go on.
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+ARXIV_DOI = re.compile(r"^10\.48550/arxiv\.(.+)$", re.IGNORECASE)
+ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$", re.IGNORECASE)
+ARXIV_VERSION = re.compile(r"v\d+$")
+
+
+def normalize_doi(doi):
+    doi = doi.strip()
+    for prefix in DOI_PREFIXES:
+        if doi.lower().startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi.lower()
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    if (parts.scheme == "http" and netloc.endswith(":80")) or (parts.scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+def arxiv_id(doi=None, url=None):
+    if doi:
+        match = ARXIV_DOI.match(normalize_doi(doi))
+        if match:
+            return ARXIV_VERSION.sub("", match.group(1))
+    if url:
+        match = ARXIV_URL.search(url.strip())
+        if match:
+            return ARXIV_VERSION.sub("", match.group(1)).lower()
+    return None
+
+
+def fingerprint(doi=None, url=None):
+    arxiv = arxiv_id(doi, url)
+    if arxiv:
+        identity = f"arxiv:{arxiv.lower()}"
+    elif doi:
+        identity = f"doi:{normalize_doi(doi)}"
+    elif url:
+        identity = f"url:{normalize_url(url)}"
+    else:
+        return None
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Oldest row wins; later duplicates keep a NULL fingerprint so the unique index can be built
+    ResearchPaper = apps.get_model('core', 'ResearchPaper')
+    seen = set()
+    for paper in ResearchPaper.objects.order_by('id').only('id', 'doi', 'source_url').iterator():
+        value = fingerprint(doi=paper.doi, url=paper.source_url)
+        if value and value not in seen:
+            seen.add(value)
+            ResearchPaper.objects.filter(pk=paper.pk).update(fingerprint=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_cachedresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='researchpaper',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='researchpaper',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['doi'], name='core_resear_doi_557a13_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['source_url'], name='core_resear_source__35a8a4_idx'),
+        ),
+    ]
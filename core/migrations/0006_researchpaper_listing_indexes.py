@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_researchpaper_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='core_resear_uploade_bb0b5f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['topic', '-uploaded_at', '-id'], name='core_resear_topic_7f4c80_idx'),
+        ),
+    ]
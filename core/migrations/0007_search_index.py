@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-18 09:16
+
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+# The full-text index as core.fulltext built it at this migration, frozen so later changes there can't alter it
+TABLE = "core_researchpaper"
+FTS_TABLE = "core_researchpaper_fts"
+
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+    ) STORED""",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_idx ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    f"DROP INDEX IF EXISTS {TABLE}_search_idx",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, summary, content='{TABLE}', content_rowid='id', tokenize='porter unicode61')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, summary ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+        INSERT INTO {FTS_TABLE}(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        execute(schema_editor, POSTGRES_INSTALL)
+    elif vendor == "sqlite":
+        try:
+            execute(schema_editor, SQLITE_INSTALL)
+        except Exception as e:
+            # Some SQLite builds ship without FTS5; search falls back to icontains
+            logger.warning("SQLite full-text index not installed: %s", e)
+
+
+def uninstall_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        execute(schema_editor, POSTGRES_UNINSTALL)
+    elif vendor == "sqlite":
+        execute(schema_editor, SQLITE_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_researchpaper_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperEmbedding',
+            fields=[
+                ('paper', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='core.researchpaper')),
+                ('model_name', models.CharField(max_length=255)),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(install_fulltext, uninstall_fulltext),
+    ]
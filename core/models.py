@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -11,3 +13,64 @@ class ResearchPaper(models.Model):
     audio = models.FileField(upload_to='audios/', blank=True, null=True)
     source_url = models.URLField(blank=True, null=True)
     citation = models.TextField(blank=True, null=True)  # Added citation field
+    fingerprint = models.CharField(max_length=64, unique=True, blank=True, null=True)  # see core/fingerprints.py
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['doi']),
+            models.Index(fields=['source_url']),
+            models.Index(fields=['-uploaded_at', '-id']),
+            models.Index(fields=['topic', '-uploaded_at', '-id']),
+        ]
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    stages = models.JSONField(default=dict)  # stage name -> {"status", "started_at", "seconds"}
+    paper = models.ForeignKey(ResearchPaper, blank=True, null=True, on_delete=models.SET_NULL)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # A running job's worker renews this; once it lapses the job goes back to pending
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+
+class CachedResult(models.Model):
+    key = models.CharField(max_length=64, primary_key=True)  # sha256 of stage, parameters and input
+    kind = models.CharField(max_length=50, db_index=True)
+    value = models.JSONField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class PaperEmbedding(models.Model):
+    paper = models.OneToOneField(ResearchPaper, primary_key=True, on_delete=models.CASCADE, related_name='embedding')
+    model_name = models.CharField(max_length=255)
+    vector = models.BinaryField()  # float16, L2-normalized; see core/search.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class TopicSynthesis(models.Model):
+    topic = models.CharField(max_length=100, unique=True)
+    summary = models.TextField()
+    paper_count = models.PositiveIntegerField()
+    last_paper_id = models.BigIntegerField()  # highest paper id merged into the summary
+    etag = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PaperCursorPagination(CursorPagination):
+    # Keyset pagination: each page is an index range scan on (uploaded_at, id), no OFFSET
+    ordering = ('-uploaded_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
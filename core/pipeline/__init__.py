@@ -0,0 +1,15 @@
+"""Ingest pipeline: source adapters (``sources``) and the executor every ingest path shares (``executor``)."""
+from .errors import IngestError, StageTimeout
+from .executor import STAGES, Pipeline, PipelineConfig, stage
+from .sources import (
+    SOURCES,
+    AcademicPageSource,
+    ArxivEntrySource,
+    DoiSource,
+    PdfFileSource,
+    PdfUrlSource,
+    Source,
+    extraction_budget,
+    make_source,
+)
+from .store import bulk_save, find_existing, save_paper, update_paper
@@ -0,0 +1,18 @@
+class IngestError(Exception):
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+    def as_dict(self):
+        data = {"error": self.message}
+        if self.details:
+            data["details"] = self.details
+        return data
+
+
+class StageTimeout(IngestError):
+    def __init__(self, stage, seconds):
+        super().__init__(f"The {stage} stage timed out after {seconds:g}s", status_code=504)
+        self.stage = stage
@@ -0,0 +1,396 @@
+"""The ingest executor shared by the sync and async views, background jobs, /batch/ and search.
+
+``Pipeline.run`` ingests one source, ``Pipeline.arun`` does the same on the
+event loop for the ASGI views, and ``Pipeline.run_many`` streams many
+sources through a StagePipeline so the model stages batch across them.
+All three extract, run the optional stages their PipelineConfig enables
+(classify, summarize, audio) and save.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .. import aio
+from ..agents.audio_agent import AudioAgent
+from ..agents.fetcher import fetcher
+from ..agents.result_cache import result_cache
+from ..agents.stage_pipeline import Stage, StagePipeline
+from ..agents.summary_agent import SummaryAgent
+from ..agents.topic_classifier_agent import TopicClassificationAgent
+from ..fingerprints import fingerprint
+from ..models import ResearchPaper
+from .errors import IngestError, StageTimeout
+from .store import bulk_save, find_existing, save_paper, update_paper
+
+logger = logging.getLogger(__name__)
+
+# Optional stages in the order they run, and the paper field each one fills in
+STAGES = ("classify", "summarize", "audio")
+OUTPUTS = {"classify": "topic", "summarize": "summary", "audio": "audio"}
+
+
+@contextmanager
+def stage(progress, name):
+    """Report a pipeline stage to ``progress(name, state)`` if one is given."""
+    if progress:
+        progress(name, "running")
+    yield
+    if progress:
+        progress(name, "done")
+
+
+def run_with_timeout(name, fn, seconds):
+    """Call ``fn`` on its own thread and raise StageTimeout if it hasn't returned after ``seconds``.
+
+    The thread can't be interrupted: a stage that overruns finishes in the
+    background and its result is dropped.
+    """
+    future = concurrent.futures.Future()
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=target, name=f"pipeline-{name}", daemon=True).start()
+    try:
+        return future.result(seconds)
+    except concurrent.futures.TimeoutError:
+        if future.done():  # fn itself raised a TimeoutError
+            raise
+        raise StageTimeout(name, seconds)
+
+
+async def prefetch(source):
+    """Fetch everything ``source.extract`` will read, concurrently and off the worker threads."""
+    wanted = source.urls()
+    if not wanted:
+        return
+    results = await asyncio.gather(*(fetcher.afetch(url, headers=headers) for url, headers in wanted),
+                                   return_exceptions=True)
+    if isinstance(results[0], Exception):
+        raise IngestError("Could not fetch the source", status_code=502, details=str(results[0]))
+
+
+def fail(item, error):
+    item["error"] = error.as_dict() if isinstance(error, IngestError) else {"error": str(error)}
+    item["exception"] = error
+    item["done"] = True
+
+
+def per_item(fn):
+    """Wrap a single-item stage so one bad item becomes an error result instead of stopping the run."""
+    def run(item):
+        if not item.get("done"):
+            try:
+                fn(item)
+            except Exception as e:
+                if not isinstance(e, IngestError):
+                    logger.exception("Pipeline item %s failed", item["index"])
+                fail(item, e)
+        return item
+    return run
+
+
+def per_batch(fn):
+    """Wrap a batched stage: ``fn`` only sees the items still in flight."""
+    def run(items):
+        active = [item for item in items if not item.get("done")]
+        if active:
+            try:
+                fn(active)
+            except Exception as e:
+                if not isinstance(e, IngestError):
+                    logger.exception("Pipeline stage failed for %d items", len(active))
+                for item in active:
+                    fail(item, e)
+        return items
+    return run
+
+
+def stored_outputs(paper):
+    return {"topic": paper.topic, "summary": paper.summary} if paper else {}
+
+
+class PipelineConfig:
+    """What a Pipeline runs. Defaults come from settings.
+
+    ``stages`` is the subset of STAGES to run (default PIPELINE_STAGES).
+    Audio also needs the summarize stage and AUDIO_MODE=eager.
+    ``cache=False`` bypasses the result cache for the whole run.
+    ``batch_size`` caps the items per model call in ``run_many``.
+    ``timeouts`` maps extract or an optional stage to seconds (default
+    PIPELINE_STAGE_TIMEOUTS).
+    """
+
+    def __init__(self, stages=None, cache=True, batch_size=None, timeouts=None):
+        self.stages = frozenset(settings.PIPELINE_STAGES if stages is None else stages)
+        unknown = self.stages - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+        self.cache = cache
+        self.batch_size = batch_size or settings.INFERENCE_BATCH_SIZE
+        self.timeouts = settings.PIPELINE_STAGE_TIMEOUTS if timeouts is None else timeouts
+
+    def without(self, *names):
+        return PipelineConfig(self.stages - set(names), self.cache, self.batch_size, self.timeouts)
+
+    def runs(self, name):
+        if name == "audio":
+            return "audio" in self.stages and "summarize" in self.stages and settings.AUDIO_MODE == "eager"
+        return name in self.stages
+
+
+class Pipeline:
+    """Runs sources through the configured stages.
+
+    With a ``model_executor`` (the async views pass ``aio.model_executor``)
+    ``run_many`` makes its classify and summarize calls on that pool, so
+    they share its bound while the other stages wait on the network.
+    """
+
+    def __init__(self, config=None, model_executor=None):
+        self.config = config or PipelineConfig()
+        self.model_executor = model_executor
+        self.stage_pipeline = None
+
+    # Agents load their models, so they are created on first use, on the thread doing the work
+    @functools.cached_property
+    def classifier(self):
+        return TopicClassificationAgent()
+
+    @functools.cached_property
+    def summarizer(self):
+        return SummaryAgent()
+
+    @functools.cached_property
+    def audio_agent(self):
+        return AudioAgent()
+
+    def plan(self, existing=None):
+        """The optional stages to run for a new paper, or to fill in what a stored one lacks.
+
+        Audio is only made alongside a new summary: stored papers without
+        audio get it from /papers/<id>/audio/.
+        """
+        names = [name for name in ("classify", "summarize")
+                 if self.config.runs(name) and not (existing and getattr(existing, OUTPUTS[name]))]
+        if "summarize" in names and self.config.runs("audio"):
+            names.append("audio")
+        return names
+
+    def _scoped(self, fn, *args, **kwargs):
+        with nullcontext() if self.config.cache else result_cache.bypass():
+            return fn(*args, **kwargs)
+
+    def _call(self, name, fn, *args, **kwargs):
+        """Run one stage call with the configured cache setting and the stage's timeout."""
+        call = functools.partial(self._scoped, fn, *args, **kwargs)
+        seconds = self.config.timeouts.get(name)
+        return run_with_timeout(name, call, seconds) if seconds else call()
+
+    def _model_call(self, name, fn, *args, **kwargs):
+        """``_call`` for a model stage, on ``model_executor`` if there is one."""
+        if self.model_executor is None:
+            return self._call(name, fn, *args, **kwargs)
+        call = functools.partial(contextvars.copy_context().run, aio.closing_connections,
+                                 self._call, name, fn, *args, **kwargs)
+        return self.model_executor.submit(call).result()
+
+    async def _timed(self, name, awaitable):
+        seconds = self.config.timeouts.get(name)
+        if not seconds:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, seconds)
+        except asyncio.TimeoutError:
+            raise StageTimeout(name, seconds)
+
+    def _step(self, name, source, text, known):
+        if name == "classify":
+            return self.classifier.classify(source.classify_text(text))
+        if name == "summarize":
+            return self.summarizer.summarize(text)
+        return self.audio_agent.audio_for(known["summary"], known.get("topic"))
+
+    def run(self, source, progress=None):
+        """Ingest one source; return ``(paper, created)``.
+
+        Sources with no identifier (uploads) are fingerprinted by their
+        extracted text.
+        """
+        fingerprint_value = source.fingerprint()
+        existing = find_existing(fingerprint_value)
+        if existing and not self.plan(existing):
+            return existing, False
+
+        with stage(progress, "extract"):
+            text, fields = self._call("extract", source.extract)
+
+        if fingerprint_value is None:
+            fingerprint_value = fingerprint(text=text)
+            existing = find_existing(fingerprint_value)
+            if existing and not self.plan(existing):
+                return existing, False
+
+        outputs = {}
+        for name in self.plan(existing):
+            with stage(progress, name):
+                outputs[OUTPUTS[name]] = self._call(name, self._step, name, source, text,
+                                                    {**stored_outputs(existing), **outputs})
+
+        with stage(progress, "save"):
+            if existing:
+                return update_paper(existing, **outputs), False
+            return save_paper(**fields, **outputs, fingerprint=fingerprint_value), True
+
+    async def _extract(self, source):
+        await prefetch(source)
+        return await aio.run_in(aio.extract_executor, self._scoped, source.extract)
+
+    async def arun(self, source):
+        """``run`` for the ASGI views.
+
+        Remote content is fetched on the event loop; extraction and model
+        calls run on aio's bounded pools.
+        """
+        fingerprint_value = source.fingerprint()
+        existing = await sync_to_async(find_existing)(fingerprint_value)
+        if existing and not self.plan(existing):
+            return existing, False
+
+        text, fields = await self._timed("extract", self._extract(source))
+
+        if fingerprint_value is None:
+            fingerprint_value = fingerprint(text=text)
+            existing = await sync_to_async(find_existing)(fingerprint_value)
+            if existing and not self.plan(existing):
+                return existing, False
+
+        outputs = {}
+        for name in self.plan(existing):
+            # TTS waits on its own pool and the network, so it doesn't take a model slot
+            executor = None if name == "audio" else aio.model_executor
+            call = aio.run_in(executor, self._scoped, self._step, name, source, text,
+                              {**stored_outputs(existing), **outputs})
+            outputs[OUTPUTS[name]] = await self._timed(name, call)
+
+        if existing:
+            return await sync_to_async(update_paper)(existing, **outputs), False
+        paper = await sync_to_async(save_paper)(**fields, **outputs, fingerprint=fingerprint_value)
+        return paper, True
+
+    def run_many(self, items):
+        """Stream items through one StagePipeline, so the model stages batch across them.
+
+        Each item is a dict with an ``index`` and a ``source``. Items that
+        are already ``done`` (e.g. with a parse ``error``) pass through.
+        Yields each item once it has finished, in completion order. A
+        finished item has ``paper`` and ``created``, ``duplicate_of`` (the
+        index of an earlier item with the same fingerprint), or ``error``
+        and ``exception``.
+        """
+        batch_size = self.config.batch_size
+        stages = [
+            Stage("dedup", per_batch(self._dedup_items), kind="io", workers=1, batch_size=batch_size),
+            Stage("extract", per_item(self._extract_item), kind="io", workers=settings.BATCH_FETCH_WORKERS),
+        ]
+        if self.config.runs("classify"):
+            stages.append(Stage("classify", per_batch(self._classify_items), kind="compute", batch_size=batch_size))
+        if self.config.runs("summarize"):
+            stages.append(Stage("summarize", per_batch(self._summarize_items), kind="compute", batch_size=batch_size))
+        if self.config.runs("audio"):
+            stages.append(Stage("audio", per_item(self._audio_item), kind="io", workers=settings.AUDIO_WORKERS))
+        stages.append(Stage("save", per_batch(self._save_items), kind="io", workers=1, batch_size=batch_size))
+
+        self._seen = {}
+        self.stage_pipeline = StagePipeline(stages)
+        yield from self.stage_pipeline.run(iter(items))
+
+    def server_timing(self):
+        return self.stage_pipeline.server_timing() if self.stage_pipeline else ""
+
+    def _dedup_items(self, items):
+        for item in items:
+            item["fingerprint"] = item["source"].fingerprint()
+        stored = ResearchPaper.objects.in_bulk(
+            [item["fingerprint"] for item in items if item["fingerprint"]], field_name="fingerprint"
+        )
+        for item in items:
+            value = item["fingerprint"]
+            existing = stored.get(value)
+            if existing and not self.plan(existing):
+                item.update(paper=existing, created=False, done=True)
+            elif value in self._seen:
+                item.update(duplicate_of=self._seen[value], done=True)
+            else:
+                if value:
+                    self._seen[value] = item["index"]
+                item["existing"] = existing
+
+    def _extract_item(self, item):
+        item["text"], item["fields"] = self._call("extract", item["source"].extract)
+        if not item["fingerprint"]:
+            item["fingerprint"] = fingerprint(text=item["text"])
+            item["existing"] = find_existing(item["fingerprint"])
+            if item["existing"] and not self.plan(item["existing"]):
+                item.update(paper=item["existing"], created=False, done=True)
+                return
+            # Uploads are only known by their text, so two copies of one PDF meet here, on parallel workers
+            earlier = self._seen.setdefault(item["fingerprint"], item["index"])
+            if earlier != item["index"]:
+                item.update(duplicate_of=earlier, done=True)
+                return
+        item["plan"] = self.plan(item["existing"])
+        item["outputs"] = {}
+
+    def _classify_items(self, items):
+        todo = [item for item in items if "classify" in item["plan"]]
+        if todo:
+            texts = [item["source"].classify_text(item["text"]) for item in todo]
+            topics = self._model_call("classify", self.classifier.classify_many, texts,
+                                      batch_size=self.config.batch_size)
+            for item, topic in zip(todo, topics):
+                item["outputs"]["topic"] = topic
+
+    def _summarize_texts(self, texts):
+        if settings.SUMMARY_MODE == "mapreduce":
+            return [self.summarizer.summarize(text) for text in texts]
+        return self.summarizer.summarize_many(texts, batch_size=self.config.batch_size)
+
+    def _summarize_items(self, items):
+        todo = [item for item in items if "summarize" in item["plan"]]
+        if todo:
+            summaries = self._model_call("summarize", self._summarize_texts, [item["text"] for item in todo])
+            for item, summary in zip(todo, summaries):
+                item["outputs"]["summary"] = summary
+
+    def _audio_item(self, item):
+        if "audio" in item["plan"]:
+            item["outputs"]["audio"] = self._call("audio", self._step, "audio", item["source"], item["text"],
+                                                  {**stored_outputs(item["existing"]), **item["outputs"]})
+
+    def _save_items(self, items):
+        new = [item for item in items if not item["existing"]]
+        if new:
+            papers = bulk_save([{**item["fields"], **item["outputs"], "fingerprint": item["fingerprint"]}
+                                for item in new])
+            for item, paper in zip(new, papers):
+                item.update(paper=paper, created=True)
+        for item in items:
+            if item["existing"]:
+                item.update(paper=update_paper(item["existing"], **item["outputs"]), created=False)
+            item["done"] = True
+            del item["text"]
@@ -0,0 +1,213 @@
+"""Source adapters: one per kind of input the pipeline can ingest.
+
+A source knows its fingerprint before extraction (if it has one), which
+URLs its extraction will read, and how to turn itself into text plus the
+paper fields known before analysis (title, source_url, doi, file).
+"""
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+
+from ..agents.extraction_agent import ExtractionAgent
+from ..agents.html_extraction_agent import HtmlExtractionAgent
+from ..agents.summary_agent import MAX_CHARS as SUMMARY_CHARS
+from ..fingerprints import fingerprint
+from .errors import IngestError
+
+logger = logging.getLogger(__name__)
+
+
+def extraction_budget():
+    """How much of a PDF ingest extracts: all of it, or in lead mode only what classify and summarize read."""
+    if settings.INGEST_EXTRACT_MODE != "lead" or settings.SUMMARY_MODE == "mapreduce":
+        return {}
+    # Classification reads the first 500 characters, summarization the first SUMMARY_CHARS
+    return {"max_pages": settings.INGEST_LEAD_MAX_PAGES, "lead_chars": SUMMARY_CHARS}
+
+
+@contextmanager
+def fetch_errors():
+    """Report a source that can't be reached (after the fetcher's retries) as a 502."""
+    try:
+        yield
+    except requests.RequestException as e:
+        raise IngestError("Could not fetch the source", status_code=502, details=str(e))
+
+
+class Source:
+    kind = None
+    # Characters of the extracted text the classifier sees (None: all of it)
+    classify_chars = 500
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.label}>"
+
+    @property
+    def label(self):
+        return getattr(self.value, "name", self.value)
+
+    def fingerprint(self):
+        """The paper's fingerprint, or None to fingerprint it by its extracted text."""
+        return None
+
+    def urls(self):
+        """``(url, headers)`` requests ``extract`` makes through the fetcher, the first one required."""
+        return []
+
+    def extract(self):
+        """Return ``(text, fields)``; raise IngestError if there is nothing to analyze."""
+        raise NotImplementedError
+
+    def classify_text(self, text):
+        return text[:self.classify_chars] if self.classify_chars else text
+
+
+class PdfUrlSource(Source):
+    kind = "pdf_url"
+
+    def fingerprint(self):
+        return fingerprint(url=self.value)
+
+    def urls(self):
+        return [(self.value, {})]
+
+    def extract(self):
+        url = self.value
+        with fetch_errors():
+            extracted_text = ExtractionAgent().extract_from_url(url, **extraction_budget())
+        if not extracted_text:
+            raise IngestError("Could not extract text from URL")
+
+        title = url.split("/")[-1].replace("-", " ").replace(".pdf", "").title()
+        return extracted_text, {"title": title, "source_url": url}
+
+
+class DoiSource(Source):
+    kind = "doi"
+
+    def fingerprint(self):
+        return fingerprint(doi=self.value)
+
+    def urls(self):
+        doi = self.value
+        if doi.startswith("10.48550/arXiv."):
+            pdf = (f"https://arxiv.org/pdf/{doi.split('arXiv.')[1]}.pdf", {})
+        else:
+            pdf = (f"https://doi.org/{doi}", {"Accept": "application/pdf"})
+        return [pdf, (f"https://doi.org/{doi}", {})]
+
+    def extract(self):
+        doi = self.value
+        with fetch_errors():
+            extracted_text = ExtractionAgent().extract_from_doi(doi, **extraction_budget())
+            if not extracted_text:
+                raise IngestError("Could not extract text from DOI")
+            page = HtmlExtractionAgent().extract_from_url(f"https://doi.org/{doi}")
+        title = page["title"] or doi.replace("/", " ").replace("-", " ").title()
+        return extracted_text, {"title": title, "doi": doi}
+
+
+class PdfFileSource(Source):
+    """An uploaded PDF (any Django ``File``)."""
+
+    kind = "upload"
+
+    def extract(self):
+        file = self.value
+        temp_path = f"/tmp/{uuid.uuid4()}_{os.path.basename(file.name)}"
+        with open(temp_path, 'wb+') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+
+        try:
+            extracted_text, metadata = ExtractionAgent().extract_document(temp_path, **extraction_budget())
+        except Exception:
+            raise IngestError("Failed to extract text from PDF")
+        finally:
+            os.remove(temp_path)
+        if not extracted_text:
+            raise IngestError("Failed to extract text from PDF")
+
+        title = metadata.get("title") or file.name.replace('.pdf', '').replace('_', ' ').title()
+        return extracted_text, {"title": title, "file": file}
+
+
+class AcademicPageSource(Source):
+    """An HTML landing page on an academic site.
+
+    When the page links its PDF (citation_pdf_url), the paper is read from
+    the PDF instead, falling back to the page text if that fails.
+    """
+
+    kind = "academic_url"
+
+    def fingerprint(self):
+        return fingerprint(url=self.value)
+
+    def urls(self):
+        return [(self.value, {})]
+
+    def extract(self):
+        url = self.value
+        try:
+            with fetch_errors():
+                page = HtmlExtractionAgent().extract_from_url(url)
+        except IngestError:
+            raise
+        except Exception as e:
+            raise IngestError("Failed to extract from academic repository", status_code=500, details=str(e))
+
+        title = page["title"] or url.split("/")[-1].replace("-", " ").replace(".html", "").title()
+        fields = {"title": title, "source_url": url}
+        if page["doi"]:
+            fields["doi"] = page["doi"]
+
+        if page["pdf_url"]:
+            try:
+                extracted_text = ExtractionAgent().extract_from_url(page["pdf_url"], **extraction_budget())
+            except Exception:
+                logger.warning("Could not extract %s linked from %s, using the page text", page["pdf_url"], url,
+                               exc_info=True)
+                extracted_text = ""
+            if extracted_text:
+                return extracted_text, fields
+
+        if not page["text"].strip():
+            raise IngestError("No meaningful content found at URL")
+        return page["text"], fields
+
+
+class ArxivEntrySource(Source):
+    """A PaperSearchAgent result; its abstract is the text, so nothing is fetched."""
+
+    kind = "arxiv"
+    classify_chars = None
+
+    @property
+    def label(self):
+        return self.value["arxiv_id"] or self.value["link"]
+
+    def fingerprint(self):
+        entry = self.value
+        return fingerprint(arxiv=entry["arxiv_id"], doi=entry["doi"], url=entry["link"])
+
+    def extract(self):
+        entry = self.value
+        return entry["summary"], {"title": entry["title"], "source_url": entry["link"]}
+
+
+SOURCES = {source.kind: source for source in (PdfUrlSource, DoiSource, PdfFileSource, AcademicPageSource, ArxivEntrySource)}
+
+
+def make_source(kind, value):
+    try:
+        return SOURCES[kind](value)
+    except KeyError:
+        raise IngestError(f"Unknown source kind: {kind}")
@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from .. import metrics, search, synthesis
+from ..models import ResearchPaper
+
+
+def find_existing(fingerprint_value):
+    if not fingerprint_value:
+        return None
+    return ResearchPaper.objects.filter(fingerprint=fingerprint_value).first()
+
+
+def save_paper(**fields):
+    """Create a paper, or return the one that already has its fingerprint (e.g. a concurrent ingest)."""
+    with metrics.timer("db_write"):
+        if not fields.get("fingerprint"):
+            paper = ResearchPaper.objects.create(**fields)
+        else:
+            ResearchPaper.objects.bulk_create([ResearchPaper(**fields)], ignore_conflicts=True)
+            paper = ResearchPaper.objects.get(fingerprint=fields["fingerprint"])
+    search.index_papers([paper])
+    synthesis.schedule_refreshes([paper])
+    return paper
+
+
+def bulk_save(rows):
+    """Insert papers in one transaction, skipping fingerprints that already exist.
+
+    Returns the stored paper for every row, in order.
+    """
+    with metrics.timer("db_write"):
+        with transaction.atomic():
+            ResearchPaper.objects.bulk_create([ResearchPaper(**row) for row in rows], ignore_conflicts=True)
+        stored = ResearchPaper.objects.in_bulk([row["fingerprint"] for row in rows], field_name="fingerprint")
+    papers = [stored[row["fingerprint"]] for row in rows]
+    search.index_papers(papers)
+    synthesis.schedule_refreshes(papers)
+    return papers
+
+
+def update_paper(paper, **fields):
+    """Fill in outputs (topic, summary, audio) that an earlier, partial ingest left empty."""
+    if not fields:
+        return paper
+    with metrics.timer("db_write"):
+        ResearchPaper.objects.filter(pk=paper.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(paper, name, value)
+    search.index_papers([paper])
+    synthesis.schedule_refreshes([paper])
+    return paper
@@ -0,0 +1,155 @@
+import logging
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Q
+
+from . import fulltext
+from .models import ResearchPaper, PaperEmbedding
+
+logger = logging.getLogger(__name__)
+
+MODES = ("auto", "text", "semantic")
+
+
+def to_blob(vector):
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+
+def from_blob(blob):
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+
+class EmbeddingIndex:
+    """All paper vectors as one in-memory matrix for brute-force cosine top-k.
+
+    Vectors are stored as float16 blobs and held here as float32 so the
+    scoring matmul goes through BLAS. The matrix is refreshed lazily: new
+    rows are appended, and anything else (deletes, re-embeds) reloads it.
+    Topics change without a re-embed, so the topic filter reads them from
+    the database at query time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = None
+        self._version = (0, None)
+
+    def _rows(self, queryset):
+        ids, vectors = [], []
+        for paper_id, blob in queryset.values_list("paper_id", "vector").iterator():
+            ids.append(paper_id)
+            vectors.append(from_blob(blob))
+        return np.array(ids, dtype=np.int64), vectors
+
+    def refresh(self):
+        version = PaperEmbedding.objects.aggregate(count=Count("pk"), latest=Max("updated_at"))
+        version = (version["count"], version["latest"])
+        with self._lock:
+            if version == self._version:
+                return
+            count, latest = self._version
+            if self._matrix is not None and latest is not None:
+                ids, vectors = self._rows(PaperEmbedding.objects.filter(updated_at__gt=latest))
+                if count + len(ids) == version[0] and not np.isin(ids, self._ids).any():
+                    if vectors:
+                        self._ids = np.concatenate([self._ids, ids])
+                        self._matrix = np.vstack([self._matrix, np.stack(vectors)])
+                    self._version = version
+                    return
+            ids, vectors = self._rows(PaperEmbedding.objects.all())
+            self._ids = ids
+            self._matrix = np.stack(vectors) if vectors else None
+            self._version = version
+            logger.info("Loaded embedding index with %d vectors", len(ids))
+
+    def query(self, vector, k=10, topic=None, exclude=None):
+        self.refresh()
+        with self._lock:
+            ids, matrix = self._ids, self._matrix
+        if matrix is None:
+            return []
+
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        if topic:
+            in_topic = ResearchPaper.objects.filter(topic=topic).values_list("id", flat=True)
+            scores[~np.isin(ids, np.fromiter(in_topic, dtype=np.int64))] = -np.inf
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+embedding_index = EmbeddingIndex()
+
+
+def index_papers(papers):
+    """Embed papers that have no vector for the current model yet.
+
+    Called after every ingest. Failures are logged rather than raised: the
+    paper is already saved and ``build_embeddings`` can fill the gap.
+    """
+    if not settings.EMBEDDINGS_ENABLED or not papers:
+        return 0
+    from .agents.embedding_agent import EmbeddingAgent
+    try:
+        agent = EmbeddingAgent()
+        done = set(PaperEmbedding.objects.filter(paper__in=papers, model_name=agent.model_name)
+                   .values_list("paper_id", flat=True))
+        todo = [paper for paper in papers if paper.pk not in done]
+        if not todo:
+            return 0
+        vectors = agent.embed([agent.paper_text(paper) for paper in todo])
+        PaperEmbedding.objects.bulk_create(
+            [PaperEmbedding(paper=paper, model_name=agent.model_name, vector=to_blob(vector))
+             for paper, vector in zip(todo, vectors)],
+            update_conflicts=True, unique_fields=["paper"], update_fields=["model_name", "vector", "updated_at"],
+        )
+        return len(todo)
+    except Exception:
+        logger.exception("Failed to embed %d papers", len(papers))
+        return 0
+
+
+def text_search(query, limit=20, topic=None, match_any=False):
+    if fulltext.is_installed(connection):
+        return fulltext.search(connection, query, limit, topic, match_any)
+
+    papers = ResearchPaper.objects.filter(Q(title__icontains=query) | Q(summary__icontains=query))
+    if topic:
+        papers = papers.filter(topic=topic)
+    return [(paper_id, 0.0) for paper_id in papers.order_by("-uploaded_at", "-id").values_list("id", flat=True)[:limit]]
+
+
+def semantic_search(query, limit=20, topic=None):
+    from .agents.embedding_agent import EmbeddingAgent
+    vector = EmbeddingAgent().embed([query])[0]
+    return embedding_index.query(vector, k=limit, topic=topic)
+
+
+def search(query, limit=20, topic=None, mode="auto"):
+    """Return ``(paper_id, score)`` pairs for a query, best match first."""
+    if mode == "semantic" or (mode == "auto" and settings.EMBEDDINGS_ENABLED):
+        return semantic_search(query, limit, topic)
+    return text_search(query, limit, topic)
+
+
+def related(paper, limit=10):
+    if settings.EMBEDDINGS_ENABLED:
+        embedding = PaperEmbedding.objects.filter(paper=paper).values_list("vector", flat=True).first()
+        if embedding is not None:
+            return embedding_index.query(from_blob(embedding), k=limit, topic=None, exclude=paper.pk)
+    hits = text_search(paper.title, limit + 1, match_any=True)
+    return [(paper_id, score) for paper_id, score in hits if paper_id != paper.pk][:limit]
+
+
+def papers_for(hits, queryset=None):
+    """Load the papers for ``hits`` in hit order."""
+    stored = (ResearchPaper.objects.all() if queryset is None else queryset).in_bulk([paper_id for paper_id, _ in hits])
+    return [(stored[paper_id], score) for paper_id, score in hits if paper_id in stored]
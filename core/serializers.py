@@ -1,7 +1,33 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import ResearchPaper
+from .models import ResearchPaper, Job
 
 class ResearchPaperSerializer(serializers.ModelSerializer):
+    # /papers/<id>/audio/ renders the audio on first request, so with AUDIO_MODE=lazy this is set before ``audio`` is
+    audio_url = serializers.SerializerMethodField()
+
     class Meta:
         model = ResearchPaper
         fields = '__all__'
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # ``fields`` limits the output to a subset, for ?fields= sparse fieldsets
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_audio_url(self, paper):
+        if not paper.summary:
+            return None
+        url = reverse("paper-audio", args=[paper.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class JobSerializer(serializers.ModelSerializer):
+    paper = ResearchPaperSerializer(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'stages', 'error', 'paper', 'attempts', 'created_at', 'started_at', 'finished_at']
@@ -0,0 +1,109 @@
+"""Persisted cross-paper synthesis per topic.
+
+Each topic's synthesis records the highest paper id it has merged. When
+papers are added, only the new summaries are folded into the existing
+synthesis. Deletes fall back to a full rebuild. Refreshes run on the job
+queue, so reads are a single row lookup.
+"""
+import hashlib
+import logging
+from itertools import chain
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .agents.summary_agent import SummaryAgent
+from .models import Job, ResearchPaper, TopicSynthesis
+
+logger = logging.getLogger(__name__)
+
+
+def topic_papers(topic):
+    return (ResearchPaper.objects.filter(topic=topic)
+            .exclude(summary__isnull=True).exclude(summary=""))
+
+
+def compute_etag(topic, paper_count, last_paper_id, summary):
+    return hashlib.sha256(f"{topic}\n{paper_count}\n{last_paper_id}\n{summary}".encode()).hexdigest()[:32]
+
+
+def _latest(topic):
+    return topic_papers(topic).aggregate(count=Count("id"), last=Max("id"))
+
+
+def is_stale(synthesis, latest):
+    return synthesis.paper_count != latest["count"] or synthesis.last_paper_id != latest["last"]
+
+
+def refresh(topic, budget_seconds=None):
+    """Bring the topic's synthesis up to date and return it (None if the topic has no summaries)."""
+    latest = _latest(topic)
+    synthesis = TopicSynthesis.objects.filter(topic=topic).first()
+    if not latest["count"]:
+        if synthesis:
+            synthesis.delete()
+        return None
+    if synthesis and not is_stale(synthesis, latest):
+        return synthesis
+
+    # Papers added while we summarize are left for the next refresh
+    papers = topic_papers(topic).filter(id__lte=latest["last"]).order_by("id")
+    new = papers.filter(id__gt=synthesis.last_paper_id) if synthesis else papers
+    if synthesis and synthesis.paper_count + new.count() == latest["count"]:
+        texts = chain([synthesis.summary], new.values_list("summary", flat=True).iterator())
+    else:
+        texts = papers.values_list("summary", flat=True).iterator()
+
+    summary = ""
+    for partial in SummaryAgent().summarize_stream(texts, budget_seconds=budget_seconds):
+        if partial.get("final"):
+            summary = partial["summary"]
+
+    values = {
+        "summary": summary,
+        "paper_count": latest["count"],
+        "last_paper_id": latest["last"],
+        "etag": compute_etag(topic, latest["count"], latest["last"], summary),
+    }
+    if synthesis is None:
+        synthesis, created = TopicSynthesis.objects.get_or_create(topic=topic, defaults=values)
+        if created:
+            return synthesis
+    # Only overwrite the version we started from; a concurrent refresh may have got there first
+    TopicSynthesis.objects.filter(
+        pk=synthesis.pk, last_paper_id=synthesis.last_paper_id, paper_count=synthesis.paper_count,
+    ).update(**values, updated_at=timezone.now())
+    return TopicSynthesis.objects.get(pk=synthesis.pk)
+
+
+def schedule_refresh(topic):
+    """Queue a background refresh unless one is already pending for the topic."""
+    from . import jobs
+    if Job.objects.filter(kind="synthesis", status=Job.PENDING, payload__topic=topic).exists():
+        return
+    try:
+        jobs.enqueue("synthesis", {"topic": topic})
+    except jobs.QueueFull:
+        logger.warning("Job queue full, synthesis refresh for %r skipped", topic)
+
+
+def schedule_refreshes(papers):
+    """Refresh syntheses that someone has read for the topics of newly saved papers."""
+    topics = {paper.topic for paper in papers if paper.topic}
+    for topic in TopicSynthesis.objects.filter(topic__in=topics).values_list("topic", flat=True):
+        schedule_refresh(topic)
+
+
+def get(topic, budget_seconds=None):
+    """Return ``(synthesis, stale)`` for a read.
+
+    The first read builds the synthesis in the request. Later reads return
+    the stored one and queue a refresh if papers changed since.
+    """
+    synthesis = TopicSynthesis.objects.filter(topic=topic).first()
+    if synthesis is None:
+        return refresh(topic, budget_seconds), False
+    if is_stale(synthesis, _latest(topic)):
+        schedule_refresh(topic)
+        return synthesis, True
+    return synthesis, False
@@ -0,0 +1,102 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from core import benchmarks
+from core.agents.model_registry import registry
+
+
+class ArxivFeed:
+    """StubServer handler serving ``benchmarks.arxiv_feed`` pages for a query with ``total`` results.
+
+    Answers every request with ``status`` instead when that isn't 200.
+    """
+
+    def __init__(self, total=100):
+        self.total = total
+        self.status = 200
+
+    def __call__(self, request):
+        if self.status != 200:
+            return self.status, {}, b""
+        query = request.query["search_query"][0].removeprefix("all:")
+        start, count = int(request.query["start"][0]), int(request.query["max_results"][0])
+        body = benchmarks.arxiv_feed(query, start, max(0, min(count, self.total - start)))
+        return 200, {"Content-Type": "application/atom+xml"}, body.encode()
+
+
+class FakeModel:
+    """Stands in for a transformers pipeline; records the thread of every call."""
+
+    # transformers' summarization pipeline returns a list even for one text
+    unwrap_single = True
+    delay = 0  # seconds per call
+
+    def __init__(self, name):
+        self.model = SimpleNamespace(name_or_path=name)
+        self.threads = []
+
+    def __call__(self, texts, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        single = isinstance(texts, str)
+        outputs = [self.output(text, **kwargs) for text in ([texts] if single else texts)]
+        return outputs[0] if single and self.unwrap_single else outputs
+
+
+class FakeTokenizer:
+    """Stands in for a transformers tokenizer: one token per whitespace-separated word."""
+
+    def __init__(self, model_max_length=1024):
+        self.model_max_length = model_max_length
+        self.vocabulary = {}
+        self.words = []
+
+    def encode(self, text):
+        ids = []
+        for word in text.split():
+            if word not in self.vocabulary:
+                self.vocabulary[word] = len(self.words)
+                self.words.append(word)
+            ids.append(self.vocabulary[word])
+        return ids
+
+    def __call__(self, texts, truncation=False, **kwargs):
+        single = isinstance(texts, str)
+        ids = [self.encode(text) for text in ([texts] if single else texts)]
+        if truncation:
+            ids = [row[:self.model_max_length] for row in ids]
+        return {"input_ids": ids[0] if single else ids}
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(self.words[i] for i in ids)
+
+
+class FakeSummarizer(FakeModel):
+    unwrap_single = False
+
+    def __init__(self):
+        super().__init__("fake-summarizer")
+        self.tokenizer = FakeTokenizer()
+
+    def output(self, text, max_length=360, **kwargs):
+        return {"summary_text": " ".join(text.split()[:20])}
+
+
+class FakeClassifier(FakeModel):
+    def __init__(self):
+        super().__init__("fake-classifier")
+
+    def output(self, text, candidate_labels=(), **kwargs):
+        labels = list(candidate_labels)
+        return {"labels": labels, "scores": [0.6] + [0.4 / (len(labels) - 1)] * (len(labels) - 1)}
+
+
+def fake_models(test):
+    """Load fake summarization and zero-shot models for ``test``; returns them."""
+    models = SimpleNamespace(summarizer=FakeSummarizer(), classifier=FakeClassifier())
+    test.enterContext(mock.patch.dict(registry._models, {
+        "summarization": models.summarizer, "zero-shot-classification": models.classifier,
+    }))
+    return models
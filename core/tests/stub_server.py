@@ -0,0 +1,58 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubRequest:
+    def __init__(self, path, headers):
+        parts = urlsplit(path)
+        self.path = parts.path
+        self.query = parse_qs(parts.query)
+        self.headers = headers
+
+
+class StubServer:
+    """A real HTTP server on 127.0.0.1, run in a background thread for the fetch tests.
+
+    ``handler(request)`` returns ``(status, headers, body)``; a body given as
+    a list of chunks is sent without Content-Length. Every request
+    is recorded in ``requests``, so tests can see what actually reached the
+    network.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                request = StubRequest(self.path, dict(self.headers))
+                stub.requests.append(request)
+                status, headers, body = stub.handler(request)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if isinstance(body, bytes):
+                    self.send_header("Content-Length", str(len(body)))
+                    body = [body]
+                self.end_headers()
+                for chunk in body:
+                    self.wfile.write(chunk)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from filelock import FileLock
+
+from core.agents.audio_agent import lock_path, prune_locks
+from core.models import ResearchPaper
+from core.views import ranged_file_response
+
+
+class RangeTests(SimpleTestCase):
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.path = os.path.join(directory, "audio.mp3")
+        with open(self.path, "wb") as f:
+            f.write(bytes(range(10)))
+
+    def get(self, range_header=None):
+        headers = {"Range": range_header} if range_header else {}
+        response = ranged_file_response(RequestFactory().get("/", headers=headers), self.path, "audio/mpeg")
+        self.addCleanup(response.close)
+        return response
+
+    def test_ranges(self):
+        for header, content_range, body in (
+            ("bytes=2-5", "bytes 2-5/10", bytes([2, 3, 4, 5])),
+            ("bytes=7-", "bytes 7-9/10", bytes([7, 8, 9])),
+            ("bytes=-3", "bytes 7-9/10", bytes([7, 8, 9])),
+            ("bytes=8-100", "bytes 8-9/10", bytes([8, 9])),
+            ("bytes=-100", "bytes 0-9/10", bytes(range(10))),
+        ):
+            with self.subTest(header):
+                response = self.get(header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], content_range)
+                self.assertEqual(response["Content-Length"], str(len(body)))
+                self.assertEqual(b"".join(response.streaming_content), body)
+
+    def test_whole_file_without_a_usable_range(self):
+        for header in (None, "bytes=-", "bytes=1-2,4-5", "items=0-1"):
+            with self.subTest(header):
+                response = self.get(header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Accept-Ranges"], "bytes")
+                self.assertEqual(b"".join(response.streaming_content), bytes(range(10)))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=10-", "bytes=5-2"):
+            with self.subTest(header):
+                response = self.get(header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */10")
+
+
+@override_settings(TTS_ENGINE="silent", AUDIO_MODE="lazy")
+class PaperAudioTests(TestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.paper = ResearchPaper.objects.create(title="Qubits", topic="Physics", summary="Qubits are fragile.")
+
+    def test_audio_url(self):
+        url = f"/api/papers/{self.paper.pk}/audio/"
+        self.assertEqual(self.client.get(f"/api/papers/{self.paper.pk}/").json()["audio_url"], url)
+
+        results = self.client.get("/api/papers/?fields=title,audio_url").json()["results"]
+        self.assertEqual(results, [{"title": "Qubits", "audio_url": url}])
+
+        ResearchPaper.objects.filter(pk=self.paper.pk).update(summary=None)
+        self.assertIsNone(self.client.get(f"/api/papers/{self.paper.pk}/").json()["audio_url"])
+
+    def test_renders_on_first_request(self):
+        response = self.client.get(f"/api/papers/{self.paper.pk}/audio/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content))
+        self.paper.refresh_from_db()
+        self.assertTrue(os.path.exists(os.path.join(self.media, self.paper.audio.name)))
+
+    def test_renders_again_after_the_file_was_pruned(self):
+        self.client.get(f"/api/papers/{self.paper.pk}/audio/")
+        self.paper.refresh_from_db()
+        os.remove(os.path.join(self.media, self.paper.audio.name))
+
+        response = self.client.get(f"/api/papers/{self.paper.pk}/audio/", headers={"Range": "bytes=0-9"})
+
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(os.path.exists(os.path.join(self.media, self.paper.audio.name)))
+
+
+class PruneLocksTests(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def lock(self, key, age):
+        path = lock_path(key)
+        open(path, "w").close()
+        os.utime(path, (time.time() - age,) * 2)
+        return path
+
+    def test_only_old_free_locks_are_removed(self):
+        old, recent, held = self.lock("old", 7200), self.lock("recent", 60), self.lock("held", 7200)
+
+        with FileLock(held):
+            prune_locks(time.time() - 3600)
+
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(held))
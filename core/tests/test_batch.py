@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+
+from core import benchmarks
+from core.models import ResearchPaper
+
+from .fakes import fake_models
+
+
+class BatchUploadTests(TransactionTestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media, PIPELINE_STAGES=["classify", "summarize"]))
+        fake_models(self)
+
+    def post(self, *files):
+        response = self.client.post("/api/batch/", {"files": list(files)})
+        self.assertEqual(response.status_code, 200)
+        return sorted((json.loads(line) for line in b"".join(response.streaming_content).splitlines()),
+                      key=lambda result: result["index"])
+
+    def test_identical_uploads_are_stored_once(self):
+        pdf, other = benchmarks.make_pdf(1, seed=1), benchmarks.make_pdf(1, seed=2)
+        results = self.post(SimpleUploadedFile("a.pdf", pdf), SimpleUploadedFile("b.pdf", other),
+                            SimpleUploadedFile("a-copy.pdf", pdf))
+
+        statuses = [result["status"] for result in results]
+        self.assertEqual(statuses.count("created"), 2)
+        duplicate = next(result for result in results if result["status"] == "duplicate")
+        # Either copy may finish extracting first
+        self.assertEqual({duplicate["id"], results[duplicate["duplicate_of"]]["id"]}, {"a.pdf", "a-copy.pdf"})
+        self.assertEqual(ResearchPaper.objects.count(), 2)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "papers"))), 2)
+
+    def test_upload_of_a_stored_paper_is_existing(self):
+        pdf = benchmarks.make_pdf(1, seed=3)
+        self.post(SimpleUploadedFile("a.pdf", pdf))
+
+        results = self.post(SimpleUploadedFile("a.pdf", pdf), SimpleUploadedFile("again.pdf", pdf))
+        self.assertEqual([result["status"] for result in results], ["existing", "existing"])
+        self.assertEqual(ResearchPaper.objects.count(), 1)
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from unittest import mock
+
+import fitz
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import benchmarks
+from core.agents import extraction_agent
+from core.agents.extraction_agent import ExtractionAgent, lead_text
+from core.agents.fetcher import Fetcher
+from core.agents.result_cache import ResultCache
+from core.pipeline.sources import extraction_budget
+
+from .stub_server import StubServer
+
+
+class ExtractFromUrlTests(TestCase):
+    def setUp(self):
+        self.document = ('"v1"', benchmarks.make_pdf(1, seed=1, title="Url paper"))
+        self.server = self.enterContext(StubServer(self.respond))
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        # Every fetch revalidates, as a stale entry would
+        fetcher = Fetcher(cache_dir, fresh_seconds=0, retries=0)
+        self.enterContext(mock.patch.object(extraction_agent, "fetcher", fetcher))
+        # An empty memory tier, so no other test's extraction of the same bytes is reused
+        self.enterContext(mock.patch.object(extraction_agent, "result_cache", ResultCache(1 << 20, 1 << 20)))
+        self.extractions = self.enterContext(mock.patch.object(
+            ExtractionAgent, "_extract_text", autospec=True, side_effect=ExtractionAgent._extract_text))
+
+    def respond(self, request):
+        if self.document is None:
+            return 404, {}, b""
+        etag, body = self.document
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/pdf"}, body
+
+    def test_unchanged_document_is_extracted_once(self):
+        url = self.server.url("/paper.pdf")
+        first = ExtractionAgent().extract_from_url(url)
+        second = ExtractionAgent().extract_from_url(url)
+
+        self.assertIn("Url paper 1", first)
+        self.assertEqual(second, first)
+        self.assertEqual(self.extractions.call_count, 1)
+        self.assertEqual(len(self.server.requests), 2)  # the second one revalidated
+
+    def test_changed_document_is_extracted_again(self):
+        url = self.server.url("/paper.pdf")
+        ExtractionAgent().extract_from_url(url)
+        self.document = ('"v2"', benchmarks.make_pdf(1, seed=2, title="Url paper"))
+
+        self.assertIn("Url paper 2", ExtractionAgent().extract_from_url(url))
+        self.assertEqual(self.extractions.call_count, 2)
+
+    def test_failed_fetch_is_empty(self):
+        self.document = None
+        self.assertEqual(ExtractionAgent().extract_from_url(self.server.url("/missing.pdf")), "")
+        self.assertEqual(self.extractions.call_count, 0)
+
+
+def filler(word, lines=3):
+    return "\n".join(" ".join([word] * 10) for _ in range(lines))
+
+
+class LeadTextTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(mock.patch.object(extraction_agent, "result_cache", ResultCache(0, 0, enabled=False)))
+
+    def pdf(self, pages):
+        path = os.path.join(self.directory, "paper.pdf")
+        with fitz.open() as doc:
+            for text in pages:
+                page = doc.new_page()
+                page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=9)
+            doc.save(path)
+        return path
+
+    def extract(self, pages, **budget):
+        return ExtractionAgent().extract_text(self.pdf(pages), **budget)
+
+    def test_reads_from_the_abstract_to_section_two(self):
+        pages = [
+            f"A paper title\nSome Author, Some University\nAbstract\n{filler('abstract')}",
+            f"1 Introduction\n{filler('introduction')}",
+            f"2 Related work\n{filler('related')}",
+            filler("results"),
+        ]
+        text = self.extract(pages, lead_chars=3000)
+
+        self.assertTrue(text.lstrip().startswith("abstract"))
+        self.assertIn("introduction introduction", text)
+        for skipped in ("Some Author", "Related work", "related", "results"):
+            self.assertNotIn(skipped, text)
+
+    def test_stops_reading_pages_at_section_two(self):
+        pages = ["Abstract\nwords", "1. Introduction\nwords", "II. Methods\nwords", "never read"]
+        read = []
+
+        def iter_pages():
+            for page in pages:
+                read.append(page)
+                yield page
+
+        text, pages_read = lead_text(iter_pages(), 3000)
+        self.assertEqual(pages_read, 3)
+        self.assertEqual(len(read), 3)
+        self.assertNotIn("Methods", text)
+
+    def test_stops_at_lead_chars(self):
+        # About 1000 characters a page
+        pages = [f"Abstract\n{filler('lead', 20)}"] + [filler(f"page{number}", 20) for number in range(5)]
+        text = self.extract(pages, lead_chars=2000)
+
+        self.assertGreaterEqual(len(text), 2000)
+        self.assertIn("page0", text)
+        self.assertNotIn("page1", text)
+
+    def test_without_an_abstract_heading_reads_from_the_start(self):
+        text = self.extract([f"A paper title\n{filler('body')}", filler("more")], lead_chars=3000)
+
+        self.assertTrue(text.startswith("A paper title"))
+        self.assertIn("more", text)
+
+    @override_settings(INGEST_EXTRACT_MODE="lead", INGEST_LEAD_MAX_PAGES=2, SUMMARY_MODE="truncate")
+    def test_lead_mode_reads_at_most_ingest_lead_max_pages(self):
+        pages = [f"Abstract\n{filler('first')}", filler("second"), filler("third")]
+
+        text = self.extract(pages, **extraction_budget())
+
+        self.assertIn("second", text)
+        self.assertNotIn("third", text)
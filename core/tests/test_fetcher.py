@@ -0,0 +1,215 @@
+import asyncio
+import os
+import socket
+import tempfile
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from core.agents import extraction_agent
+from core.agents.fetcher import FetchResult, Fetcher
+from core.agents.result_cache import result_cache
+from core.pipeline import DoiSource, IngestError, PdfUrlSource
+
+from .stub_server import StubServer
+
+
+class FetcherTests(SimpleTestCase):
+    def setUp(self):
+        self.responses = []  # (status, headers, body) served in order; the last one repeats
+        self.server = self.enterContext(StubServer(self.respond))
+        self.cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+
+    def respond(self, request):
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def fetcher(self, **kwargs):
+        return Fetcher(self.cache_dir, **{"retries": 2, "backoff": 0, **kwargs})
+
+    def test_fresh_hit_skips_the_network(self):
+        self.responses = [(200, {"Content-Type": "text/plain"}, b"body")]
+        fetcher = self.fetcher(fresh_seconds=60)
+
+        first = fetcher.fetch(self.server.url("/doc"))
+        second = fetcher.fetch(self.server.url("/doc"))
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, b"body")
+        self.assertEqual(second.content_type, "text/plain")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_stale_entry_is_revalidated(self):
+        self.responses = [(200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, b"body"),
+                          (304, {"ETag": '"v2"'}, b""),
+                          (304, {}, b"")]
+        fetcher = self.fetcher(fresh_seconds=0)
+        url = self.server.url("/doc")
+
+        fetcher.fetch(url)
+        revalidated = fetcher.fetch(url)
+        fetcher.fetch(url)
+
+        self.assertTrue(revalidated.from_cache)
+        self.assertEqual(revalidated.content, b"body")
+        second, third = self.server.requests[1:]
+        self.assertEqual(second.headers["If-None-Match"], '"v1"')
+        self.assertEqual(second.headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        # The validator the 304 sent replaces the stored one
+        self.assertEqual(third.headers["If-None-Match"], '"v2"')
+
+    def test_retries_server_errors(self):
+        self.responses = [(503, {"Retry-After": "0"}, b""), (502, {}, b""), (200, {}, b"body")]
+
+        result = self.fetcher().fetch(self.server.url("/doc"))
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.content, b"body")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_persistent_error_is_a_non_ok_result(self):
+        self.responses = [(503, {}, b"")]
+
+        result = self.fetcher().fetch(self.server.url("/doc"))
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(result.content, b"")
+        self.assertEqual(len(self.server.requests), 3)  # the first try and two retries
+
+    def test_not_found_is_not_retried_or_cached(self):
+        self.responses = [(404, {}, b"missing")]
+        fetcher = self.fetcher(fresh_seconds=60)
+
+        self.assertEqual(fetcher.fetch(self.server.url("/doc")).status_code, 404)
+        self.assertEqual(fetcher.fetch(self.server.url("/doc")).status_code, 404)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_accept_header_selects_a_separate_entry(self):
+        self.responses = [(200, {}, b"html"), (200, {}, b"pdf")]
+        fetcher = self.fetcher(fresh_seconds=60)
+
+        html = fetcher.fetch(self.server.url("/doc"))
+        pdf = fetcher.fetch(self.server.url("/doc"), headers={"Accept": "application/pdf"})
+
+        self.assertEqual((html.content, pdf.content), (b"html", b"pdf"))
+
+    def test_prune_evicts_least_recently_used(self):
+        self.responses = [(200, {}, b"x" * 100)]
+        fetcher = self.fetcher(fresh_seconds=60, max_cache_bytes=250)
+        paths = {}
+        for name in ("a", "b", "c"):
+            paths[name] = fetcher.fetch(self.server.url(f"/{name}")).path
+        # "a" is oldest by fetch time but was just read, so "b" is evicted first
+        now = time.time()
+        for age, name in ((30, "a"), (20, "b"), (10, "c")):
+            os.utime(paths[name], (now - age, now - age))
+        fetcher.fetch(self.server.url("/a"))
+
+        fetcher.prune()
+
+        self.assertTrue(os.path.exists(paths["a"]))
+        self.assertFalse(os.path.exists(paths["b"]))
+        self.assertFalse(os.path.exists(paths["b"][:-len(".body")] + ".json"))
+        self.assertTrue(os.path.exists(paths["c"]))
+
+    def test_oversized_body_is_not_downloaded(self):
+        self.responses = [(200, {}, b"x" * 200)]
+
+        result = self.fetcher(max_body_bytes=100).fetch(self.server.url("/doc"))
+
+        self.assertEqual(result.status_code, 413)
+        self.assertFalse(result.ok)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_download_stops_once_the_body_passes_max_body_bytes(self):
+        # No Content-Length, so the size is only known while reading
+        self.responses = [(200, {}, [b"x" * 64] * 4)]
+        fetcher = self.fetcher(max_body_bytes=100)
+
+        self.assertEqual(fetcher.fetch(self.server.url("/doc")).status_code, 413)
+        self.assertEqual(asyncio.run(fetcher.afetch(self.server.url("/doc"))).status_code, 413)
+        # The partial body is deleted
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+        self.responses = [(200, {}, [b"x" * 50] * 2)]
+        self.assertEqual(fetcher.fetch(self.server.url("/doc")).content, b"x" * 100)
+
+    def test_no_store_and_private_responses_are_not_reused(self):
+        for cache_control in ("no-store", "max-age=60, private", 'private="Set-Cookie"'):
+            with self.subTest(cache_control):
+                self.server.requests.clear()
+                self.responses = [(200, {"Cache-Control": cache_control, "ETag": '"v1"'}, b"body")]
+                fetcher = self.fetcher(fresh_seconds=60)
+
+                for _ in range(2):
+                    result = fetcher.fetch(self.server.url(f"/{len(cache_control)}"))
+                    self.assertFalse(result.from_cache)
+                    self.assertEqual(result.content, b"body")
+                self.assertEqual(len(self.server.requests), 2)
+                self.assertNotIn("If-None-Match", self.server.requests[1].headers)
+
+    def test_no_store_response_drops_the_cached_entry(self):
+        self.responses = [(200, {"ETag": '"v1"'}, b"old"), (200, {"Cache-Control": "no-store"}, b"new"),
+                          (200, {}, b"newer")]
+        fetcher = self.fetcher(fresh_seconds=0)
+        url = self.server.url("/doc")
+
+        fetcher.fetch(url)
+        self.assertEqual(fetcher.fetch(url).content, b"new")
+        self.assertEqual(fetcher.fetch(url).content, b"newer")
+
+        self.assertEqual(self.server.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertNotIn("If-None-Match", self.server.requests[2].headers)
+
+
+class SourceFetchErrorTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        fetcher = Fetcher(cache_dir, retries=1, backoff=0)
+        self.enterContext(mock.patch.object(extraction_agent, "fetcher", fetcher))
+        self.enterContext(result_cache.bypass())
+
+    def extract(self, url):
+        with self.assertRaises(IngestError) as raised:
+            PdfUrlSource(url).extract()
+        return raised.exception
+
+    def test_origin_errors_are_ingest_errors(self):
+        with StubServer(lambda request: (503, {}, b"")) as server:
+            error = self.extract(server.url("/paper.pdf"))
+        self.assertEqual((error.status_code, error.message), (400, "Could not extract text from URL"))
+
+    def test_unreachable_origin_is_a_502(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        error = self.extract(f"http://127.0.0.1:{port}/paper.pdf")
+        self.assertEqual(error.status_code, 502)
+
+    def test_unreachable_doi_resolver_is_a_502(self):
+        fetch = self.enterContext(mock.patch.object(
+            extraction_agent.fetcher, "fetch", side_effect=requests.ConnectionError("refused")))
+
+        with self.assertRaises(IngestError) as raised:
+            DoiSource("10.1000/xyz").extract()
+
+        self.assertEqual(raised.exception.status_code, 502)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_doi_resolving_to_a_broken_pdf_tries_the_next_resolver(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "body")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4 truncated")
+        fetch = self.enterContext(mock.patch.object(extraction_agent.fetcher, "fetch", return_value=FetchResult(
+            "https://doi.org/10.1000/xyz", 200, {"Content-Type": "application/pdf"}, path)))
+
+        with self.assertRaises(IngestError) as raised:
+            DoiSource("10.1000/xyz").extract()
+
+        self.assertEqual((raised.exception.status_code, raised.exception.message),
+                         (400, "Could not extract text from DOI"))
+        self.assertEqual([call.args[0] for call in fetch.call_args_list],
+                         ["https://doi.org/10.1000/xyz", "http://dx.doi.org/10.1000/xyz"])
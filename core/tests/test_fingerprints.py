@@ -0,0 +1,42 @@
+from django.test import SimpleTestCase
+
+from core.fingerprints import arxiv_id, fingerprint, normalize_doi, normalize_url
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_arxiv_sources_share_a_fingerprint(self):
+        expected = fingerprint(arxiv="2401.01234")
+        for kwargs in (
+            {"arxiv": "2401.01234v3"},
+            {"doi": "10.48550/arXiv.2401.01234"},
+            {"doi": "https://doi.org/10.48550/arxiv.2401.01234"},
+            {"url": "https://arxiv.org/abs/2401.01234v2"},
+            {"url": "http://arxiv.org/pdf/2401.01234v1.pdf"},
+        ):
+            with self.subTest(**kwargs):
+                self.assertEqual(fingerprint(**kwargs), expected)
+
+    def test_arxiv_id_wins_over_doi_and_url(self):
+        self.assertEqual(fingerprint(arxiv="2401.01234", doi="10.1000/other", url="https://example.org/x"),
+                         fingerprint(arxiv="2401.01234"))
+        self.assertEqual(fingerprint(doi="10.1000/X", url="https://example.org/x"), fingerprint(doi="10.1000/x"))
+
+    def test_doi_normalization(self):
+        self.assertEqual(normalize_doi(" doi:10.1000/ABC "), "10.1000/abc")
+        self.assertEqual(normalize_doi("https://dx.doi.org/10.1000/abc"), "10.1000/abc")
+        self.assertIsNone(arxiv_id(doi="10.1000/abc"))
+
+    def test_url_normalization(self):
+        self.assertEqual(normalize_url("HTTPS://Example.org:443/paper/#abstract"), "https://example.org/paper")
+        self.assertEqual(normalize_url("http://example.org:80"), "http://example.org/")
+        self.assertEqual(normalize_url("https://example.org/paper?id=1"), "https://example.org/paper?id=1")
+        self.assertNotEqual(fingerprint(url="https://example.org/paper?id=1"),
+                            fingerprint(url="https://example.org/paper?id=2"))
+
+    def test_text_fingerprint_ignores_case_and_whitespace(self):
+        self.assertEqual(fingerprint(text="Deep  Learning\nfor Qubits"), fingerprint(text="deep learning for qubits"))
+        self.assertNotEqual(fingerprint(text="deep learning"), fingerprint(url="deep learning"))
+
+    def test_nothing_to_fingerprint(self):
+        self.assertIsNone(fingerprint())
+        self.assertIsNone(fingerprint(text=""))
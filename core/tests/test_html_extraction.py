@@ -0,0 +1,122 @@
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import benchmarks
+from core.agents import extraction_agent, html_extraction_agent
+from core.agents.fetcher import Fetcher
+from core.agents.html_extraction_agent import HtmlExtractionAgent
+from core.agents.result_cache import ResultCache
+from core.pipeline import AcademicPageSource
+
+from .stub_server import StubServer
+
+
+def sentence(word, count=12):
+    return " ".join([word] * count) + "."
+
+
+def article(paragraphs, head="", extra=""):
+    body = "".join(f"<p>{text}</p>" for text in paragraphs)
+    return f"<html><head>{head}</head><body><article>{body}</article>{extra}</body></html>"
+
+
+class HtmlExtractionAgentTests(SimpleTestCase):
+    def extract(self, page, max_bytes=1 << 20, charset=None):
+        return HtmlExtractionAgent(max_bytes).extract(page, "https://example.org/papers/1", charset)
+
+    def test_citation_metadata(self):
+        head = ('<title>Example Journal | Qubits</title>'
+                '<meta name="citation_title" content="  Error   correction for qubits ">'
+                '<meta name="citation_doi" content="https://doi.org/10.1000/ABC">'
+                '<meta name="citation_pdf_url" content="/papers/1.pdf">'
+                '<meta name="citation_title" content="A second title">')
+        page = self.extract(article([sentence("qubit")], head))
+
+        self.assertEqual(page["title"], "Error correction for qubits")
+        self.assertEqual(page["doi"], "10.1000/ABC")
+        self.assertEqual(page["pdf_url"], "https://example.org/papers/1.pdf")
+
+    def test_title_falls_back_to_the_title_tag(self):
+        page = self.extract(article([sentence("qubit")], "<title> Qubits </title>"))
+
+        self.assertEqual(page["title"], "Qubits")
+        self.assertIsNone(page["doi"])
+        self.assertIsNone(page["pdf_url"])
+
+    def test_boilerplate_is_stripped(self):
+        extra = (f"<script>var tracking = '{sentence('script')}';</script>"
+                 f"<nav><p>{sentence('menu')}</p></nav><footer><p>{sentence('copyright')}</p></footer>")
+        page = self.extract(article([sentence("qubit")], extra=extra))
+
+        self.assertIn("qubit", page["text"])
+        for word in ("script", "menu", "copyright"):
+            self.assertNotIn(word, page["text"])
+
+    def test_keeps_the_paragraphs_of_the_main_content(self):
+        # Over MIN_PARAGRAPH_CHARS, so no block fallback
+        paragraphs = [sentence(word, 30) for word in ("alpha", "beta", "gamma", "delta", "epsilon", "zeta")]
+        sidebar = f"<div><p>{sentence('related')}</p></div>"
+        page = self.extract(article(paragraphs, extra=sidebar))
+
+        self.assertEqual(page["text"], " ".join(paragraphs))
+
+    def test_short_pages_fall_back_to_blocks_counted_once(self):
+        page = self.extract(f"<html><body><div>{sentence('outer')}<div>{sentence('inner')}"
+                            f"<span>{sentence('span')}</span></div>{sentence('tail')}</div></body></html>")
+
+        for word in ("outer", "inner", "span", "tail"):
+            self.assertEqual(page["text"].count(word), 12, word)
+
+    def test_only_max_bytes_are_parsed(self):
+        data = article([sentence("early", 30), sentence("late", 30)]).encode()
+
+        page = self.extract(data, max_bytes=data.index(b"late"))
+
+        self.assertIn("early", page["text"])
+        self.assertNotIn("late", page["text"])
+
+    def test_charset_is_used_to_decode(self):
+        data = article([sentence("café")]).encode("iso-8859-1")
+
+        self.assertIn("café", self.extract(data, charset="iso-8859-1")["text"])
+        self.assertNotIn("café", self.extract(data, charset="utf-8")["text"])
+
+    def test_empty_page(self):
+        self.assertEqual(self.extract(b"  "), {"title": None, "doi": None, "pdf_url": None, "text": ""})
+
+
+class AcademicPageSourceTests(SimpleTestCase):
+    def setUp(self):
+        self.pdf_status = 200
+        self.paragraphs = [sentence(word, 30) for word in ("alpha", "beta", "gamma", "delta")]
+        self.server = self.enterContext(StubServer(self.respond))
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        fetcher = Fetcher(cache_dir, retries=0)
+        self.enterContext(mock.patch.object(html_extraction_agent, "fetcher", fetcher))
+        self.enterContext(mock.patch.object(extraction_agent, "fetcher", fetcher))
+        self.enterContext(mock.patch.object(extraction_agent, "result_cache", ResultCache(0, 0, enabled=False)))
+
+    def respond(self, request):
+        if request.path == "/paper.pdf":
+            body = benchmarks.make_pdf(1, seed=4, title="Linked paper") if self.pdf_status == 200 else b""
+            return self.pdf_status, {"Content-Type": "application/pdf"}, body
+        head = ('<meta name="citation_title" content="Landing title">'
+                '<meta name="citation_doi" content="10.1000/xyz">'
+                '<meta name="citation_pdf_url" content="/paper.pdf">')
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, article(self.paragraphs, head).encode()
+
+    def test_prefers_the_linked_pdf(self):
+        text, fields = AcademicPageSource(self.server.url("/abs/1")).extract()
+
+        self.assertIn("Linked paper 4", text)
+        self.assertEqual(fields, {"title": "Landing title", "source_url": self.server.url("/abs/1"),
+                                  "doi": "10.1000/xyz"})
+
+    def test_falls_back_to_the_page_text(self):
+        self.pdf_status = 404
+        text, fields = AcademicPageSource(self.server.url("/abs/1")).extract()
+
+        self.assertEqual(text, " ".join(self.paragraphs))
+        self.assertEqual(fields["title"], "Landing title")
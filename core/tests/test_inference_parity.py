@@ -0,0 +1,91 @@
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from core import benchmarks
+from core.agents.paper_search_agent import PaperSearchAgent
+from core.agents.summary_agent import SummaryAgent
+from core.management.commands import check_inference_parity
+from core.management.commands.check_inference_parity import token_f1
+
+from .fakes import FakeClassifier, FakeSummarizer, fake_models
+
+
+def installed(*modules):
+    return all(find_spec(module) for module in modules)
+
+
+class ShiftedSummarizer(FakeSummarizer):
+    """A backend whose summaries drop the first ``shift`` words."""
+
+    def __init__(self, shift):
+        super().__init__()
+        self.shift = shift
+
+    def output(self, text, **kwargs):
+        return {"summary_text": " ".join(text.split()[self.shift:self.shift + 20])}
+
+
+class ParityTestCase(SimpleTestCase):
+    def setUp(self):
+        abstracts = [{"summary": text} for text in benchmarks.abstracts(4)]
+        self.enterContext(mock.patch.object(PaperSearchAgent, "search_arxiv", return_value=abstracts))
+
+    def check(self, *args):
+        out = StringIO()
+        call_command("check_inference_parity", *args, stdout=out)
+        return out.getvalue()
+
+
+class CheckInferenceParityTests(ParityTestCase):
+    def setUp(self):
+        super().setUp()
+        self.summarizers = {"torch": FakeSummarizer(), "torch-int8": FakeSummarizer()}
+        self.enterContext(mock.patch.object(check_inference_parity, "load_pipeline", self.load_pipeline))
+
+    def load_pipeline(self, task, name, backend):
+        return self.summarizers[backend] if task == "summarization" else FakeClassifier()
+
+    def test_matching_backends_pass(self):
+        output = self.check("--papers", "4")
+
+        self.assertIn("torch-int8 vs torch: mean summary F1 1.000, top-topic agreement 1.00", output)
+
+    def test_drifting_backend_fails(self):
+        self.summarizers["torch-int8"] = ShiftedSummarizer(15)
+
+        with self.assertRaisesMessage(CommandError, "outside tolerance"):
+            self.check("--papers", "4")
+        # A looser bound accepts the same drift
+        self.check("--papers", "4", "--min-summary-f1", "0.2")
+
+    def test_token_f1(self):
+        self.assertEqual(token_f1("a b c d", "A B C D"), 1.0)
+        self.assertEqual(token_f1("a b", "c d"), 0.0)
+        self.assertAlmostEqual(token_f1("a b c d", "a b"), 2 / 3)
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_summary_cache_key_depends_on_the_backend(self):
+        fake_models(self)
+        keys = set()
+        for backend in ("torch", "torch-int8", "onnx"):
+            with override_settings(INFERENCE_BACKEND=backend):
+                keys.add(SummaryAgent().cache_key("Qubits are fragile."))
+
+        self.assertEqual(len(keys), 3)
+
+
+class BackendParityTests(ParityTestCase):
+    """Runs the real models, so only where the backend is installed."""
+
+    @skipUnless(installed("torch", "transformers"), "needs torch and transformers")
+    def test_torch_int8(self):
+        self.check("--backend", "torch-int8", "--papers", "4")
+
+    @skipUnless(installed("torch", "transformers", "optimum", "onnxruntime"), "needs optimum[onnxruntime]")
+    def test_onnx(self):
+        self.check("--backend", "onnx", "--papers", "4")
@@ -0,0 +1,82 @@
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+
+class JobLeaseTests(TestCase):
+    def running_job(self, lease, attempts=1):
+        return Job.objects.create(kind="doi", payload={"doi": "10.1000/x"}, status=Job.RUNNING,
+                                  started_at=timezone.now(), lease_expires_at=lease, attempts=attempts)
+
+    def test_claim_takes_a_lease(self):
+        job = Job.objects.create(kind="doi", payload={"doi": "10.1000/x"})
+
+        claimed = jobs.claim_next_job()
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertGreater(claimed.lease_expires_at, timezone.now())
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_live_lease_is_left_alone(self):
+        job = self.running_job(timezone.now() + timedelta(minutes=1))
+
+        self.assertIsNone(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_expired_lease_is_claimed_again(self):
+        for lease in (timezone.now() - timedelta(seconds=1), None):
+            with self.subTest(lease=lease):
+                job = self.running_job(lease)
+
+                claimed = jobs.claim_next_job()
+
+                self.assertEqual(claimed.pk, job.pk)
+                self.assertEqual(claimed.attempts, 2)
+                self.assertEqual(claimed.stages, {})
+                claimed.delete()
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_job_out_of_attempts_fails(self):
+        job = self.running_job(timezone.now() - timedelta(seconds=1), attempts=2)
+
+        self.assertIsNone(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+
+class StagedUploadTests(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def staged_files(self):
+        return default_storage.listdir("jobs")[1] if default_storage.exists("jobs") else []
+
+    def test_failed_upload_job_deletes_its_file(self):
+        payload = jobs.stage_upload(SimpleUploadedFile("paper.pdf", b"not a pdf"))
+        job = Job.objects.create(kind="upload", payload=payload, status=Job.RUNNING)
+
+        with self.assertLogs("core.jobs", "ERROR"):
+            jobs.run_job(job)
+
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(self.staged_files(), [])
+
+    @override_settings(JOB_QUEUE_MAX_PENDING=0)
+    def test_rejected_upload_is_not_staged(self):
+        response = self.client.post("/api/upload/?async=1", {"file": SimpleUploadedFile("paper.pdf", b"%PDF-1.4")})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.staged_files(), [])
+        self.assertFalse(os.listdir(default_storage.location))
@@ -0,0 +1,131 @@
+import asyncio
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import metrics
+from core.agents import result_cache
+from core.agents.result_cache import ResultCache
+
+
+class MetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.object(metrics, "metrics", metrics._Metrics()))
+        self.cache = ResultCache(0, 0, enabled=False)
+        self.enterContext(mock.patch.object(result_cache, "result_cache", self.cache))
+
+
+@override_settings(METRICS_ENABLED=True)
+class RenderTests(MetricsTestCase):
+    def test_histograms_and_counters(self):
+        metrics.record("extract", 0.02)
+        metrics.record("extract", 3)
+        metrics.count("pages_extracted", 4)
+        self.cache.counters["summary.memory_hits"] += 2
+
+        text = metrics.render()
+
+        self.assertTrue(text.endswith("\n"))
+        lines = text.splitlines()
+        for line in (
+            "# HELP summarizer_stage_seconds Time spent in each pipeline stage",
+            "# TYPE summarizer_stage_seconds histogram",
+            'summarizer_stage_seconds_bucket{stage="extract",le="0.01"} 0',
+            'summarizer_stage_seconds_bucket{stage="extract",le="0.025"} 1',
+            'summarizer_stage_seconds_bucket{stage="extract",le="5"} 2',
+            'summarizer_stage_seconds_bucket{stage="extract",le="+Inf"} 2',
+            'summarizer_stage_seconds_sum{stage="extract"} 3.020000',
+            'summarizer_stage_seconds_count{stage="extract"} 2',
+            "# TYPE summarizer_pages_extracted_total counter",
+            "summarizer_pages_extracted_total 4",
+            'summarizer_result_cache_events_total{event="memory_hits",kind="summary"} 2',
+            "# TYPE process_resident_memory_bytes gauge",
+        ):
+            self.assertIn(line, lines)
+        # Every sample line is "<name>{labels} <number>"
+        for line in lines:
+            if not line.startswith("#"):
+                float(line.rsplit(" ", 1)[1])
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/ready/")
+        response = self.client.get("/api/metrics/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('summarizer_http_request_seconds_count{method="GET",status="200",view="readiness"} 1',
+                      response.content.decode().splitlines())
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_endpoint_is_off_by_default(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+
+
+class TimingMiddlewareTests(MetricsTestCase):
+    def view(self, request):
+        with metrics.timer("extract"):
+            pass
+        with metrics.timer("summarize"):
+            pass
+        return HttpResponse()
+
+    def call(self, view=None):
+        return metrics.TimingMiddleware(view or self.view)(RequestFactory().get("/api/papers/"))
+
+    def stages(self, response):
+        return [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_server_timing_lists_the_stages_and_the_total(self):
+        response = self.call()
+
+        self.assertEqual(self.stages(response), ["extract", "summarize", "total"])
+        self.assertRegex(response["Server-Timing"], r"^extract;dur=\d+\.\d, ")
+        # Server-Timing alone doesn't collect metrics
+        self.assertEqual(self.metrics_recorded(), ({}, {}))
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_stages_a_view_timed_itself_are_kept(self):
+        def view(request):
+            with metrics.timer("classify"):
+                response = HttpResponse()
+            response["Server-Timing"] = "classify;dur=5.0"
+            return response
+
+        response = self.call(view)
+
+        self.assertEqual(response["Server-Timing"].split(", ")[0], "classify;dur=5.0")
+        self.assertEqual(self.stages(response), ["classify", "total"])
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_async_views(self):
+        async def view(request):
+            return self.view(request)
+
+        response = asyncio.run(self.call(view))
+
+        self.assertEqual(self.stages(response), ["extract", "summarize", "total"])
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_metrics_without_server_timing(self):
+        response = self.call()
+
+        self.assertNotIn("Server-Timing", response)
+        histograms, _ = self.metrics_recorded()
+        self.assertEqual(sorted(histograms), ["http_request_seconds", "stage_seconds"])
+
+    def test_off_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            self.call()
+
+        # Outside a timed request the shared no-op timer is handed out and nothing is recorded
+        self.assertIs(metrics.timer("extract"), metrics.timer("summarize"))
+        with metrics.timer("extract"):
+            pass
+        metrics.count("pages_extracted")
+        self.assertEqual(self.metrics_recorded(), ({}, {}))
+
+    def metrics_recorded(self):
+        return dict(metrics.metrics.histograms), dict(metrics.metrics.counters)
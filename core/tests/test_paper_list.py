@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timezone
+
+from django.test import TestCase
+
+from core.models import ResearchPaper
+
+
+class PaperListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            ResearchPaper.objects.create(title=f"Paper {i}", topic="Finance" if i % 2 else "Healthcare")
+        # Three papers share a timestamp, so the cursor has to break ties on id
+        ResearchPaper.objects.filter(title__in=["Paper 2", "Paper 3", "Paper 4"]).update(
+            uploaded_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    def walk(self, url):
+        titles, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            titles += [paper["title"] for paper in data["results"]]
+            url, pages = data["next"], pages + 1
+        return titles, pages
+
+    def test_cursor_pages_cover_every_paper_once(self):
+        titles, pages = self.walk("/api/papers/?page_size=2")
+
+        expected = list(ResearchPaper.objects.order_by("-uploaded_at", "-id").values_list("title", flat=True))
+        self.assertEqual(titles, expected)
+        self.assertEqual(pages, 4)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get("/api/papers/?page_size=3").json()
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+
+        self.assertEqual(back["results"], first["results"])
+
+    def test_topic_filter(self):
+        titles, _ = self.walk("/api/papers/?topic=Finance&page_size=2")
+
+        self.assertEqual(sorted(titles), ["Paper 1", "Paper 3", "Paper 5"])
+
+    def test_date_filters(self):
+        titles, _ = self.walk("/api/papers/?until=2024-01-02")
+        self.assertEqual(sorted(titles), ["Paper 2", "Paper 3", "Paper 4"])
+
+        response = self.client.get("/api/papers/?since=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+    def test_sparse_fields(self):
+        paper = self.client.get("/api/papers/?fields=title,topic&page_size=1").json()["results"][0]
+        self.assertEqual(set(paper), {"title", "topic"})
+
+        response = self.client.get("/api/papers/?fields=title,secret")
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_streams_every_paper(self):
+        response = self.client.get("/api/papers/?export=1&fields=title")
+
+        papers = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(papers), 7)
+        self.assertEqual(papers[0], {"title": "Paper 6"})
@@ -0,0 +1,92 @@
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.agents import paper_search_agent
+from core.agents.fetcher import Fetcher
+from core.agents.paper_search_agent import PaperSearchAgent
+from core.pipeline import IngestError
+
+from .fakes import ArxivFeed
+from .stub_server import StubServer
+
+
+class PaperSearchAgentTests(SimpleTestCase):
+    def setUp(self):
+        self.feed = ArxivFeed()
+        self.server = self.enterContext(StubServer(self.feed))
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        # Nothing fresh in the fetch cache, so only the query cache can skip a request
+        fetcher = Fetcher(cache_dir, fresh_seconds=0, retries=0)
+        self.enterContext(mock.patch.object(paper_search_agent, "fetcher", fetcher))
+        self.enterContext(mock.patch.dict(paper_search_agent._query_cache, clear=True))
+
+    def agent(self, **kwargs):
+        return PaperSearchAgent(base_url=self.server.url("/api/query"), **kwargs)
+
+    def pages(self):
+        return [(int(r.query["start"][0]), int(r.query["max_results"][0])) for r in self.server.requests]
+
+    def test_pages_cover_max_results(self):
+        papers = self.agent(page_size=2).search_arxiv("qubits", max_results=5)
+
+        self.assertEqual(len(papers), 5)
+        self.assertEqual(self.pages(), [(0, 2), (2, 2), (4, 1)])
+        self.assertEqual(len({paper["arxiv_id"] for paper in papers}), 5)
+
+    def test_stops_after_a_short_page(self):
+        self.feed.total = 3
+        papers = self.agent(page_size=2).search_arxiv("qubits", max_results=10)
+
+        self.assertEqual(len(papers), 3)
+        self.assertEqual(self.pages(), [(0, 2), (2, 2)])
+
+    def test_prefetches_the_next_page(self):
+        entries = self.agent(page_size=2).iter_arxiv("qubits", max_results=4)
+        next(entries)
+        deadline = time.monotonic() + 5
+        while len(self.server.requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.pages(), [(0, 2), (2, 2)])
+        entries.close()
+
+    def test_query_is_url_encoded(self):
+        query = "error correction & más"
+        self.agent().search_arxiv(query, max_results=1)
+
+        self.assertEqual(self.server.requests[0].query["search_query"], [f"all:{query}"])
+
+    def test_entry_fields(self):
+        paper = self.agent().search_arxiv("qubits", max_results=1)[0]
+
+        arxiv_id = paper["arxiv_id"]
+        self.assertRegex(arxiv_id, r"^\d+\.00000$")  # version suffix stripped
+        self.assertEqual(paper["title"], "Stub paper 0 on qubits")
+        self.assertEqual(paper["link"], f"http://arxiv.org/abs/{arxiv_id}v1")
+        self.assertEqual(paper["pdf_url"], f"http://arxiv.org/pdf/small-{arxiv_id}v1")
+        self.assertEqual(paper["authors"], ["Author 0"])
+        self.assertEqual(paper["categories"], ["cs.LG"])
+        self.assertIsNone(paper["doi"])
+        self.assertTrue(paper["summary"])
+
+    def test_query_cache_expires(self):
+        agent = self.agent(cache_seconds=60)
+        agent.search_arxiv("qubits", max_results=2)
+        agent.search_arxiv("qubits", max_results=2)
+        self.assertEqual(len(self.server.requests), 1)
+
+        later = time.monotonic() + 61
+        with mock.patch.object(paper_search_agent.time, "monotonic", return_value=later):
+            agent.search_arxiv("qubits", max_results=2)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_outage_raises_and_is_not_cached(self):
+        self.feed.status = 503
+        with self.assertRaises(IngestError) as raised:
+            self.agent().search_arxiv("qubits", max_results=2)
+        self.assertEqual(raised.exception.status_code, 502)
+
+        self.feed.status = 200
+        self.assertEqual(len(self.agent().search_arxiv("qubits", max_results=2)), 2)
@@ -0,0 +1,51 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import views
+from core.agents.model_registry import ModelRegistry
+
+
+class ReadinessTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.enterContext(mock.patch.object(views, "registry", self.registry))
+        self.loading = threading.Event()
+        self.addCleanup(self.loading.set)
+        self.registry.register("slow", lambda: self.loading.wait(5) and object())
+
+    def ready(self):
+        response = self.client.get("/api/ready/")
+        return response.status_code, response.json()
+
+    def test_without_warmup_it_is_ready(self):
+        status, body = self.ready()
+        self.assertEqual(status, 200)
+        self.assertEqual(body["warming"], [])
+
+    def test_not_ready_while_warmup_runs(self):
+        self.registry.start_warmup(["slow"])
+
+        status, body = self.ready()
+        self.assertEqual(status, 503)
+        self.assertEqual((body["models"], body["warming"]), (["slow"], ["slow"]))
+
+        self.loading.set()
+        self.registry.wait_warmup()
+        status, body = self.ready()
+        self.assertEqual(status, 200)
+        self.assertEqual(body["warming"], [])
+
+    def test_failed_warmup_stays_unready(self):
+        def fail():
+            raise OSError("weights missing")
+
+        self.registry.register("broken", fail)
+        with self.assertLogs("core.agents.model_registry", "ERROR"):
+            self.registry.start_warmup(["broken"])
+            self.registry.wait_warmup()
+
+        status, body = self.ready()
+        self.assertEqual(status, 503)
+        self.assertEqual((body["warming"], body["error"]), (["broken"], "weights missing"))
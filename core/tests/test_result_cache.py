@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.agents.result_cache import ResultCache
+from core.models import CachedResult
+
+VALUE = "x" * 8  # 10 bytes serialized
+
+
+class ResultCacheTests(TestCase):
+    def cache(self, memory_bytes=1 << 20, max_bytes=1 << 20):
+        return ResultCache(memory_bytes, max_bytes)
+
+    def age(self, key, hours):
+        CachedResult.objects.filter(key=key).update(last_accessed_at=timezone.now() - timedelta(hours=hours))
+
+    def stored(self):
+        return set(CachedResult.objects.values_list("key", flat=True))
+
+    def test_memory_tier_evicts_least_recently_used_by_size(self):
+        cache = self.cache(memory_bytes=25)
+        cache.set("kind", "a", VALUE)
+        cache.set("kind", "b", VALUE)
+        cache.get("kind", "a")
+        cache.set("kind", "c", VALUE)
+
+        self.assertEqual(list(cache._memory), ["a", "c"])
+        self.assertEqual(cache.stats()["memory_bytes"], 20)
+        # Evicted from memory only; the table still has it
+        self.assertEqual(cache.get("kind", "b"), VALUE)
+        self.assertEqual(cache.counters["kind.db_hits"], 1)
+
+    def test_values_larger_than_the_memory_tier_are_only_stored_in_the_table(self):
+        cache = self.cache(memory_bytes=25)
+        cache.set("kind", "big", "x" * 100)
+
+        self.assertEqual(cache.stats()["memory_entries"], 0)
+        self.assertEqual(self.stored(), {"big"})
+
+    def test_evict_drops_least_recently_accessed_rows(self):
+        cache = self.cache(max_bytes=25)
+        for key, hours in (("a", 3), ("b", 1), ("c", 2)):
+            cache.set("kind", key, VALUE)
+            self.age(key, hours)
+        # A hit from the table counts as an access
+        self.assertEqual(self.cache().get("kind", "a"), VALUE)
+
+        self.assertEqual(cache.evict(), 1)
+
+        self.assertEqual(self.stored(), {"a", "b"})
+        self.assertNotIn("c", cache._memory)
+        self.assertEqual(cache.evict(), 0)
+
+    def test_evict_runs_every_evict_every_writes(self):
+        cache = self.cache(max_bytes=25)
+        cache.EVICT_EVERY = 3
+        for key in ("a", "b"):
+            cache.set("kind", key, VALUE)
+            self.age(key, 1)
+        self.assertEqual(self.stored(), {"a", "b"})
+
+        cache.set("kind", "c", VALUE)
+
+        self.assertEqual(len(self.stored()), 2)
+        self.assertIn("c", self.stored())
+
+    def test_counters(self):
+        cache = self.cache()
+        self.assertIsNone(cache.get("summary", "key"))
+        cache.set("summary", "key", VALUE)
+        cache.get("summary", "key")
+        self.cache().set("summary", "other", VALUE)
+        cache.get("summary", "other")
+        cache.get("summary", "other", validate=lambda value: False)
+
+        self.assertEqual(dict(cache.counters), {"summary.misses": 2, "summary.memory_hits": 1, "summary.db_hits": 1})
+
+    def test_bypass(self):
+        cache = self.cache()
+        cache.set("kind", "a", VALUE)
+
+        with cache.bypass():
+            self.assertIsNone(cache.get("kind", "a"))
+            cache.set("kind", "b", VALUE)
+            self.assertEqual(cache.get_or_compute("kind", "a", lambda: "fresh"), "fresh")
+
+        self.assertEqual(self.stored(), {"a"})
+        self.assertEqual(cache.get("kind", "a"), VALUE)
+        self.assertEqual(dict(cache.counters), {"kind.memory_hits": 1})
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = ResultCache(1 << 20, 1 << 20, enabled=False)
+        self.assertEqual(cache.get_or_compute("kind", "a", lambda: VALUE), VALUE)
+
+        self.assertEqual(self.stored(), set())
+        self.assertIsNone(cache.get("kind", "a"))
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from core.models import PaperEmbedding, ResearchPaper
+from core.pipeline.store import update_paper
+from core.search import EmbeddingIndex, to_blob
+
+
+class EmbeddingIndexTests(TestCase):
+    def setUp(self):
+        self.index = EmbeddingIndex()
+
+    def paper(self, title, topic, vector):
+        paper = ResearchPaper.objects.create(title=title, topic=topic)
+        PaperEmbedding.objects.create(paper=paper, model_name="test", vector=to_blob(vector))
+        return paper
+
+    def ids(self, vector, **kwargs):
+        return [paper_id for paper_id, _ in self.index.query(vector, **kwargs)]
+
+    def test_best_match_first(self):
+        near, far = self.paper("Near", "Physics", [1, 0]), self.paper("Far", "Physics", [0, 1])
+
+        self.assertEqual(self.ids([0.9, 0.1], k=2), [near.pk, far.pk])
+        self.assertEqual(self.ids([0.9, 0.1], k=2, exclude=near.pk), [far.pk])
+
+    def test_new_vectors_are_picked_up(self):
+        first = self.paper("First", "Physics", [1, 0])
+        self.assertEqual(self.ids([1, 0]), [first.pk])
+
+        second = self.paper("Second", "Physics", [0, 1])
+        self.assertEqual(self.ids([0, 1], k=1), [second.pk])
+
+    def test_topic_filter_follows_topic_changes(self):
+        physics, biology = self.paper("Qubits", "Physics", [1, 0]), self.paper("Cells", "Biology", [0.8, 0.2])
+        self.assertEqual(self.ids([1, 0], topic="Physics"), [physics.pk])
+
+        # A later ingest fills in the topic without touching the vector
+        update_paper(biology, topic="Physics")
+
+        self.assertEqual(self.ids([1, 0], topic="Physics"), [physics.pk, biology.pk])
+        self.assertEqual(self.ids([1, 0], topic="Biology"), [])
+
+
+class SearchLimitTests(TestCase):
+    def test_limit_is_validated(self):
+        paper = ResearchPaper.objects.create(title="Qubits", topic="Physics", summary="Qubits are fragile.")
+        urls = ("/api/papers/search/?q=qubits", f"/api/papers/{paper.pk}/related/?",
+                "/api/synthesize/?topic=Physics&q=qubits")
+        for url in urls:
+            for value in ("0", "-1", "abc", "101"):
+                with self.subTest(url=url, limit=value):
+                    response = self.client.get(f"{url}&limit={value}")
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("limit", response.json()["error"])
+
+    def test_valid_limit(self):
+        paper = ResearchPaper.objects.create(title="Qubits", topic="Physics", summary="Qubits are fragile.")
+        response = self.client.get("/api/papers/search/?q=qubits&mode=text&limit=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["id"] for result in response.json()["results"]], [paper.pk])
@@ -0,0 +1,72 @@
+import tempfile
+import uuid
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from core.agents import paper_search_agent
+from core.agents.fetcher import fetcher
+from core.models import ResearchPaper
+
+from .fakes import ArxivFeed, fake_models
+from .stub_server import StubServer
+
+
+class SearchViewTests(TransactionTestCase):
+    def setUp(self):
+        self.feed = ArxivFeed()
+        self.server = self.enterContext(StubServer(self.feed))
+        self.enterContext(override_settings(ARXIV_API_URL=self.server.url("/api/query"),
+                                            PIPELINE_STAGES=["classify", "summarize"]))
+        self.enterContext(mock.patch.object(fetcher, "cache_dir", self.enterContext(tempfile.TemporaryDirectory())))
+        self.enterContext(mock.patch.dict(paper_search_agent._query_cache, clear=True))
+        self.models = fake_models(self)
+        # A query of its own per test, so no result cached by another test is reused
+        self.topic = f"qubits {uuid.uuid4().hex}"
+
+    def test_search_classifies_and_stores(self):
+        for url in ("/api/search/", "/api/async/search/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"topic": self.topic, "max_results": 3})
+
+                self.assertEqual(response.status_code, 200)
+                papers = response.json()
+                self.assertEqual([paper["title"] for paper in papers],
+                                 [f"Stub paper {i} on {self.topic}" for i in range(3)])
+                self.assertTrue(all(paper["topic"] and paper["summary"] for paper in papers))
+        self.assertEqual(ResearchPaper.objects.count(), 3)
+
+    def test_max_results_is_validated(self):
+        for url in ("/api/search/", "/api/async/search/"):
+            for value in ("0", "-3", "51", "many"):
+                with self.subTest(url=url, max_results=value):
+                    response = self.client.get(url, {"topic": self.topic, "max_results": value})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("max_results", response.json()["error"])
+        self.assertEqual(self.server.requests, [])
+
+    def test_async_search_runs_models_on_the_model_pool(self):
+        response = self.client.get("/api/async/search/", {"topic": self.topic, "max_results": 4})
+
+        self.assertEqual(response.status_code, 200)
+        model_threads = self.models.classifier.threads + self.models.summarizer.threads
+        self.assertTrue(model_threads)
+        self.assertTrue(all(name.startswith("aio-model") for name in model_threads), model_threads)
+
+    def test_arxiv_error_is_a_502(self):
+        self.feed.status = 400  # not retried, unlike a 5xx
+        for url in ("/api/search/", "/api/async/search/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"topic": self.topic})
+                self.assertEqual(response.status_code, 502)
+                self.assertEqual(response.json()["error"], "arXiv search failed")
+
+    @override_settings(PIPELINE_STAGE_TIMEOUTS={"classify": 0.05})
+    def test_stage_timeout_is_a_504(self):
+        self.models.classifier.delay = 0.5
+        for url in ("/api/search/", "/api/async/search/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"topic": self.topic, "max_results": 2})
+                self.assertEqual(response.status_code, 504)
+                self.assertIn("classify stage timed out", response.json()["error"])
+        self.assertEqual(ResearchPaper.objects.count(), 0)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.agents.stage_pipeline import Stage, StagePipeline
+
+
+class StagePipelineTests(SimpleTestCase):
+    def test_every_item_passes_every_stage(self):
+        pipeline = StagePipeline([
+            Stage("double", lambda item: item * 2, workers=3),
+            Stage("inc", lambda items: [item + 1 for item in items], kind="compute", batch_size=4),
+        ])
+
+        results = list(pipeline.run(range(20)))
+
+        self.assertEqual(sorted(results), [i * 2 + 1 for i in range(20)])
+        self.assertEqual(pipeline.timings["double"]["items"], 20)
+        self.assertEqual(pipeline.timings["inc"]["items"], 20)
+        self.assertIn("double;dur=", pipeline.server_timing())
+
+    def test_compute_stage_batches_queued_items(self):
+        batches = []
+
+        def record(items):
+            batches.append(len(items))
+            return items
+
+        pipeline = StagePipeline([Stage("model", record, kind="compute", batch_size=8, batch_wait=1)])
+        self.assertEqual(len(list(pipeline.run(range(20)))), 20)
+
+        self.assertTrue(all(size <= 8 for size in batches))
+        self.assertEqual(sum(batches), 20)
+        self.assertLess(len(batches), 20)
+
+    def test_stages_overlap(self):
+        second_started = threading.Event()
+        overlapped = []
+
+        def slow_first(item):
+            if item == 1:
+                # Item 0 should reach the second stage while item 1 is still in the first
+                overlapped.append(second_started.wait(5))
+            return item
+
+        def second(item):
+            second_started.set()
+            return item
+
+        pipeline = StagePipeline([Stage("first", slow_first, workers=1), Stage("second", second, workers=1)])
+        self.assertEqual(list(pipeline.run(range(2))), [0, 1])
+        self.assertEqual(overlapped, [True])
+
+    def test_first_error_stops_the_run_and_is_raised(self):
+        processed = []
+
+        def fail_on_three(item):
+            if item == 3:
+                raise ValueError("bad item")
+            processed.append(item)
+            time.sleep(0.01)
+            return item
+
+        pipeline = StagePipeline([Stage("work", fail_on_three, workers=1)], queue_size=2)
+        with self.assertRaisesMessage(ValueError, "bad item"):
+            list(pipeline.run(range(1000)))
+        self.assertLess(len(processed), 1000)
+
+    def test_error_in_the_item_source_is_raised(self):
+        def items():
+            yield 1
+            raise RuntimeError("feed broke")
+
+        with self.assertRaisesMessage(RuntimeError, "feed broke"):
+            list(StagePipeline([Stage("noop", lambda item: item)]).run(items()))
+
+    def test_empty_input(self):
+        self.assertEqual(list(StagePipeline([Stage("noop", lambda item: item)]).run([])), [])
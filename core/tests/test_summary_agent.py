@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from core.agents import summary_agent
+from core.agents.result_cache import ResultCache
+from core.agents.summary_agent import SummaryAgent
+
+from .fakes import fake_models
+
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{number}" for number in range(count))
+
+
+class SummaryAgentTests(SimpleTestCase):
+    def setUp(self):
+        self.models = fake_models(self)
+        self.enterContext(mock.patch.object(summary_agent, "result_cache", ResultCache(0, 0, enabled=False)))
+        self.agent = SummaryAgent()
+
+    def stream(self, texts, **budget):
+        return list(self.agent.summarize_stream(texts, **budget))
+
+    def test_chunks_pack_short_texts_and_split_long_ones(self):
+        texts = [words("a", 4), "", words("b", 4), words("c", 25)]
+
+        chunks = list(self.agent.chunk(texts, window=10))
+
+        self.assertEqual([len(chunk.split()) for chunk in chunks], [10, 10, 10, 3])
+        self.assertEqual(" ".join(chunks), " ".join(text for text in texts if text))
+
+    def test_window_leaves_room_for_special_tokens(self):
+        self.assertEqual(self.agent.window_tokens(), 1016)
+        self.models.summarizer.tokenizer.model_max_length = 512
+        self.assertEqual(self.agent.window_tokens(), 504)
+
+    def test_reduces_until_one_chunk_is_left(self):
+        # Summaries are the first 20 words of a chunk, so each level shrinks the text by a third
+        with mock.patch.object(SummaryAgent, "window_tokens", return_value=30):
+            partials = self.stream([words("w", 120)])
+
+        final = partials[-1]
+        self.assertTrue(final["final"])
+        self.assertEqual([partial for partial in partials if partial.get("final")], [final])
+        self.assertEqual([partial["level"] for partial in partials], [0] * 4 + [1] * 3 + [2] * 2 + [3] * 2 + [4])
+        self.assertEqual(final["summary"], words("w", 20))
+
+    def test_single_chunk_is_summarized_once(self):
+        partials = self.stream([words("w", 40)])
+
+        self.assertEqual(partials, [{"level": 0, "final": True, "summary": words("w", 20)}])
+        self.assertEqual(self.stream([""]), [])
+
+    def test_max_chunks_reads_evenly_spaced_chunks(self):
+        texts = [words(f"chunk{number}-", 30) for number in range(10)]
+        with mock.patch.object(SummaryAgent, "window_tokens", return_value=30):
+            partials = self.stream(texts, max_chunks=4)
+
+        mapped = [partial["summary"].split()[0] for partial in partials if partial["level"] == 0]
+        self.assertEqual(mapped, ["chunk0-0", "chunk2-0", "chunk5-0", "chunk7-0"])
+
+    @override_settings(SUMMARY_MAX_CHUNKS=3)
+    def test_max_chunks_defaults_to_the_setting(self):
+        with mock.patch.object(SummaryAgent, "window_tokens", return_value=30):
+            partials = self.stream([words("w", 300)])
+
+        self.assertEqual(len([partial for partial in partials if partial["level"] == 0]), 3)
+
+    def test_mapping_stops_at_the_deadline(self):
+        self.models.summarizer.delay = 0.05
+        with mock.patch.object(SummaryAgent, "window_tokens", return_value=30):
+            partials = self.stream([words("w", 300)], budget_seconds=0.01, batch_size=2)
+
+        # The first batch always runs; the budget is spent by then
+        self.assertEqual(len([partial for partial in partials if partial["level"] == 0]), 2)
+        self.assertTrue(partials[-1]["final"])
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from core import jobs, synthesis
+from core.models import Job, ResearchPaper, TopicSynthesis
+
+
+class RecordingSummarizer:
+    """Stands in for SummaryAgent: the synthesis of some texts is the texts joined with "+"."""
+
+    calls = []
+
+    def summarize_stream(self, texts, budget_seconds=None):
+        texts = list(texts)
+        self.calls.append(texts)
+        yield {"final": True, "summary": "+".join(texts)}
+
+
+class SynthesisTests(TestCase):
+    def setUp(self):
+        RecordingSummarizer.calls = []
+        self.enterContext(mock.patch.object(synthesis, "SummaryAgent", RecordingSummarizer))
+        # Jobs are run by the test, not by background workers
+        self.enterContext(mock.patch.object(jobs, "worker_pool"))
+        self.papers = [self.paper(summary) for summary in ("a", "b")]
+
+    def paper(self, summary, topic="Physics"):
+        return ResearchPaper.objects.create(title=f"Paper {summary}", topic=topic, summary=summary)
+
+    def get(self, **headers):
+        return self.client.get("/api/synthesize/", {"topic": "Physics"}, headers=headers)
+
+    def run_jobs(self):
+        while job := jobs.claim_next_job():
+            jobs.run_job(job)
+
+    def pending_refreshes(self):
+        return Job.objects.filter(kind="synthesis", status=Job.PENDING).count()
+
+    def test_first_read_builds_the_synthesis(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["synthesized_summary"], data["paper_count"], data["stale"]), ("a+b", 2, False))
+        self.assertEqual(response["ETag"], f'"{TopicSynthesis.objects.get().etag}"')
+        self.assertEqual(self.get(**{"If-None-Match": response["ETag"]}).status_code, 304)
+
+    def test_no_summaries_is_a_404(self):
+        self.assertEqual(self.client.get("/api/synthesize/", {"topic": "Biology"}).status_code, 404)
+
+    def test_new_papers_are_folded_in_by_one_background_refresh(self):
+        etag = self.get()["ETag"]
+        self.paper("c")
+        self.paper("d")
+
+        for _ in range(2):
+            response = self.get(**{"If-None-Match": etag})
+            # The stored version is still the current one until the refresh has run
+            self.assertEqual(response.status_code, 304)
+        stale = self.get().json()
+        self.assertEqual((stale["synthesized_summary"], stale["stale"]), ("a+b", True))
+        self.assertEqual(self.pending_refreshes(), 1)
+
+        self.run_jobs()
+
+        # Only the new summaries are merged into the previous synthesis
+        self.assertEqual(RecordingSummarizer.calls[-1], ["a+b", "c", "d"])
+        response = self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        data = response.json()
+        self.assertEqual((data["synthesized_summary"], data["paper_count"], data["stale"]), ("a+b+c+d", 4, False))
+
+    def test_deleted_paper_forces_a_full_rebuild(self):
+        self.get()
+        self.papers[0].delete()
+        self.paper("c")
+
+        self.assertTrue(self.get().json()["stale"])
+        self.run_jobs()
+
+        self.assertEqual(RecordingSummarizer.calls[-1], ["b", "c"])
+        self.assertEqual(self.get().json()["synthesized_summary"], "b+c")
+
+    def test_saving_papers_schedules_refreshes_for_read_topics_only(self):
+        self.get()
+        synthesis.schedule_refreshes([self.paper("c"), self.paper("x", topic="Biology")])
+        synthesis.schedule_refreshes([self.paper("d")])
+
+        self.assertEqual(list(Job.objects.filter(kind="synthesis").values_list("payload__topic", flat=True)),
+                         ["Physics"])
+
+    def test_topic_with_no_summaries_left_is_removed(self):
+        self.get()
+        ResearchPaper.objects.all().delete()
+
+        self.assertIsNone(synthesis.refresh("Physics"))
+        self.assertFalse(TopicSynthesis.objects.exists())
@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from core.agents.audio_agent import OUTRO, AudioAgent
+from core.agents.tts import SILENT_FRAME, SilentEngine, concat_mp3, split_script, strip_tags
+
+
+def id3v2(payload, footer=False):
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    flags = 0x10 if footer else 0
+    return b"ID3" + bytes([4, 0, flags]) + syncsafe + payload + (b"3DI" + bytes(7) if footer else b"")
+
+
+def id3v1():
+    return b"TAG" + b"Title".ljust(125, b"\0")
+
+
+class SplitScriptTests(SimpleTestCase):
+    def test_packs_whole_sentences(self):
+        text = "One two. Three four five! Six? Seven eight nine ten."
+
+        self.assertEqual(split_script(text, max_chars=20), ["One two.", "Three four five!", "Six?", "Seven eight nine ten."])
+        self.assertEqual(split_script(text, max_chars=30), ["One two. Three four five! Six?", "Seven eight nine ten."])
+        self.assertEqual(split_script(text, max_chars=1000), [text])
+
+    def test_long_sentence_is_a_chunk_of_its_own(self):
+        long = "A sentence far longer than the limit allows."
+
+        self.assertEqual(split_script(f"Short. {long} Tail.", max_chars=10), ["Short.", long, "Tail."])
+
+    @override_settings(TTS_CHUNK_CHARS=10)
+    def test_default_limit_is_tts_chunk_chars(self):
+        self.assertEqual(split_script("First one. Second one."), ["First one.", "Second one."])
+
+    def test_empty_script(self):
+        self.assertEqual(split_script("  "), [])
+
+
+class ConcatMp3Tests(SimpleTestCase):
+    def test_tags_are_stripped(self):
+        frames = SILENT_FRAME * 3
+        for tagged in (id3v2(b"x" * 300) + frames, id3v2(b"x" * 20, footer=True) + frames,
+                       id3v2(b"a") + id3v2(b"b") + frames + id3v1(), frames):
+            with self.subTest(tagged[:10]):
+                self.assertEqual(strip_tags(tagged), frames)
+
+    def test_segments_are_joined_frame_to_frame(self):
+        first, second = SILENT_FRAME * 2, SILENT_FRAME * 5
+
+        data = concat_mp3([id3v2(b"x" * 50) + first + id3v1(), second, id3v2(b"y" * 10) + first])
+
+        self.assertEqual(data, SILENT_FRAME * 9)
+        # Every frame starts with an MPEG sync word, with no tag bytes in between
+        self.assertEqual(len(data) % len(SILENT_FRAME), 0)
+        self.assertEqual(data[::len(SILENT_FRAME)], b"\xff" * 9)
+
+
+class RecordingEngine(SilentEngine):
+    def __init__(self):
+        self.texts = []
+
+    def synthesize(self, text):
+        self.texts.append(text)
+        return super().synthesize(text)
+
+
+class SegmentTests(SimpleTestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.engine = RecordingEngine()
+        self.agent = AudioAgent(self.engine)
+
+    def test_segment_is_synthesized_once(self):
+        first = self.agent.segment(OUTRO)
+        second = AudioAgent(self.engine).segment(OUTRO)
+
+        self.assertEqual(second, first)
+        self.assertEqual(self.engine.texts, [OUTRO])
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "audios", "segments"))), 1)
+
+    def test_intro_and_outro_are_reused_across_audios(self):
+        summary = "Qubits are fragile. Error correction helps."
+        for number in range(2):
+            self.agent.generate_audio(summary, os.path.join(self.media, f"{number}.mp3"), topic="Physics")
+
+        self.assertEqual(self.engine.texts.count(self.agent.intro("Physics")), 1)
+        self.assertEqual(self.engine.texts.count(OUTRO), 1)
+        self.assertEqual(self.engine.texts.count(summary), 2)
+        with open(os.path.join(self.media, "1.mp3"), "rb") as f:
+            data = f.read()
+        self.assertEqual(data, SilentEngine().synthesize(self.agent.intro("Physics"))
+                         + SilentEngine().synthesize(summary) + SilentEngine().synthesize(OUTRO))
+
+    def test_segments_are_kept_per_engine(self):
+        class OtherEngine(RecordingEngine):
+            name = "other"
+
+        other = OtherEngine()
+        self.agent.segment(OUTRO)
+        AudioAgent(other).segment(OUTRO)
+
+        self.assertEqual((self.engine.texts, other.texts), ([OUTRO], [OUTRO]))
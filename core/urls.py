@@ -1,12 +1,24 @@
 from django.urls import path
 from core.views import (
+    AsyncIngestView,
+    AsyncSearchAndClassifyView,
     UploadPaperView,
     SearchAndClassifyView,
     ProcessDOIView,
     ProcessAcademicRepoURLView,
+    BatchIngestView,
     ResearchPaperListView,
     ResearchPaperDetailView,
-    SynthesizeSummaryView
+    PaperSearchView,
+    PaperAudioView,
+    RelatedPapersView,
+    SynthesizeSummaryView,
+    ClassifyTextView,
+    ModelStatusView,
+    ReadinessView,
+    MetricsView,
+    JobStatusView,
+    CacheStatsView
 )
 
 urlpatterns = [
@@ -15,7 +27,22 @@ urlpatterns = [
     path('process-url/', SearchAndClassifyView.as_view(), name="process-url"),  # POST
     path('process-doi/', ProcessDOIView.as_view(), name="process-doi"),
     path('process-academic-url/', ProcessAcademicRepoURLView.as_view(), name="process-academic-url"),
+    path('batch/', BatchIngestView.as_view(), name="batch-ingest"),
+    path('async/search/', AsyncSearchAndClassifyView.as_view(), name="async-search-classify"),
+    path('async/process-url/', AsyncIngestView.as_view(kind="pdf_url"), name="async-process-url"),
+    path('async/process-doi/', AsyncIngestView.as_view(kind="doi"), name="async-process-doi"),
+    path('async/process-academic-url/', AsyncIngestView.as_view(kind="academic_url"), name="async-process-academic-url"),
+    path('async/upload/', AsyncIngestView.as_view(kind="upload"), name="async-upload-paper"),
     path('papers/', ResearchPaperListView.as_view(), name="list-papers"),
     path('papers/<int:pk>/', ResearchPaperDetailView.as_view(), name="paper-detail"),
+    path('papers/search/', PaperSearchView.as_view(), name="paper-search"),
+    path('papers/<int:pk>/audio/', PaperAudioView.as_view(), name="paper-audio"),
+    path('papers/<int:pk>/related/', RelatedPapersView.as_view(), name="related-papers"),
     path('synthesize/', SynthesizeSummaryView.as_view(), name="synthesize-summary"),
+    path('classify/', ClassifyTextView.as_view(), name="classify-text"),
+    path('models/', ModelStatusView.as_view(), name="model-status"),
+    path('ready/', ReadinessView.as_view(), name="readiness"),
+    path('metrics/', MetricsView.as_view(), name="metrics"),
+    path('jobs/<uuid:pk>/', JobStatusView.as_view(), name="job-status"),
+    path('cache/', CacheStatsView.as_view(), name="cache-stats"),
 ]
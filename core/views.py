@@ -1,90 +1,187 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import ResearchPaper
-from .serializers import ResearchPaperSerializer
-from .agents.extraction_agent import ExtractionAgent
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+import httpx
+from .models import ResearchPaper, Job
+from .serializers import ResearchPaperSerializer, JobSerializer
 from .agents.summary_agent import SummaryAgent
 from .agents.audio_agent import AudioAgent
-from .agents.topic_classifier_agent import TopicClassificationAgent
+from .agents.topic_classifier_agent import TopicClassificationAgent, MODES as CLASSIFIER_MODES
 from .agents.paper_search_agent import PaperSearchAgent
+from .agents.model_registry import registry
+from .agents.fetcher import fetcher
+from .agents.result_cache import result_cache
+from . import aio, batch, jobs, metrics, search, synthesis
+from .pipeline import ArxivEntrySource, IngestError, PdfFileSource, Pipeline, PipelineConfig, make_source
+from .pagination import PaperCursorPagination
+from datetime import datetime
+import asyncio
+import json
+import logging
 import os
-import uuid
-import requests
-from bs4 import BeautifulSoup
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def wants_async(request):
+    return request.query_params.get("async") in ("1", "true")
+
+
+MAX_SEARCH_RESULTS = 50
+MAX_RESULTS_ERROR = {"error": f"max_results must be an integer from 1 to {MAX_SEARCH_RESULTS}."}
+
+
+def max_results_param(request):
+    """``?max_results`` of the search views, 1 to MAX_SEARCH_RESULTS (default 5); None if invalid."""
+    try:
+        max_results = int(request.GET.get("max_results", 5))
+    except ValueError:
+        return None
+    return max_results if 1 <= max_results <= MAX_SEARCH_RESULTS else None
+
+
+MAX_LIMIT = 100
+LIMIT_ERROR = {"error": f"limit must be an integer from 1 to {MAX_LIMIT}."}
+
+
+def limit_param(request, default):
+    """``?limit`` of the stored-paper search views, 1 to MAX_LIMIT; None if invalid."""
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        return None
+    return limit if 1 <= limit <= MAX_LIMIT else None
+
+
+# Query parameters that turn an optional pipeline stage off for one request, e.g. ?summary=false
+SKIP_PARAMS = {"classify": "classify", "summary": "summarize", "audio": "audio"}
+
+
+def pipeline_config(request):
+    """The deployment's PipelineConfig, minus the stages this request turns off."""
+    skipped = [stage for param, stage in SKIP_PARAMS.items() if request.GET.get(param) in ("0", "false")]
+    return PipelineConfig().without(*skipped)
+
+
+def enqueue_job(request, kind, payload, upload=None):
+    try:
+        job = jobs.enqueue(kind, {**payload, "stages": sorted(pipeline_config(request).stages)}, upload)
+    except jobs.QueueFull:
+        return Response({"error": "Job queue is full, try again later"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response({
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse("job-status", args=[job.id])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def ingest_response(request, source):
+    try:
+        paper, created = Pipeline(pipeline_config(request)).run(source)
+    except IngestError as e:
+        return Response(e.as_dict(), status=e.status_code)
+    serializer = ResearchPaperSerializer(paper)
+    return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def read_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type):
+    """Serve a file, honouring a single ``Range: bytes=`` request with a streamed 206."""
+    size = os.path.getsize(path)
+    match = RANGE_HEADER.match(request.headers.get("Range", "").strip())
+    if not match or not any(match.groups()):
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1  # suffix range: the last N bytes
+    if start >= size or start > end:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    response = StreamingHttpResponse(read_range(path, start, end - start + 1), status=206, content_type=content_type)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def search_and_classify(topic_query, max_results, config=None, model_executor=None):
+    """Search arXiv, then classify, summarize and store the papers not stored yet.
+
+    Returns the papers in search order and the pipeline's Server-Timing value.
+    Raises the IngestError of the first paper that failed, or of the search.
+    """
+    pipeline = Pipeline(config, model_executor)
+    papers = PaperSearchAgent().iter_arxiv(topic_query, max_results=max_results)
+    items = ({"index": index, "source": ArxivEntrySource(paper)} for index, paper in enumerate(papers))
+    finished = sorted(pipeline.run_many(items), key=lambda item: item["index"])
+    for item in finished:
+        if "exception" in item:
+            raise item["exception"]
+    papers = [item["paper"] if "paper" in item else finished[item["duplicate_of"]]["paper"] for item in finished]
+    return papers, pipeline.server_timing()
+
 
 class SearchAndClassifyView(APIView):
     def get(self, request):
         topic_query = request.GET.get("topic")
-        candidate_topics = ["Artificial Intelligence", "Quantum Computing", "Healthcare", "Finance", "Climate Change"]
 
         if not topic_query:
             return Response({"error": "Topic query is required."}, status=400)
 
-        search_agent = PaperSearchAgent()
-        classifier = TopicClassificationAgent()
-        summarizer = SummaryAgent()
-        audio_agent = AudioAgent()
-
-        results = search_agent.search_arxiv(topic_query)
-        saved = []
-
-        for paper in results:
-            best_topic = classifier.classify(paper["summary"], candidate_topics)
-            summary = summarizer.summarize(paper["summary"])
-
-            audio_filename = f"{uuid.uuid4()}.mp3"
-            audio_path = os.path.join("media/audios", audio_filename)
-            audio_agent.generate_audio(summary, audio_path, best_topic)
-
-            saved_paper = ResearchPaper.objects.create(
-                title=paper["title"],
-                summary=summary,
-                topic=best_topic,
-                source_url=paper["link"],
-                audio=f"audios/{audio_filename}"
-            )
-            saved.append(ResearchPaperSerializer(saved_paper).data)
+        max_results = max_results_param(request)
+        if max_results is None:
+            return Response(MAX_RESULTS_ERROR, status=400)
 
-        return Response(saved)
+        try:
+            papers, server_timing = search_and_classify(topic_query, max_results, pipeline_config(request))
+        except IngestError as e:
+            return Response(e.as_dict(), status=e.status_code)
+        response = Response(ResearchPaperSerializer(papers, many=True).data)
+        response["Server-Timing"] = server_timing
+        return response
 
     def post(self, request):
         url = request.data.get('url')
         if not url:
             return Response({'error': 'URL is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        extraction_agent = ExtractionAgent()
-        extracted_text = extraction_agent.extract_from_url(url)
-
-        if not extracted_text:
-            return Response({'error': 'Could not extract text from URL'}, status=status.HTTP_400_BAD_REQUEST)
-
-        classifier_agent = TopicClassificationAgent()
-        labels = ["Artificial Intelligence", "Quantum Computing", "Healthcare", "Finance", "Climate Change"]
-        topic = classifier_agent.classify(extracted_text[:500], labels)
-
-        summary_agent = SummaryAgent()
-        summary = summary_agent.summarize(extracted_text)
-
-        audio_agent = AudioAgent()
-        audio_filename = f"{uuid.uuid4()}.mp3"
-        audio_path = os.path.join('media/audios/', audio_filename)
-        audio_agent.generate_audio(summary, audio_path, topic)
-
-        html = requests.get(url, timeout=10).text
-        soup = BeautifulSoup(html, 'html.parser')
-        title_tag = soup.find("title")
-        title = title_tag.get_text(strip=True) if title_tag else url.split("/")[-1].replace("-", " ").replace(".pdf", "").title()
-
-        paper = ResearchPaper.objects.create(
-            title=title,
-            topic=topic,
-            summary=summary,
-            source_url=url,
-            audio=f"audios/{audio_filename}"
-        )
-        serializer = ResearchPaperSerializer(paper)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if wants_async(request):
+            return enqueue_job(request, "pdf_url", {"url": url})
+        return ingest_response(request, make_source("pdf_url", url))
 
 class ProcessDOIView(APIView):
     def post(self, request):
@@ -92,38 +189,9 @@ class ProcessDOIView(APIView):
         if not doi:
             return Response({'error': 'DOI is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        extraction_agent = ExtractionAgent()
-        extracted_text = extraction_agent.extract_from_doi(doi)
-
-        if not extracted_text:
-            return Response({'error': 'Could not extract text from DOI'}, status=status.HTTP_400_BAD_REQUEST)
-
-        classifier_agent = TopicClassificationAgent()
-        labels = ["Artificial Intelligence", "Quantum Computing", "Healthcare", "Finance", "Climate Change"]
-        topic = classifier_agent.classify(extracted_text[:500], labels)
-
-        summary_agent = SummaryAgent()
-        summary = summary_agent.summarize(extracted_text)
-
-        audio_agent = AudioAgent()
-        audio_filename = f"{uuid.uuid4()}.mp3"
-        audio_path = os.path.join('media/audios/', audio_filename)
-        audio_agent.generate_audio(summary, audio_path, topic)
-
-        html = requests.get(f"https://doi.org/{doi}", timeout=10).text
-        soup = BeautifulSoup(html, 'html.parser')
-        title_tag = soup.find("title")
-        title = title_tag.get_text(strip=True) if title_tag else doi.replace("/", " ").replace("-", " ").title()
-
-        paper = ResearchPaper.objects.create(
-            title=title,
-            doi=doi,
-            topic=topic,
-            summary=summary,
-            audio=f"audios/{audio_filename}"
-        )
-        serializer = ResearchPaperSerializer(paper)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if wants_async(request):
+            return enqueue_job(request, "doi", {"doi": doi})
+        return ingest_response(request, make_source("doi", doi))
 
 class UploadPaperView(APIView):
     def post(self, request):
@@ -131,46 +199,9 @@ class UploadPaperView(APIView):
         if not file:
             return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
 
-        temp_path = f"/tmp/{uuid.uuid4()}_{file.name}"
-        with open(temp_path, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
-
-        extraction_agent = ExtractionAgent()
-        extracted_text = extraction_agent.extract_text(temp_path)
-        os.remove(temp_path)
-
-        if not extracted_text:
-            return Response({'error': 'Failed to extract text from PDF'}, status=status.HTTP_400_BAD_REQUEST)
-
-        classifier_agent = TopicClassificationAgent()
-        labels = ["Artificial Intelligence", "Quantum Computing", "Healthcare", "Finance", "Climate Change"]
-        topic = classifier_agent.classify(extracted_text[:500], labels)
-
-        summary_agent = SummaryAgent()
-        summary = summary_agent.summarize(extracted_text)
-
-        audio_agent = AudioAgent()
-        audio_filename = f"{uuid.uuid4()}.mp3"
-        audio_path = os.path.join('media/audios/', audio_filename)
-        audio_agent.generate_audio(summary, audio_path, topic)
-
-        # extracting metadata title from PDF
-        try:
-            with fitz.open(temp_path) as doc:
-                title = doc.metadata.get("title") or file.name.replace('.pdf', '').replace('_', ' ').title()
-        except Exception:
-            title = file.name.replace('.pdf', '').replace('_', ' ').title()
-
-        paper = ResearchPaper.objects.create(
-            title=title,
-            topic=topic,
-            summary=summary,
-            file=file,
-            audio=f"audios/{audio_filename}"
-        )
-        serializer = ResearchPaperSerializer(paper)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if wants_async(request):
+            return enqueue_job(request, "upload", {}, upload=file)
+        return ingest_response(request, PdfFileSource(file))
 
 
 class ProcessAcademicRepoURLView(APIView):
@@ -179,56 +210,193 @@ class ProcessAcademicRepoURLView(APIView):
         if not url:
             return Response({"error": "URL is required"}, status=400)
 
-        try:
-            html = requests.get(url, timeout=10).text
-            soup = BeautifulSoup(html, 'html.parser')
+        if wants_async(request):
+            return enqueue_job(request, "academic_url", {"url": url})
+        return ingest_response(request, make_source("academic_url", url))
 
-            title_tag = soup.find("title")
-            title = title_tag.get_text(strip=True) if title_tag else url.split("/")[-1].replace("-", " ").replace(".html", "").title()
+def request_values(request):
+    """JSON body or form fields, for the plain Django views that don't get DRF's request.data."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+async def paper_json_response(paper, created):
+    data = await sync_to_async(lambda: ResearchPaperSerializer(paper).data)()
+    return JsonResponse(data, status=201 if created else 200)
+
+
+# DRF views are sync only, so the ASGI variants are plain Django views
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncIngestView(View):
+    """Async counterpart of the ingest views; ``kind`` is a pipeline.SOURCES key."""
+
+    kind = None
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        if self.kind == "upload":
+            value = request.FILES.get("file")
+            missing = "No file uploaded"
+        else:
+            data = request_values(request)
+            if data is None:
+                return JsonResponse({"error": "Invalid JSON body"}, status=400)
+            field = "doi" if self.kind == "doi" else "url"
+            value = data.get(field)
+            missing = f"{field.upper()} is required"
+        if not value:
+            return JsonResponse({"error": missing}, status=400)
 
-            article = soup.find("article")
-            paragraphs = article.find_all("p") if article else soup.find_all("p")
+        try:
+            paper, created = await Pipeline(pipeline_config(request)).arun(make_source(self.kind, value))
+        except IngestError as e:
+            return JsonResponse(e.as_dict(), status=e.status_code)
+        except asyncio.CancelledError:
+            logger.info("Client disconnected, %s ingest of %s cancelled", self.kind, getattr(value, "name", value))
+            raise
+        return await paper_json_response(paper, created)
 
-            text_blocks = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50]
-            if not text_blocks:
-                divs = soup.find_all("div")
-                text_blocks = [div.get_text(strip=True) for div in divs if len(div.get_text(strip=True)) > 50]
 
-            extracted_text = " ".join(text_blocks)
+class AsyncSearchAndClassifyView(View):
+    http_method_names = ["get"]
 
-        except Exception as e:
-            return Response({"error": "Failed to extract from academic repository", "details": str(e)}, status=500)
+    async def get(self, request):
+        topic_query = request.GET.get("topic")
+        if not topic_query:
+            return JsonResponse({"error": "Topic query is required."}, status=400)
+        max_results = max_results_param(request)
+        if max_results is None:
+            return JsonResponse(MAX_RESULTS_ERROR, status=400)
 
-        if not extracted_text.strip():
-            return Response({"error": "No meaningful content found at URL"}, status=400)
+        try:
+            # The arXiv pages land in the fetch cache, so the sync search below reads them from disk
+            search_agent = PaperSearchAgent()
+            await asyncio.gather(*(fetcher.afetch(url) for url in search_agent.page_urls(topic_query, max_results)))
+            # Only the model batches take a model_executor slot; fetches, TTS and saves wait elsewhere
+            papers, server_timing = await aio.run_in(None, search_and_classify, topic_query, max_results,
+                                                      pipeline_config(request), aio.model_executor)
+        except httpx.HTTPError as e:
+            return JsonResponse({"error": "Could not reach arXiv", "details": str(e)}, status=502)
+        except IngestError as e:
+            return JsonResponse(e.as_dict(), status=e.status_code)
+        except asyncio.CancelledError:
+            logger.info("Client disconnected, search for %r cancelled", topic_query)
+            raise
+        data = await sync_to_async(lambda: ResearchPaperSerializer(papers, many=True).data)()
+        response = JsonResponse(data, safe=False)
+        response["Server-Timing"] = server_timing
+        return response
+
+
+def batch_request_items(request):
+    """Split a /batch/ request into JSON items and uploaded PDFs.
+
+    Accepts a JSON list (or ``{"items": [...]}``), or a multipart form whose
+    files are PDFs and/or JSONL files with one item per line.
+    """
+    if request.FILES:
+        items, uploads = [], []
+        for file in request.FILES.getlist("files") + request.FILES.getlist("file"):
+            if file.name.lower().endswith((".jsonl", ".ndjson")):
+                items.extend(batch.parse_jsonl(file))
+            else:
+                uploads.append(file)
+        return items, uploads
+
+    data = request.data
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise IngestError("Send a JSON list of items, {\"items\": [...]}, or multipart files")
+    return items, []
+
+
+def batch_result(item):
+    result = {"index": item["index"]}
+    for key in ("id", "kind"):
+        if item.get(key) is not None:
+            result[key] = item[key]
+    if "error" in item:
+        result.update(status="error", **item["error"])
+    elif "duplicate_of" in item:
+        result.update(status="duplicate", duplicate_of=item["duplicate_of"])
+    else:
+        result.update(status="created" if item["created"] else "existing",
+                      paper=ResearchPaperSerializer(item["paper"]).data)
+    return result
+
+
+def stream_json_array(rows):
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(row, cls=DjangoJSONEncoder)
+    yield "]"
+
+
+class BatchIngestView(APIView):
+    def post(self, request):
+        try:
+            items, uploads = batch_request_items(request)
+        except IngestError as e:
+            return Response(e.as_dict(), status=e.status_code)
 
-        classifier_agent = TopicClassificationAgent()
-        labels = ["Artificial Intelligence", "Quantum Computing", "Healthcare", "Finance", "Climate Change"]
-        topic = classifier_agent.classify(extracted_text[:500], labels)
+        count = len(items) + len(uploads)
+        if not count:
+            return Response({"error": "No items to ingest"}, status=status.HTTP_400_BAD_REQUEST)
+        if count > settings.BATCH_MAX_ITEMS:
+            return Response({"error": f"At most {settings.BATCH_MAX_ITEMS} items per batch"}, status=400)
 
-        summary_agent = SummaryAgent()
-        summary = summary_agent.summarize(extracted_text)
-
-        audio_agent = AudioAgent()
-        audio_filename = f"{uuid.uuid4()}.mp3"
-        audio_path = os.path.join('media/audios/', audio_filename)
-        audio_agent.generate_audio(summary, audio_path, topic)
-
-        paper = ResearchPaper.objects.create(
-            title=title,
-            topic=topic,
-            summary=summary,
-            source_url=url,
-            audio=f"audios/{audio_filename}"
-        )
-        serializer = ResearchPaperSerializer(paper)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # One NDJSON line per item as soon as it finishes, in completion order
+        finished = batch.BatchIngest(pipeline_config(request)).run(items, uploads)
+        lines = (json.dumps(batch_result(item), cls=DjangoJSONEncoder) + "\n" for item in finished)
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
 
 class ResearchPaperListView(APIView):
     def get(self, request):
         papers = ResearchPaper.objects.all()
-        serializer = ResearchPaperSerializer(papers, many=True)
-        return Response(serializer.data)
+
+        topic = request.GET.get("topic")
+        if topic:
+            papers = papers.filter(topic=topic)
+
+        for param, lookup in (("since", "uploaded_at__gte"), ("until", "uploaded_at__lt")):
+            if param in request.GET:
+                try:
+                    value = parse_datetime(request.GET[param]) or parse_date(request.GET[param])
+                except ValueError:
+                    value = None
+                if value is None:
+                    return Response({"error": f"{param} must be an ISO date or datetime"}, status=400)
+                if not isinstance(value, datetime):
+                    value = datetime.combine(value, datetime.min.time())
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                papers = papers.filter(**{lookup: value})
+
+        fields = None
+        if request.GET.get("fields"):
+            fields = [name.strip() for name in request.GET["fields"].split(",") if name.strip()]
+            unknown = set(fields) - set(ResearchPaperSerializer().fields)
+            if unknown:
+                return Response({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}, status=400)
+            # uploaded_at and id are the cursor; deferring them would cost a query per row.
+            # audio_url isn't a column, it is derived from the summary.
+            columns = [name for name in fields if name != "audio_url"] + (["summary"] if "audio_url" in fields else [])
+            papers = papers.only(*columns, "uploaded_at", "id")
+
+        if request.GET.get("export") in ("1", "true"):
+            papers = papers.order_by("-uploaded_at", "-id").iterator(chunk_size=1000)
+            rows = (ResearchPaperSerializer(paper, fields=fields).data for paper in papers)
+            return StreamingHttpResponse(stream_json_array(rows), content_type="application/json")
+
+        paginator = PaperCursorPagination()
+        page = paginator.paginate_queryset(papers, request, view=self)
+        serializer = ResearchPaperSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
 class ResearchPaperDetailView(APIView):
     def get(self, request, pk):
@@ -239,20 +407,201 @@ class ResearchPaperDetailView(APIView):
         serializer = ResearchPaperSerializer(paper)
         return Response(serializer.data)
 
+def search_response(results, elapsed, **extra):
+    data = [{**ResearchPaperSerializer(paper).data, "score": round(score, 4)} for paper, score in results]
+    response = Response({**extra, "results": data})
+    response["Server-Timing"] = f"search;dur={elapsed * 1000:.1f}"
+    return response
+
+
+class PaperAudioView(APIView):
+    def get(self, request, pk):
+        try:
+            paper = ResearchPaper.objects.get(pk=pk)
+        except ResearchPaper.DoesNotExist:
+            return Response({'error': 'Paper not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if paper.audio:
+            try:
+                return self.serve(request, paper.audio.name)
+            except FileNotFoundError:
+                pass  # never rendered here, or prune_audio removed it; render it again
+
+        if not paper.summary:
+            return Response({'error': 'Paper has no summary to read'}, status=status.HTTP_404_NOT_FOUND)
+        # Concurrent requests wait on the agent's lock instead of rendering twice
+        name = AudioAgent().audio_for(paper.summary, paper.topic)
+        ResearchPaper.objects.filter(pk=pk).update(audio=name)
+        return self.serve(request, name)
+
+    def serve(self, request, name):
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.utime(path)  # last access, for prune_audio
+        return ranged_file_response(request, path, "audio/mpeg")
+
+class PaperSearchView(APIView):
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        if not query:
+            return Response({"error": "Query (q) is required."}, status=400)
+
+        mode = request.GET.get("mode", "auto")
+        if mode not in search.MODES:
+            return Response({"error": f"mode must be one of: {', '.join(search.MODES)}"}, status=400)
+        if mode == "semantic" and not settings.EMBEDDINGS_ENABLED:
+            return Response({"error": "Semantic search is disabled (EMBEDDINGS_ENABLED)."}, status=400)
+
+        limit = limit_param(request, 20)
+        if limit is None:
+            return Response(LIMIT_ERROR, status=400)
+
+        started = time.perf_counter()
+        hits = search.search(query, limit, topic=request.GET.get("topic"), mode=mode)
+        results = search.papers_for(hits)
+        return search_response(results, time.perf_counter() - started, query=query)
+
+class RelatedPapersView(APIView):
+    def get(self, request, pk):
+        try:
+            paper = ResearchPaper.objects.get(pk=pk)
+        except ResearchPaper.DoesNotExist:
+            return Response({'error': 'Paper not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        limit = limit_param(request, 10)
+        if limit is None:
+            return Response(LIMIT_ERROR, status=400)
+
+        started = time.perf_counter()
+        results = search.papers_for(search.related(paper, limit))
+        return search_response(results, time.perf_counter() - started, paper=paper.pk)
+
+def cached_synthesis_response(request, topic, budget_seconds):
+    result, stale = synthesis.get(topic, budget_seconds)
+    if result is None:
+        return Response({"error": "No summaries found for this topic"}, status=404)
+
+    etag = f'"{result.etag}"'
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({
+            "topic": topic,
+            "synthesized_summary": result.summary,
+            "paper_count": result.paper_count,
+            "updated_at": result.updated_at,
+            "stale": stale,  # a refresh is queued; poll again with If-None-Match
+        })
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
 class SynthesizeSummaryView(APIView):
     def get(self, request):
         topic = request.GET.get("topic")
         if not topic:
             return Response({"error": "Topic is required"}, status=400)
 
-        papers = ResearchPaper.objects.filter(topic=topic)
-        combined_summary = " ".join(p.summary for p in papers if p.summary)
-
-        if not combined_summary:
-            return Response({"error": "No summaries found for this topic"}, status=404)
+        try:
+            budget_seconds = float(request.GET["budget"]) if "budget" in request.GET else None
+        except ValueError:
+            return Response({"error": "budget must be a number of seconds"}, status=400)
+
+        query = request.GET.get("q")
+        stream = request.GET.get("stream") in ("1", "true")
+        if not query and not stream:
+            return cached_synthesis_response(request, topic, budget_seconds)
+
+        papers = synthesis.topic_papers(topic)
+        if query:
+            # Only the papers most relevant to the query, instead of the whole topic
+            limit = limit_param(request, 20)
+            if limit is None:
+                return Response(LIMIT_ERROR, status=400)
+            hits = search.search(query, limit, topic=topic)
+            summaries = [paper.summary for paper, _ in search.papers_for(hits, papers.only("id", "summary"))]
+            if not summaries:
+                return Response({"error": "No summaries found for this topic and query"}, status=404)
+        else:
+            summaries = papers.values_list("summary", flat=True)
+            if not summaries.exists():
+                return Response({"error": "No summaries found for this topic"}, status=404)
+            summaries = summaries.iterator()
 
         summary_agent = SummaryAgent()
-        synthesized_summary = summary_agent.summarize(combined_summary)
+        partials = summary_agent.summarize_stream(summaries, budget_seconds=budget_seconds)
+
+        if stream:
+            lines = (json.dumps({"topic": topic, **partial}) + "\n" for partial in partials)
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        synthesized_summary = ""
+        for partial in partials:
+            if partial.get("final"):
+                synthesized_summary = partial["summary"]
         return Response({"topic": topic, "synthesized_summary": synthesized_summary})
 
+class ClassifyTextView(APIView):
+    def post(self, request):
+        text = request.data.get("text")
+        if not text:
+            return Response({"error": "Text is required"}, status=status.HTTP_400_BAD_REQUEST)
 
+        mode = request.data.get("mode") or settings.CLASSIFIER_MODE
+        if mode not in CLASSIFIER_MODES:
+            return Response({"error": f"mode must be one of: {', '.join(CLASSIFIER_MODES)}"}, status=400)
+
+        labels = request.data.get("labels")
+        if labels is not None and (not isinstance(labels, list) or not all(isinstance(label, str) for label in labels)):
+            return Response({"error": "labels must be a list of strings"}, status=400)
+
+        started = time.perf_counter()
+        try:
+            classifier = TopicClassificationAgent(mode)
+        except ImproperlyConfigured as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        result = classifier.classify_scores([text], labels)[0]
+        elapsed = time.perf_counter() - started
+
+        response = Response({"mode": mode, **result, "seconds": round(elapsed, 4)})
+        response["Server-Timing"] = f"classify;dur={elapsed * 1000:.1f}"
+        return response
+
+class ModelStatusView(APIView):
+    def get(self, request):
+        return Response({
+            **registry.stats(),
+            "backend": settings.INFERENCE_BACKEND,
+            "threads": settings.INFERENCE_THREADS,
+            "interop_threads": settings.INFERENCE_INTEROP_THREADS,
+        })
+
+class ReadinessView(APIView):
+    def get(self, request):
+        # With MODEL_WARMUP off no warmup runs and models load on first use, so there is nothing to wait for
+        warmup = registry.warmup_status()
+        ready = not warmup["warming"]
+        return Response(
+            {"ready": ready, "pid": os.getpid(), **warmup},
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+class MetricsView(APIView):
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            return Response({'error': 'Metrics are disabled'}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+class JobStatusView(APIView):
+    def get(self, request, pk):
+        try:
+            job = Job.objects.select_related("paper").get(pk=pk)
+        except Job.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = JobSerializer(job)
+        return Response(serializer.data)
+
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response(result_cache.stats())
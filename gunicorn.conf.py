@@ -0,0 +1,40 @@
+"""gunicorn settings, e.g. ``gunicorn -c gunicorn.conf.py research_summarizer_api.wsgi:application``.
+
+With preload_app the master imports Django, CoreConfig.ready() starts
+loading the models (MODEL_WARMUP), and pre_fork waits for them before any
+worker is forked. The workers then share the weight pages copy-on-write
+instead of each loading its own copy, and a worker that is restarted is
+ready as soon as it forks. WEB_CONCURRENCY defaults to gunicorn's own
+single worker.
+"""
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# ONNX Runtime sessions start their thread pools when they are created and
+# can't be used across fork, so with the onnx backend each worker loads its own
+preload_app = os.getenv("GUNICORN_PRELOAD", str(os.getenv("INFERENCE_BACKEND", "torch") != "onnx")) == "True"
+if preload_app:
+    os.environ.setdefault("MODEL_WARMUP", "True")
+
+
+def pre_fork(server, worker):
+    if not preload_app:
+        return
+    # Warmup runs on a thread, which a forked worker wouldn't inherit; fork once the models are in
+    from core.agents.model_registry import registry
+    registry.wait_warmup()
+    # Startup shouldn't open a connection, but a socket shared by two workers corrupts both
+    from django.db import connections
+    connections.close_all()
+    # Keep the garbage collector from writing to (and so copying) the preloaded objects' pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from core.agents.backends import reset_threads
+        reset_threads()
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -115,4 +116,150 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Load the models the pipeline uses when the app starts instead of on the
+# first request that needs them; /ready/ answers 503 until they are loaded.
+# gunicorn.conf.py turns this on with preload_app, so the models load once in
+# the master and the forked workers share them.
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'False') == 'True'
+
+# Background ingest jobs (?async=1). Workers are threads inside each web
+# process; pending jobs live in the database so no broker is needed.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+JOB_QUEUE_MAX_PENDING = int(os.getenv('JOB_QUEUE_MAX_PENDING', '100'))
+# Workers renew a running job's lease every third of JOB_LEASE_SECONDS. A job
+# whose lease lapses (its process died) is queued again, and failed once it
+# has been claimed JOB_MAX_ATTEMPTS times.
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '120'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+# Number of texts per forward pass for the batched summarize/classify calls
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', '8'))
+
+# Content-addressed cache for extraction, classification, summary and audio
+# results: an in-memory LRU per process in front of the CachedResult table.
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True') == 'True'
+RESULT_CACHE_MEMORY_BYTES = int(os.getenv('RESULT_CACHE_MEMORY_BYTES', str(64 * 2 ** 20)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(512 * 2 ** 20)))
+
+# 'truncate' summarizes the first 3000 characters in one call; 'mapreduce'
+# summarizes token-window chunks of the whole text and reduces them recursively.
+SUMMARY_MODE = os.getenv('SUMMARY_MODE', 'truncate')
+SUMMARY_BUDGET_SECONDS = float(os.getenv('SUMMARY_BUDGET_SECONDS', '60'))
+SUMMARY_MAX_CHUNKS = int(os.getenv('SUMMARY_MAX_CHUNKS', '32'))
+
+# PDFs with at least EXTRACTION_PARALLEL_MIN_PAGES pages are extracted in
+# page ranges across a pool of EXTRACTION_WORKERS processes.
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+EXTRACTION_PARALLEL_MIN_PAGES = int(os.getenv('EXTRACTION_PARALLEL_MIN_PAGES', '64'))
+EXTRACTION_PAGES_PER_TASK = int(os.getenv('EXTRACTION_PAGES_PER_TASK', '16'))
+
+# 'full' extracts every page of an ingested PDF. 'lead' stops as soon as
+# classification and summarization have their input: the text from the
+# Abstract heading up to the end of the introduction or the summarizer's
+# character limit, reading at most INGEST_LEAD_MAX_PAGES pages. Uploads are
+# fingerprinted by extracted text, so switching modes changes their
+# fingerprints. Ignored when SUMMARY_MODE is 'mapreduce'.
+INGEST_EXTRACT_MODE = os.getenv('INGEST_EXTRACT_MODE', 'full')
+INGEST_LEAD_MAX_PAGES = int(os.getenv('INGEST_LEAD_MAX_PAGES', '4'))
+
+# Optional stages every ingest runs (core/pipeline), of classify, summarize
+# and audio. Requests can turn more off with ?classify=false,
+# ?summary=false or ?audio=false. Audio also needs AUDIO_MODE 'eager'.
+PIPELINE_STAGES = [stage.strip() for stage in os.getenv(
+    'PIPELINE_STAGES', 'classify,summarize,audio'
+).split(',') if stage.strip()]
+# Seconds a stage may take per item or batch, e.g. 'extract=60,summarize=120';
+# an item whose stage overruns fails with 504
+PIPELINE_STAGE_TIMEOUTS = {
+    name.strip(): float(seconds) for name, seconds in (
+        pair.split('=') for pair in os.getenv('PIPELINE_STAGE_TIMEOUTS', '').split(',') if pair.strip()
+    )
+}
 
+# Shared outbound HTTP client (core/agents/fetcher.py). Responses are cached
+# on disk; within FETCH_FRESH_SECONDS they are reused without a request,
+# after that they are revalidated with ETag/Last-Modified. Responses marked
+# Cache-Control: no-store or private are never reused.
+FETCH_CACHE_DIR = os.getenv('FETCH_CACHE_DIR', str(BASE_DIR / 'cache' / 'fetch'))
+FETCH_CACHE_MAX_BYTES = int(os.getenv('FETCH_CACHE_MAX_BYTES', str(2 ** 30)))
+FETCH_FRESH_SECONDS = int(os.getenv('FETCH_FRESH_SECONDS', '300'))
+# Downloads stop, and fail, once a body passes FETCH_MAX_BODY_BYTES (0 = no limit)
+FETCH_MAX_BODY_BYTES = int(os.getenv('FETCH_MAX_BODY_BYTES', str(100 * 2 ** 20)))
+FETCH_MAX_PER_HOST = int(os.getenv('FETCH_MAX_PER_HOST', '4'))
+FETCH_RETRIES = int(os.getenv('FETCH_RETRIES', '3'))
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '30'))
+FETCH_USER_AGENT = os.getenv('FETCH_USER_AGENT', 'research-summarizer-api/1.0')
+# Academic landing pages: only the first HTML_MAX_BYTES of a page are parsed
+HTML_MAX_BYTES = int(os.getenv('HTML_MAX_BYTES', str(2 * 2 ** 20)))
+
+ARXIV_API_URL = os.getenv('ARXIV_API_URL', 'http://export.arxiv.org/api/query')
+ARXIV_PAGE_SIZE = int(os.getenv('ARXIV_PAGE_SIZE', '100'))
+ARXIV_QUERY_CACHE_SECONDS = int(os.getenv('ARXIV_QUERY_CACHE_SECONDS', '600'))
+# Each search fetches its next arXiv page on a shared pool of
+# SEARCH_PREFETCH_WORKERS threads; size it to the searches a process serves
+# at once. Searches beyond it wait for a free thread; more than
+# FETCH_MAX_PER_HOST only queues on the per-host limit.
+SEARCH_PREFETCH_WORKERS = int(os.getenv('SEARCH_PREFETCH_WORKERS', '4'))
+
+# Concurrent gTTS syntheses per search request
+AUDIO_WORKERS = int(os.getenv('AUDIO_WORKERS', '4'))
+
+# Semantic search: embed every paper's title and summary at ingest and keep
+# the vectors in an in-memory index (core/search.py). Full-text search works
+# without it.
+EMBEDDINGS_ENABLED = os.getenv('EMBEDDINGS_ENABLED', 'False') == 'True'
+
+# Topics every ingested paper is classified into (comma-separated)
+TOPIC_LABELS = [label.strip() for label in os.getenv(
+    'TOPIC_LABELS', 'Artificial Intelligence,Quantum Computing,Healthcare,Finance,Climate Change'
+).split(',') if label.strip()]
+
+# 'zero-shot' runs the NLI pipeline once per label; 'embedding' compares a
+# sentence embedding with cached label embeddings; 'linear' uses a head
+# trained on stored papers by `manage.py train_topic_head`.
+CLASSIFIER_MODE = os.getenv('CLASSIFIER_MODE', 'zero-shot')
+CLASSIFIER_HEAD_PATH = os.getenv('CLASSIFIER_HEAD_PATH', str(BASE_DIR / 'cache' / 'topic_head.npz'))
+
+# How the transformer models run on CPU: 'torch' (fp32), 'torch-int8'
+# (dynamic int8 quantization of Linear layers) or 'onnx' (ONNX Runtime via
+# optimum, installed separately). Thread counts apply per process, so with
+# several gunicorn workers keep workers * INFERENCE_THREADS <= cores. 0
+# keeps the library default.
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '0'))
+INFERENCE_INTEROP_THREADS = int(os.getenv('INFERENCE_INTEROP_THREADS', '0'))
+
+# Text-to-speech for the podcast audio. TTS_ENGINE is 'gtts', 'silent' (an
+# offline stub) or a dotted path to a core.agents.tts.TTSEngine subclass.
+# Summaries are split into sentence chunks of up to TTS_CHUNK_CHARS and
+# synthesized on a shared pool of TTS_WORKERS threads.
+TTS_ENGINE = os.getenv('TTS_ENGINE', 'gtts')
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', '8'))
+TTS_CHUNK_CHARS = int(os.getenv('TTS_CHUNK_CHARS', '200'))
+
+# 'eager' renders each paper's audio at ingest. 'lazy' skips it, and
+# /papers/<pk>/audio/ renders it on the first request. `manage.py
+# prune_audio` evicts the least recently served files beyond
+# AUDIO_MAX_BYTES, and any idle longer than AUDIO_MAX_IDLE_DAYS (0 = never).
+AUDIO_MODE = os.getenv('AUDIO_MODE', 'eager')
+AUDIO_LOCK_TIMEOUT = float(os.getenv('AUDIO_LOCK_TIMEOUT', '300'))
+AUDIO_MAX_BYTES = int(os.getenv('AUDIO_MAX_BYTES', str(2 * 2 ** 30)))
+AUDIO_MAX_IDLE_DAYS = float(os.getenv('AUDIO_MAX_IDLE_DAYS', '0'))
+
+# /batch/ ingest: items per request, and concurrent downloads/extractions
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+BATCH_FETCH_WORKERS = int(os.getenv('BATCH_FETCH_WORKERS', '8'))
+
+# Per-stage timings and counters (fetch, extract, classify, summarize, tts,
+# db_write...). METRICS_ENABLED exposes them in Prometheus text format at
+# /metrics/; SERVER_TIMING_ENABLED adds each request's stage timings to its
+# Server-Timing header. With both off the middleware is not installed.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'False') == 'True'
+
+# The async/ views (served under ASGI) fetch on the event loop and run
+# PDF/HTML parsing and model calls on these bounded thread pools.
+ASYNC_EXTRACT_WORKERS = int(os.getenv('ASYNC_EXTRACT_WORKERS', '4'))
+ASYNC_MODEL_WORKERS = int(os.getenv('ASYNC_MODEL_WORKERS', '2'))
+ASYNC_FETCH_MAX_CONNECTIONS = int(os.getenv('ASYNC_FETCH_MAX_CONNECTIONS', '200'))